@@ -4,392 +4,356 @@
 批量翻译CMS系统中的所有中文文本为英文
 """
 
+import argparse
+import functools
+import json
 import os
 import re
+import sys
+import time
 
-# 完整的翻译字典
-TRANSLATIONS = {
-    # 基础UI文本
-    "文章": "Articles",
-    "产品": "Products", 
-    "问答": "Q&A",
-    "下载": "Downloads",
-    "视频": "Videos",
-    "分类": "Category",
-    "类别": "Category",
-    "标签": "Tags",
-    "作者": "Author",
-    "发布时间": "Published",
-    "更新时间": "Updated",
-    "浏览量": "Views",
-    "点击量": "Clicks",
-    "下载量": "Downloads",
-    "回答": "Answers",
-    "提问": "Ask",
-    "评论": "Comments",
-    "内容": "Content",
-    "标题": "Title",
-    "描述": "Description",
-    "简介": "Summary",
-    "详情": "Details",
-    "列表": "List",
-    
-    # 用户角色
-    "游客": "Guest",
-    "会员": "Member",
-    "普通会员": "Regular Member",
-    "高级会员": "Premium Member",
-    "管理员": "Administrator",
-    "编辑": "Editor",
-    
-    # 动作
-    "登录": "Login",
-    "注册": "Register",
-    "退出": "Logout",
-    "退出登录": "Logout",
-    "保存": "Save",
-    "取消": "Cancel",
-    "删除": "Delete",
-    "编辑": "Edit",
-    "修改": "Modify",
-    "添加": "Add",
-    "新增": "Add",
-    "搜索": "Search",
-    "查询": "Query",
-    "提交": "Submit",
-    "发布": "Publish",
-    "审核": "Review",
-    "通过": "Approve",
-    "拒绝": "Reject",
-    "返回": "Back",
-    "查看": "View",
-    "查看更多": "View More",
-    "加载更多": "Load More",
-    "刷新": "Refresh",
-    "重置": "Reset",
-    "确认": "Confirm",
-    "关闭": "Close",
-    "打开": "Open",
-    "展开": "Expand",
-    "收起": "Collapse",
-    
-    # 状态
-    "草稿": "Draft",
-    "待审核": "Pending",
-    "已发布": "Published",
-    "已下线": "Offline",
-    "已删除": "Deleted",
-    "启用": "Enabled",
-    "禁用": "Disabled",
-    "正常": "Normal",
-    "异常": "Abnormal",
-    
-    # 消息提示
-    "成功": "Success",
-    "失败": "Failed",
-    "错误": "Error",
-    "警告": "Warning",
-    "提示": "Info",
-    "通知": "Notification",
-    "加载中": "Loading",
-    "加载中...": "Loading...",
-    "处理中": "Processing",
-    "请稍候": "Please wait",
-    
-    # 成功消息
-    "保存成功": "Saved successfully",
-    "删除成功": "Deleted successfully",
-    "更新成功": "Updated successfully",
-    "提交成功": "Submitted successfully",
-    "发布成功": "Published successfully",
-    "登录成功": "Login successful",
-    "注册成功": "Registration successful",
-    "操作成功": "Operation successful",
-    
-    # 失败消息
-    "加载失败": "Failed to load",
-    "保存失败": "Failed to save",
-    "删除失败": "Failed to delete",
-    "更新失败": "Failed to update",
-    "提交失败": "Failed to submit",
-    "发布失败": "Failed to publish",
-    "登录失败": "Login failed",
-    "注册失败": "Registration failed",
-    "操作失败": "Operation failed",
-    
-    # 常用短语
-    "全部": "All",
-    "最新": "Latest",
-    "热门": "Popular",
-    "推荐": "Recommended",
-    "精选": "Featured",
-    "置顶": "Pinned",
-    "没有更多": "No more",
-    "暂无数据": "No data",
-    "暂无内容": "No content",
-    "空": "Empty",
-    
-    # 权限相关
-    "请先登录": "Please login first",
-    "需要登录": "Login required",
-    "权限不足": "Insufficient permissions",
-    "无权访问": "Access denied",
-    "仅限会员": "Members only",
-    
-    # 验证消息
-    "不能为空": "Cannot be empty",
-    "内容不能为空": "Content cannot be empty",
-    "标题不能为空": "Title cannot be empty",
-    "请输入": "Please enter",
-    "请选择": "Please select",
-    "格式不正确": "Invalid format",
-    "长度不符": "Invalid length",
-    
-    # 确认消息
-    "确定要删除": "Are you sure you want to delete",
-    "确定删除": "Confirm delete",
-    "确认操作": "Confirm operation",
-    "不可恢复": "Cannot be recovered",
-    
-    # 页面标题
-    "首页": "Home",
-    "个人中心": "Profile",
-    "我的文章": "My Articles",
-    "搜索结果": "Search Results",
-    "未找到": "Not Found",
-    "页面不存在": "Page Not Found",
-    
-    # 特定短语 - 文章
-    "文章不存在": "Article not found",
-    "文章列表": "Article List",
-    "文章详情": "Article Details",
-    "文章分类": "Article Categories",
-    "全部文章": "All Articles",
-    "最新文章": "Latest Articles",
-    "热门文章": "Popular Articles",
-    "相关文章": "Related Articles",
-    "返回文章列表": "Back to Article List",
-    "文章Category": "Article Categories",
-    "篇文章": "articles",
-    "加载文章失败": "Failed to load article",
-    "文章已更新，等待审核": "Article updated, pending review",
-    "文章已提交，等待审核": "Article submitted, pending review",
-    "文章已删除": "Article deleted",
-    "文章Content不能为空": "Article content cannot be empty",
-    "确定要删除这篇文章吗": "Are you sure you want to delete this article",
-    
-    # 特定短语 - 产品
-    "产品不存在": "Product not found",
-    "产品列表": "Product List",
-    "产品详情": "Product Details",
-    "产品分类": "Product Categories",
-    "全部产品": "All Products",
-    "最新产品": "Latest Products",
-    "热门产品": "Popular Products",
-    "相关产品": "Related Products",
-    "返回产品列表": "Back to Product List",
-    "产品Category": "Product Categories",
-    "个产品": "products",
-    "加载产品失败": "Failed to load product",
-    
-    # 特定短语 - 问答
-    "问题不存在": "Question not found",
-    "问答列表": "Q&A List",
-    "问题详情": "Question Details",
-    "问答分类": "Q&A Categories",
-    "全部问答": "All Q&A",
-    "最新问答": "Latest Q&A",
-    "热门问答": "Popular Q&A",
-    "相关问答": "Related Q&A",
-    "返回问答列表": "Back to Q&A List",
-    "问答Category": "Q&A Categories",
-    "个问题": "questions",
-    "加载问题失败": "Failed to load question",
-    "提交问题": "Submit Question",
-    "我要提问": "Ask Question",
-    "回答问题": "Answer Question",
-    "提交回答": "Submit Answer",
-    "回答成功": "Answer submitted",
-    "您的回答已提交": "Your answer has been submitted",
-    "提交回答失败": "Failed to submit answer",
-    "请先登录后再回答问题": "Please login before answering questions",
-    "请输入回答内容": "Please enter answer content",
-    "您的问题已提交，等待管理员审核后将显示在列表中": "Your question has been submitted and will be displayed after admin review",
-    "提交问题失败，请重试": "Failed to submit question, please try again",
-    
-    # 特定短语 - 下载
-    "下载资源不存在": "Download resource not found",
-    "下载列表": "Download List",
-    "下载详情": "Download Details",
-    "下载分类": "Download Categories",
-    "全部下载": "All Downloads",
-    "最新下载": "Latest Downloads",
-    "热门下载": "Popular Downloads",
-    "相关下载": "Related Downloads",
-    "返回下载列表": "Back to Download List",
-    "下载Category": "Download Categories",
-    "个下载": "downloads",
-    "加载下载失败": "Failed to load download",
-    "下载文件": "Download File",
-    "开始下载": "Start Download",
-    "下载开始": "Download started",
-    "文件下载已开始": "File download has started",
-    "下载失败": "Download failed",
-    "无法下载文件，请重试": "Unable to download file, please try again",
-    "请先登录后再下载": "Please login before downloading",
-    "此资源仅限会员下载，请升级会员后再试": "This resource is for members only, please upgrade your membership",
-    "检查模块权限设置：是否需要登录才能下载": "Check module permission settings: login required for download",
-    "检查会员权限": "Check member permissions",
-    "触发下载": "Trigger download",
-    
-    # 特定短语 - 视频
-    "视频不存在": "Video not found",
-    "视频列表": "Video List",
-    "视频详情": "Video Details",
-    "视频分类": "Video Categories",
-    "全部视频": "All Videos",
-    "最新视频": "Latest Videos",
-    "热门视频": "Popular Videos",
-    "相关视频": "Related Videos",
-    "返回视频列表": "Back to Video List",
-    "视频Category": "Video Categories",
-    "个视频": "videos",
-    "加载视频失败": "Failed to load video",
-    
-    # 特定短语 - 用户
-    "欢迎回来": "Welcome back",
-    "欢迎加入": "Welcome",
-    "正在跳转": "Redirecting",
-    "欢迎回来！": "Welcome back!",
-    "欢迎加入！正在跳转...": "Welcome! Redirecting...",
-    "已退出": "Logged out",
-    "您已成功退出登录": "You have successfully logged out",
-    "个人资料": "Profile",
-    "修改资料": "Edit Profile",
-    "用户名": "Username",
-    "密码": "Password",
-    "确认密码": "Confirm Password",
-    "昵称": "Nickname",
-    "邮箱": "Email",
-    "手机": "Phone",
-    "头像": "Avatar",
-    
-    # 特定短语 - 搜索
-    "搜索关键词": "Search keyword",
-    "搜索结果": "Search Results",
-    "搜索失败": "Search failed",
-    "记录搜索关键词": "Record search keyword",
-    "没有找到相关内容": "No results found",
-    
-    # 特定短语 - 分类
-    "分类管理": "Category Management",
-    "添加分类": "Add Category",
-    "编辑分类": "Edit Category",
-    "删除分类": "Delete Category",
-    "分类名称": "Category Name",
-    "分类描述": "Category Description",
-    
-    # 特定短语 - 统计
-    "总计": "Total",
-    "共": "Total",
-    "条": "items",
-    "页": "pages",
-    "第": "Page",
-    "上一页": "Previous",
-    "下一页": "Next",
-    "首页": "First",
-    "尾页": "Last",
-    
-    # 特定短语 - 时间
-    "刚刚": "Just now",
-    "分钟前": "minutes ago",
-    "小时前": "hours ago",
-    "天前": "days ago",
-    "周前": "weeks ago",
-    "月前": "months ago",
-    "年前": "years ago",
-    
-    # 特定短语 - 其他
-    "探索精彩内容,获取最新资讯": "Explore exciting content and get the latest information",
-    "发现优质产品,满足您的需求": "Discover quality products to meet your needs",
-    "获取实用资源,提升工作效率": "Get practical resources to improve work efficiency",
-    "观看精彩视频,学习新知识": "Watch exciting videos and learn new knowledge",
-    "提出您的问题,获得专业解答": "Ask your questions and get professional answers",
-    
-    # Console.log 消息
-    "加载数据失败": "Failed to load data",
-    "保存数据失败": "Failed to save data",
-    "删除数据失败": "Failed to delete data",
-    
-    # 注释
-    "左侧边栏": "Left sidebar",
-    "右侧边栏": "Right sidebar",
-    "主要内容": "Main content",
-    "顶部导航": "Top navigation",
-    "底部信息": "Footer",
-    "加载状态": "Loading state",
-    "错误状态": "Error state",
-    "空状态": "Empty state",
-    "等待一下让触发器创建profile": "Wait for trigger to create profile",
-    "处理各种登录错误": "Handle various login errors",
-    "处理各种错误情况": "Handle various error cases",
-    "注册用户": "Register user",
-    "重新加载问题以显示新回答": "Reload question to display new answer",
-}
-
-def translate_content(content):
-    """翻译内容中的中文文本"""
-    # 按照长度从长到短排序，避免短词替换影响长词
-    sorted_translations = sorted(TRANSLATIONS.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for chinese, english in sorted_translations:
-        content = content.replace(chinese, english)
-    
-    return content
+import translate_dict
+import translate_manifest
+import translate_stats
+from check_chinese import (
+    find_chinese_lines,
+    print_chinese_report,
+    print_missing_phrases,
+    rank_missing_phrases,
+)
+from scan_engine import list_source_files, scan
+from tsx_lexer import iter_text_regions
 
-def translate_file(filepath):
-    """翻译文件中的中文文本"""
+DEFAULT_SRC_DIR = "/workspace/app-7fshtpomqha9/src"
+
+# 翻译字典源文件与编译产物（产物随源文件变化自动重建）
+DICTIONARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dictionaries")
+DICTIONARY_SOURCE = os.path.join(DICTIONARY_DIR, "zh-en.tsv")
+DICTIONARY_ARTIFACT = os.path.join(DICTIONARY_DIR, "zh-en.bin")
+
+_translations = None
+
+def get_translations():
+    """获取内存映射的翻译字典（只读 Mapping，惰性加载并缓存）"""
+    global _translations
+    if _translations is None:
+        _translations = translate_dict.load_dictionary(DICTIONARY_SOURCE, DICTIONARY_ARTIFACT)
+    return _translations
+
+class TranslationMatcher:
+    """由翻译字典编译出的多模式匹配器，每次运行只构建一次
+
+    前缀树正则一次扫描得到最左最长匹配。只有当某个匹配内部起始的词条
+    越过它的结尾（词条重叠）时，才在这一小段内按旧逻辑的优先级
+    （长度从长到短，同长度按字典顺序）重新挑选，
+    因此输出与旧的逐条 str.replace 完全一致。
+
+    table 为 中文 -> 英文，rank 为 中文 -> 优先级，pattern 为最左最长匹配的正则
+    （或 translate_dict.BucketPattern）。
+    """
+
+    def __init__(self, table, rank, pattern):
+        self.table = table
+        self.rank = rank
+        self.pattern = pattern
+
+    def _resolve(self, content, start, end):
+        """在重叠区段 [start, end) 内按旧的优先级挑选互不重叠的匹配"""
+        candidates = []
+        for pos in range(start, end):
+            m = self.pattern.match(content, pos)
+            if not m:
+                continue
+            for e in range(pos + 1, m.end() + 1):
+                if content[pos:e] in self.table:
+                    candidates.append((self.rank[content[pos:e]], pos, e))
+        candidates.sort()
+        taken = bytearray(end - start)
+        chosen = []
+        for _, s, e in candidates:
+            if any(taken[s - start:e - start]):
+                continue
+            taken[s - start:e - start] = b'\x01' * (e - s)
+            chosen.append((s, e, content[s:e]))
+        chosen.sort()
+        return chosen
+
+    def find_matches(self, content):
+        """返回最终生效的匹配列表 [(start, end, chinese)]，按位置排序"""
+        if self.pattern is None:
+            return []
+        pattern = self.pattern
+        matches = [(m.start(), m.end()) for m in pattern.finditer(content)]
+        result = []
+        i = 0
+        while i < len(matches):
+            start, end = matches[i]
+            # 探测匹配内部是否有越过结尾的词条，并沿重叠链扩展区段
+            reach = end
+            pos = start + 1
+            while pos < reach:
+                m = pattern.match(content, pos)
+                if m and m.end() > reach:
+                    reach = m.end()
+                pos += 1
+            if reach == end:
+                result.append((start, end, content[start:end]))
+                i += 1
+                continue
+            result.extend(self._resolve(content, start, reach))
+            while i < len(matches) and matches[i][0] < reach:
+                i += 1
+        return result
+
+    def translate(self, content, hits=None):
+        """一次性拼接出翻译结果；传入 Counter 时累计每个词条的命中次数"""
+        matches = self.find_matches(content)
+        if not matches:
+            return content
+        if hits is not None:
+            hits.update(chinese for _, _, chinese in matches)
+        table = self.table
+        parts = []
+        pos = 0
+        for start, end, chinese in matches:
+            parts.append(content[pos:start])
+            parts.append(table[chinese])
+            pos = end
+        parts.append(content[pos:])
+        return ''.join(parts)
+
+def build_matcher(translations):
+    """将翻译字典编译为匹配器（编译产物直接使用其中的优先级和分桶正则）"""
+    if isinstance(translations, translate_dict.CompiledDictionary):
+        return TranslationMatcher(translations, translations.ranks, translations.pattern())
+    table = {k: v for k, v in translations.items() if k}
+    trie = translate_dict.build_trie(table)
+    pattern = re.compile(translate_dict.trie_to_pattern(trie)) if trie else None
+    return TranslationMatcher(table, translate_dict.legacy_ranks(table), pattern)
+
+_default_matcher = None
+
+def get_default_matcher():
+    """获取基于翻译字典的匹配器（惰性构建并缓存）"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = build_matcher(get_translations())
+    return _default_matcher
+
+def translate_content(content, matcher=None, hits=None):
+    """翻译内容中的中文文本（单次扫描，结果与按长度从长到短逐条替换一致）"""
+    return (matcher or get_default_matcher()).translate(content, hits)
+
+def translate_texts(texts, cache=None, matcher=None, source_lang='zh', target_lang='en'):
+    """翻译一批动态文本（文章正文等），返回与 texts 对应的译文列表
+
+    传入 translation_cache.TranslationCache 时先批量查缓存，只翻译未命中的文本，
+    有变化的译文写回缓存；重复文本只翻译一次。
+    """
+    unique = list(dict.fromkeys(texts))
+    cached = cache.get_many(unique, source_lang, target_lang) if cache is not None else {}
+    results = dict(cached)
+    fresh = []
+    for text in unique:
+        if text not in results:
+            results[text] = translate_content(text, matcher)
+            if results[text] != text:
+                fresh.append((text, results[text]))
+    if cache is not None and fresh:
+        cache.put_many(fresh, source_lang, target_lang)
+    return [results[text] for text in texts]
+
+# 翻译范围：literals 只改字符串、模板文本、JSX 文本和注释；all 为旧的整文件替换
+SCOPES = ('literals', 'all')
+
+def _escape_for_region(kind, quote):
+    """返回把译文安全放进该区域所需的转义函数"""
+    if kind == 'string':
+        return lambda text: text.replace('\\', '\\\\').replace(quote, '\\' + quote)
+    if kind == 'template':
+        return lambda text: text.replace('\\', '\\\\').replace('`', '\\`').replace('${', '\\${')
+    if kind == 'jsx_attr':
+        return lambda text: text.replace(quote, '&quot;' if quote == '"' else '&#39;')
+    if kind == 'jsx_text':
+        return lambda text: (text.replace('{', '&#123;').replace('}', '&#125;')
+                             .replace('<', '&lt;').replace('>', '&gt;'))
+    return lambda text: text.replace('*/', '* /')
+
+def translate_source(content, jsx=True, matcher=None, hits=None):
+    """只翻译源码中的字符串字面量、模板文本、JSX 文本/属性和注释
+
+    标识符和 import 路径保持原样；译文按所在区域转义，不会破坏引号或模板语法。
+    """
+    matcher = matcher or get_default_matcher()
+    # 整个文件都没有词条时不必做词法分析
+    if matcher.pattern is None or not matcher.pattern.search(content):
+        return content
+    table = matcher.table
+    parts = []
+    pos = 0
+    for start, end, kind in iter_text_regions(content, jsx=jsx):
+        matches = matcher.find_matches(content[start:end])
+        if not matches:
+            continue
+        if hits is not None:
+            hits.update(chinese for _, _, chinese in matches)
+        escape = _escape_for_region(kind, content[start - 1] if start else '')
+        parts.append(content[pos:start])
+        pos = start
+        for m_start, m_end, chinese in matches:
+            parts.append(content[pos:start + m_start])
+            parts.append(escape(table[chinese]))
+            pos = start + m_end
+    if not parts:
+        return content
+    parts.append(content[pos:])
+    return ''.join(parts)
+
+def translate_text(content, filepath, scope='literals', matcher=None, hits=None):
+    """按翻译范围翻译一个文件的内容"""
+    if scope == 'all':
+        return translate_content(content, matcher, hits)
+    return translate_source(content, jsx=filepath.endswith('.tsx'), matcher=matcher, hits=hits)
+
+def _translate_file(filepath, scope='literals', profile=None):
+    """翻译文件，返回 (是否写入, 最终内容)；出错时最终内容为 None
+
+    profile 为 translate_stats.new_file_profile() 时记录字节数、各阶段耗时和词条命中。
+    """
     try:
+        started = time.perf_counter()
         with open(filepath, 'r', encoding='utf-8') as f:
             original_content = f.read()
+        read_done = time.perf_counter()
         
-        translated_content = translate_content(original_content)
+        hits = profile['hits'] if profile is not None else None
+        translated_content = translate_text(original_content, filepath, scope, hits=hits)
+        match_done = time.perf_counter()
+        if profile is not None:
+            profile['bytes'] = len(original_content.encode('utf-8'))
+            profile['read'] = read_done - started
+            profile['match'] = match_done - read_done
+            profile['replacements'] = sum(hits.values())
         
         # 只有内容发生变化时才写入
         if translated_content != original_content:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(translated_content)
-            return True
-        return False
+            if profile is not None:
+                profile['write'] = time.perf_counter() - match_done
+            return True, translated_content
+        return False, original_content
     except Exception as e:
         print(f"✗ 翻译文件出错 {filepath}: {e}")
-        return False
+        return False, None
+
+def translate_file(filepath, scope='literals'):
+    """翻译文件中的中文文本"""
+    return _translate_file(filepath, scope)[0]
+
+def get_dictionary_hash():
+    """当前翻译字典的哈希（编译时已算好，直接从产物文件头读取）"""
+    return get_translations().dict_hash
+
+def translate_file_tracked(filepath, scope='literals', verify=False, profile=False):
+    """翻译文件并返回 (是否写入, 清单条目, 统计)，供增量模式使用
+
+    verify 为 True 时直接在内存中的译文上找出含中文的行，
+    以 [行号, 列号, 行内容] 列表记入条目的 chinese_lines 字段（与 check_chinese.py 的结果相同），
+    不用再读一遍文件。
+    profile 为 False 时统计为 None。
+    """
+    file_profile = translate_stats.new_file_profile() if profile else None
+    changed, content = _translate_file(filepath, scope, file_profile)
+    if content is None:
+        return changed, None, file_profile
+    state = translate_manifest.file_state(filepath, content, get_dictionary_hash())
+    if verify:
+        state['chinese_lines'] = [list(hit) for hit in find_chinese_lines(content)]
+    return changed, state, file_profile
 
 def main():
     """主函数：翻译所有文件"""
-    src_dir = "/workspace/app-7fshtpomqha9/src"
+    parser = argparse.ArgumentParser(description='批量翻译 src 目录中的中文文本')
+    parser.add_argument('--src', default=DEFAULT_SRC_DIR, help='源码目录')
+    parser.add_argument('--jobs', type=int, default=1, help='并行进程数，0 表示使用全部 CPU 核心')
+    parser.add_argument('--manifest', default=translate_manifest.DEFAULT_MANIFEST,
+                        help='增量清单路径，传空字符串关闭增量模式')
+    parser.add_argument('--force', action='store_true', help='忽略清单，重新处理所有文件')
+    parser.add_argument('--scope', choices=SCOPES, default='literals',
+                        help='literals: 只翻译字符串、JSX 文本和注释；all: 整个文件逐字替换（旧行为）')
+    parser.add_argument('--verify', action='store_true',
+                        help='翻译的同时检查残留中文（代替再运行一次 check_chinese.py），并统计缺失词组')
+    parser.add_argument('--missing-report', help='把残留位置与缺失词组排行写入该 JSON 文件（需配合 --verify）')
+    parser.add_argument('--profile', action='store_true', help='统计词条命中、逐文件耗时与各阶段耗时并打印报表')
+    parser.add_argument('--profile-json', help='把统计结果写入该 JSON 文件')
+    args = parser.parse_args()
+    src_dir = args.src
+    profile = args.profile or bool(args.profile_json)
+    stats = translate_stats.TranslationStats()
     
     translated_files = []
     unchanged_files = []
     
-    # 遍历所有 .tsx 和 .ts 文件
-    for root, dirs, files in os.walk(src_dir):
-        for file in files:
-            if file.endswith(('.tsx', '.ts')) and not file.endswith('.d.ts'):
-                filepath = os.path.join(root, file)
-                relative_path = os.path.relpath(filepath, src_dir)
-                
-                if translate_file(filepath):
-                    translated_files.append(relative_path)
-                    print(f"✓ 已翻译: {relative_path}")
-                else:
-                    unchanged_files.append(relative_path)
+    try:
+        dict_hash = get_dictionary_hash()
+    except translate_dict.DictionaryError as e:
+        print(f"❌ 翻译字典有误:\n{e}")
+        sys.exit(1)
+    with stats.phase('walk'):
+        files = list_source_files(src_dir)
+        manifest = translate_manifest.load_manifest(None if args.force else args.manifest)
+        # 翻译范围变化后清单里的结果不再可信
+        if manifest['scope'] != args.scope:
+            manifest = translate_manifest.load_manifest(None)
+        previous_hash = manifest['dict_hash']
+        
+        # 只处理内容或相关词条有变化的文件；字典没变时不需要遍历字典
+        keys = []
+        if previous_hash is not None and previous_hash != dict_hash:
+            old_digests = translate_manifest.load_digests(translate_manifest.digests_path(args.manifest))
+            keys = translate_manifest.changed_keys(old_digests, get_translations())
+        delta = translate_manifest.DictionaryDelta(keys)
+        to_process, skipped = translate_manifest.plan(manifest, files, dict_hash, delta)
+    if args.verify:
+        # 清单里没有检查结果的文件也要重新处理一遍（旧清单按片段记录在 untranslated 中，同样重新检查）
+        unverified = [item for item in skipped if 'chinese_lines' not in manifest['files'][item[1]]]
+        if unverified:
+            skipped = [item for item in skipped if 'chinese_lines' in manifest['files'][item[1]]]
+            to_process = sorted(to_process + unverified, key=lambda item: item[1])
+    unchanged_files.extend(relative_path for _, relative_path in skipped)
+    
+    # 遍历需要处理的 .tsx 和 .ts 文件，按固定顺序分发到进程池
+    entries = {relative_path: manifest['files'][relative_path] for _, relative_path in skipped}
+    worker = functools.partial(translate_file_tracked, scope=args.scope, verify=args.verify, profile=profile)
+    for relative_path, (changed, state, file_profile) in scan(worker, to_process, jobs=args.jobs):
+        if state is not None:
+            entries[relative_path] = state
+        if file_profile is not None:
+            stats.add_file(relative_path, file_profile)
+        if changed:
+            translated_files.append(relative_path)
+            print(f"✓ 已翻译: {relative_path}")
+        else:
+            unchanged_files.append(relative_path)
+    
+    if args.manifest:
+        manifest['dict_hash'] = dict_hash
+        manifest['scope'] = args.scope
+        manifest['files'] = entries
+        digests = translate_manifest.digests_path(args.manifest)
+        if previous_hash != dict_hash or not os.path.exists(digests):
+            translate_manifest.save_digests(digests, get_translations())
+        translate_manifest.save_manifest(args.manifest, manifest)
+    stats.finish()
     
     print(f"\n{'='*70}")
     print(f"翻译完成！")
     print(f"总文件数: {len(translated_files) + len(unchanged_files)}")
     print(f"已翻译文件: {len(translated_files)}")
     print(f"未变化文件: {len(unchanged_files)}")
+    if skipped:
+        print(f"增量跳过文件: {len(skipped)}")
     print(f"{'='*70}\n")
     
     if translated_files:
@@ -398,6 +362,35 @@ def main():
             print(f"  - {f}")
         if len(translated_files) > 20:
             print(f"  ... 还有 {len(translated_files) - 20} 个文件")
+    
+    if args.verify:
+        # 按 list_source_files 的遍历顺序输出，与单独运行 check_chinese.py 一致
+        untranslated = {relative_path: [tuple(hit) for hit in entries[relative_path]['chinese_lines']]
+                        for _, relative_path in files
+                        if relative_path in entries and entries[relative_path].get('chinese_lines')}
+        ranked = rank_missing_phrases(untranslated)
+        print()
+        print_chinese_report(untranslated)
+        print_missing_phrases(ranked)
+        if args.missing_report:
+            with open(args.missing_report, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'files': untranslated,
+                    'phrases': [{'phrase': phrase, 'count': count, 'files': file_count}
+                                for phrase, count, file_count in ranked],
+                }, f, ensure_ascii=False, indent=1)
+            print(f"\n缺失词组报告已写入: {args.missing_report}")
+    
+    if profile:
+        translations = get_translations()
+        if args.profile:
+            print()
+            print(stats.format_table(translations))
+            if skipped:
+                print(f"\n注意: {len(skipped)} 个文件被增量跳过，未计入命中统计（用 --force 统计全部文件）")
+        if args.profile_json:
+            stats.write_json(args.profile_json, translations)
+            print(f"\n统计结果已写入: {args.profile_json}")
 
 if __name__ == "__main__":
     main()
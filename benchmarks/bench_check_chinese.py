@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对比中文检测：整文件读入 + 两遍正则的旧实现 vs 逐行单遍扫描（可提前结束）
+
+用法: python benchmarks/bench_check_chinese.py [--files 2000] [--lines 400]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import batch_translate
+import check_chinese
+from bench_translate import generate_tsx
+
+def has_chinese_legacy(text):
+    return bool(re.search(r'[一-龥]', text))
+
+def check_file_legacy(filepath):
+    """旧实现：读入整个文件，先整体搜索，再按行逐一搜索"""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if has_chinese_legacy(content):
+            lines = content.split('\n')
+            chinese_lines = []
+            for i, line in enumerate(lines, 1):
+                if has_chinese_legacy(line):
+                    chinese_lines.append((i, line.strip()))
+            return chinese_lines
+        return []
+    except Exception:
+        return []
+
+def build_tree(root, files, lines, seed):
+    """生成翻译后的源码树（check_chinese 实际面对的情况）
+
+    约 80% 的文件完全翻译；15% 用缺少部分词条的字典翻译，留下零星中文；5% 完全未翻译。
+    """
+    rng = random.Random(seed)
+    translations = batch_translate.get_translations()
+    phrases = list(translations)
+    matcher = batch_translate.get_default_matcher()
+    partial = batch_translate.build_matcher(
+        {k: v for k, v in translations.items() if rng.random() < 0.97})
+    paths = []
+    for i in range(files):
+        directory = os.path.join(root, f'module{i % 20}')
+        os.makedirs(directory, exist_ok=True)
+        content = generate_tsx(rng, phrases, lines)
+        kind = rng.random()
+        if kind < 0.8:
+            content = matcher.translate(content)
+        elif kind < 0.95:
+            content = partial.translate(content)
+        path = os.path.join(directory, f'Page{i}.tsx')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+def timed(func, paths):
+    start = time.perf_counter()
+    results = [func(p) for p in paths]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='中文检测基准测试')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_tree(tmp, args.files, args.lines, args.seed)
+        size_mb = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+
+        legacy, legacy_elapsed = timed(check_file_legacy, paths)
+        full, full_elapsed = timed(check_chinese.check_file, paths)
+        first, first_elapsed = timed(lambda p: check_chinese.check_file(p, max_hits=1), paths)
+
+    print(f'文件数: {args.files}, 总大小: {size_mb:.1f} MB')
+    print(f'旧实现（两遍扫描）:   {legacy_elapsed:.3f}s, 含中文文件 {sum(1 for r in legacy if r)}')
+    print(f'新实现（逐行单遍）:   {full_elapsed:.3f}s, 含中文文件 {sum(1 for r in full if r)}')
+    print(f'新实现（首个命中即停）: {first_elapsed:.3f}s, 含中文文件 {sum(1 for r in first if r)}')
+    print(f'加速比: 完整扫描 {legacy_elapsed / full_elapsed:.1f}x, 判断有无 {legacy_elapsed / first_elapsed:.1f}x')
+
+if __name__ == '__main__':
+    main()
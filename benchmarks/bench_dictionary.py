@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译字典启动开销：内存映射的编译产物 vs 每次从字典重建前缀树正则
+
+对不同规模的合成字典分别测量
+  - 编译产物（一次性）
+  - 只加载产物（mmap + 文件头）
+  - 加载产物 + 翻译一个带真实文案的文件（每次运行的启动开销）
+  - 从 Python 字典构建匹配器 + 翻译同一个文件（旧方式）
+并核对两种匹配器的输出一致。
+分桶正则只在遇到对应首字符时编译，所以翻译开销取决于文件里出现了多少种首字符，而不是字典大小。
+
+用法: python benchmarks/bench_dictionary.py [--sizes 1000,10000,100000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import batch_translate
+import translate_dict
+from bench_translate import generate_tsx
+
+def generate_dictionary(rng, size, base):
+    """在真实词条基础上补充随机的 2~6 字词条"""
+    chars = [chr(c) for c in range(0x4e00, 0x4e00 + 3000)]
+    entries = dict(base)
+    while len(entries) < size:
+        chinese = ''.join(rng.choice(chars) for _ in range(rng.randint(2, 6)))
+        entries.setdefault(chinese, f'term{len(entries)}')
+    return entries
+
+def write_source(path, entries):
+    with open(path, 'w', encoding='utf-8') as f:
+        for chinese, english in entries.items():
+            f.write(f'{chinese}\t{english}\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='翻译字典启动开销基准测试')
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base = dict(batch_translate.get_translations())
+    print(f'{"词条数":>8} {"编译":>8} {"产物大小":>8} {"只加载":>8} {"产物启动":>8} {"字典重建":>8}  输出一致')
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            entries = generate_dictionary(rng, size, base)
+            source = os.path.join(tmp, f'dict{size}.tsv')
+            artifact = os.path.join(tmp, f'dict{size}.bin')
+            write_source(source, entries)
+            sample = generate_tsx(rng, list(base), 2000)
+
+            started = time.perf_counter()
+            translate_dict.compile_dictionary(source, artifact)
+            compile_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            translate_dict.CompiledDictionary(artifact).pattern()
+            load_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            compiled = translate_dict.CompiledDictionary(artifact)
+            mapped = batch_translate.translate_content(sample, batch_translate.build_matcher(compiled))
+            mapped_elapsed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            table = dict(translate_dict.parse_source(source))
+            rebuilt = batch_translate.translate_content(sample, batch_translate.build_matcher(table))
+            rebuild_elapsed = time.perf_counter() - started
+
+            print(f'{size:>8} {compile_elapsed:>7.2f}s {os.path.getsize(artifact) / 1024 / 1024:>6.1f}MB '
+                  f'{load_elapsed * 1000:>6.1f}ms {mapped_elapsed * 1000:>6.1f}ms {rebuild_elapsed * 1000:>6.1f}ms  '
+                  f'{"是" if mapped == rebuilt else "否"}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对比INSERT语句解析：逐字符拼接的旧解析器 vs 基于切片的新解析器
+
+用法: python benchmarks/bench_insert_parser.py [--rows 10000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from direct_insert_articles import iter_insert_rows
+from sql_stream import iter_insert_statements
+
+SEED_FILE = os.path.join(ROOT, 'supabase', 'migrations', '56_insert_phone_repair_articles_batch1.sql')
+
+def parse_insert_statement_legacy(sql):
+    """旧实现：逐字符拼接，只支持单个 VALUES 元组和固定的 10 个位置列"""
+    match = re.search(r"VALUES\s*\((.*)\);", sql, re.DOTALL)
+    if not match:
+        return None
+    values_str = match.group(1)
+    values = []
+    current_value = ''
+    in_string = False
+    escape_next = False
+    paren_count = 0
+    for char in values_str:
+        if escape_next:
+            current_value += char
+            escape_next = False
+            continue
+        if char == '\\':
+            escape_next = True
+            current_value += char
+            continue
+        if char == "'" and not escape_next:
+            in_string = not in_string
+            current_value += char
+            continue
+        if char == ',' and not in_string and paren_count == 0:
+            values.append(current_value.strip())
+            current_value = ''
+            continue
+        if char == '(' and not in_string:
+            paren_count += 1
+        elif char == ')' and not in_string:
+            paren_count -= 1
+        current_value += char
+    if current_value.strip():
+        values.append(current_value.strip())
+    cleaned_values = []
+    for v in values:
+        v = v.strip()
+        if v.startswith("'") and v.endswith("'"):
+            v = v[1:-1]
+            v = v.replace("''", "'")
+        cleaned_values.append(v)
+    if len(cleaned_values) < 11:
+        return None
+    return {
+        'title': cleaned_values[0],
+        'slug': cleaned_values[1],
+        'content': cleaned_values[2],
+        'excerpt': cleaned_values[3],
+        'cover_image': cleaned_values[4],
+        'category_id': cleaned_values[5],
+        'author_id': cleaned_values[6],
+        'status': cleaned_values[7],
+        'view_count': int(cleaned_values[8]) if cleaned_values[8].isdigit() else 100,
+        'language': cleaned_values[9]
+    }
+
+def build_statements(rows):
+    """用迁移 56 的语句循环生成 rows 条单行INSERT"""
+    seed = list(iter_insert_statements(SEED_FILE))
+    return [seed[i % len(seed)].replace("-1', '", f"-{i}', '", 1) for i in range(rows)]
+
+def to_multi_row(statements):
+    """把单行INSERT合并成一条多行 VALUES 语句"""
+    header, _, _ = statements[0].partition('VALUES')
+    tuples = [s.partition('VALUES')[2].strip().rstrip(';') for s in statements]
+    return header + 'VALUES ' + ',\n'.join(tuples) + ';'
+
+def main():
+    parser = argparse.ArgumentParser(description='INSERT解析基准测试')
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    statements = build_statements(args.rows)
+    total_mb = sum(len(s) for s in statements) / 1024 / 1024
+
+    start = time.perf_counter()
+    legacy = [parse_insert_statement_legacy(s) for s in statements]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [row for s in statements for row in iter_insert_rows(s)]
+    fast_elapsed = time.perf_counter() - start
+
+    multi = to_multi_row(statements)
+    start = time.perf_counter()
+    multi_rows = list(iter_insert_rows(multi))
+    multi_elapsed = time.perf_counter() - start
+
+    same = all(old is not None and all(new[k] == v for k, v in old.items())
+               for old, new in zip(legacy, fast))
+    print(f'行数: {args.rows}, SQL大小: {total_mb:.1f} MB')
+    print(f'旧解析器（逐字符）:   {legacy_elapsed:.3f}s, {args.rows / legacy_elapsed:.0f} 行/秒')
+    print(f'新解析器（单行语句）: {fast_elapsed:.3f}s, {len(fast) / fast_elapsed:.0f} 行/秒')
+    print(f'新解析器（多行VALUES）: {multi_elapsed:.3f}s, {len(multi_rows) / multi_elapsed:.0f} 行/秒')
+    print(f'加速比: {legacy_elapsed / fast_elapsed:.1f}x')
+    print(f'旧解析器的字段结果一致: {same}')
+
+if __name__ == '__main__':
+    main()
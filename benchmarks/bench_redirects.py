@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重定向编译基准：生成带链与环的规则集，计时折叠与各产物的写出，并对比运行时逐跳查找
+
+用法: python benchmarks/bench_redirects.py [--rules 100000] [--chain 4] [--seed 42]
+"""
+
+import argparse
+import bisect
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from redirects_compile import compile_rules, js_order, lookup_table, write_outputs
+
+def generate_rules(count, max_chain, seed):
+    """生成 count 条规则：大部分是单跳，一部分串成最长 max_chain 跳的链，少量成环"""
+    rng = random.Random(seed)
+    rows = []
+    i = 0
+    while len(rows) < count:
+        kind = rng.random()
+        if kind < 0.7:
+            rows.append({'from_path': f'/old/{i}', 'to_path': f'/articles/a-{i}', 'redirect_type': 301})
+            i += 1
+        elif kind < 0.98:
+            length = rng.randint(2, max_chain)
+            for hop in range(length):
+                target = f'/chain/{i}/{hop + 1}' if hop + 1 < length else f'/products/p-{i}'
+                status = rng.choice((301, 301, 302, 308))
+                rows.append({'from_path': f'/chain/{i}/{hop}', 'to_path': target, 'redirect_type': status})
+            i += 1
+        else:
+            rows.append({'from_path': f'/loop/{i}/a', 'to_path': f'/loop/{i}/b', 'redirect_type': 301})
+            rows.append({'from_path': f'/loop/{i}/b', 'to_path': f'/loop/{i}/a', 'redirect_type': 301})
+            i += 1
+    rows = rows[:count]
+    rng.shuffle(rows)
+    return rows
+
+def runtime_hops(rows, probes):
+    """旧方式：每个请求逐跳匹配（每一跳是一次往返）"""
+    table = {row['from_path']: row['to_path'] for row in rows}
+    hops = 0
+    for path in probes:
+        seen = set()
+        while path in table and path not in seen:
+            seen.add(path)
+            path = table[path]
+            hops += 1
+    return hops
+
+def main():
+    parser = argparse.ArgumentParser(description='重定向编译基准测试')
+    parser.add_argument('--rules', type=int, default=100000, help='规则数')
+    parser.add_argument('--chain', type=int, default=4, help='链的最大跳数')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rows = generate_rules(args.rules, args.chain, args.seed)
+    probes = [row['from_path'] for row in rows]
+
+    started = time.perf_counter()
+    result = compile_rules(rows)
+    compile_elapsed = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        write_outputs(result, tmp)
+        write_elapsed = time.perf_counter() - started
+        sizes = {name: os.path.getsize(os.path.join(tmp, name)) for name in sorted(os.listdir(tmp))}
+
+    table = lookup_table(result.rules)
+    keys = [js_order(rule[0]) for rule in table['rules']]
+    started = time.perf_counter()
+    found = 0
+    for path in probes:
+        key = js_order(path)
+        i = bisect.bisect_left(keys, key)
+        found += i < len(keys) and keys[i] == key
+    lookup_elapsed = time.perf_counter() - started
+
+    hops = runtime_hops(rows, probes)
+    print(f'规则数: {len(rows)}，折叠后 {len(result.rules)} 条，环 {len(result.cycles)} 个，'
+          f'指向环 {len(result.dead)} 条，最长链 {result.max_hops} 跳')
+    print(f'折叠: {compile_elapsed:.3f}s（{len(rows) / compile_elapsed:.0f} 条/秒）')
+    print(f'写出全部产物: {write_elapsed:.3f}s')
+    for name, size in sizes.items():
+        print(f'  {name:<26} {size / 1024:>9.1f} KB')
+    print(f'JSON 二分查找: {len(probes)} 次 {lookup_elapsed:.3f}s，命中 {found}')
+    print(f'逐跳匹配需要 {hops} 跳（平均 {hops / len(probes):.2f}），折叠后每个命中都是 1 跳')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对比SQL语句切分：整文件读入 + 正则提取 vs 流式切分器
+
+用法: python benchmarks/bench_sql_split.py [--copies 200]
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+from sql_stream import iter_insert_statements
+
+SEED_FILE = os.path.join(ROOT, 'supabase', 'migrations', '56_insert_phone_repair_articles_batch1.sql')
+
+def split_with_regex(filename):
+    """旧实现（insert_articles.read_sql_file）"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    pattern = r"INSERT INTO articles.*?;(?=\s*(?:INSERT INTO|$))"
+    return re.findall(pattern, content, re.DOTALL)
+
+def split_streaming(filename):
+    return list(iter_insert_statements(filename))
+
+def count_streaming(filename):
+    """只计数、不保留语句，体现流式切分的内存占用"""
+    return sum(1 for _ in iter_insert_statements(filename))
+
+def build_file(path, copies):
+    """把迁移 56 重复 copies 次，生成大文件"""
+    with open(SEED_FILE, 'r', encoding='utf-8') as f:
+        seed = f.read()
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(copies):
+            f.write(seed.replace("-1', '", f"-{i}', '"))
+            f.write('\n')
+
+def measure(func, filename):
+    """计时与内存分两次测量（tracemalloc 会显著拖慢计时）"""
+    start = time.perf_counter()
+    result = func(filename)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(filename)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='SQL语句切分基准测试')
+    parser.add_argument('--copies', type=int, default=200, help='迁移 56 的重复次数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'articles.sql')
+        build_file(path, args.copies)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        legacy, legacy_elapsed, legacy_peak = measure(split_with_regex, path)
+        stream, stream_elapsed, stream_peak = measure(split_streaming, path)
+        count, count_elapsed, count_peak = measure(count_streaming, path)
+
+    print(f'文件大小: {size_mb:.1f} MB, 语句数: {len(stream)}')
+    print(f'正则提取: {legacy_elapsed:.3f}s, {len(legacy) / legacy_elapsed:.0f} 条/秒, 峰值内存 {legacy_peak / 1024 / 1024:.1f} MB')
+    print(f'流式切分: {stream_elapsed:.3f}s, {len(stream) / stream_elapsed:.0f} 条/秒, 峰值内存 {stream_peak / 1024 / 1024:.1f} MB')
+    print(f'流式计数: {count_elapsed:.3f}s, {count / count_elapsed:.0f} 条/秒, 峰值内存 {count_peak / 1024 / 1024:.1f} MB')
+    print(f'结果一致: {legacy == stream}')
+
+if __name__ == '__main__':
+    main()
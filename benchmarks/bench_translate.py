@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对比 translate_content 新旧实现：逐条 str.replace vs 单次扫描匹配器
+
+用法: python benchmarks/bench_translate.py [--files 200] [--lines 2000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import batch_translate
+
+def translate_content_legacy(content, translations):
+    """旧实现：每次调用重新排序，并对每个词条做一次整文件替换"""
+    sorted_translations = sorted(translations.items(), key=lambda x: len(x[0]), reverse=True)
+    for chinese, english in sorted_translations:
+        content = content.replace(chinese, english)
+    return content
+
+def generate_tsx(rng, phrases, lines):
+    """生成一个带中文文案的合成 .tsx 文件"""
+    out = ["import { useState } from 'react';", '', 'export default function Page() {']
+    for i in range(lines):
+        kind = rng.random()
+        if kind < 0.3:
+            out.append(f'  const label{i} = "{rng.choice(phrases)}";')
+        elif kind < 0.5:
+            out.append(f'  // {rng.choice(phrases)}{rng.choice(phrases)}')
+        elif kind < 0.6:
+            out.append(f'  <Button onClick={{() => setOpen({i})}}>{rng.choice(phrases)}</Button>')
+        else:
+            out.append(f'  const value{i} = items.filter((x) => x.id !== {i}).map((x) => x.name);')
+    out.append('}')
+    return '\n'.join(out) + '\n'
+
+def main():
+    parser = argparse.ArgumentParser(description='translate_content 基准测试')
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    translations = dict(batch_translate.get_translations())
+    phrases = list(translations)
+    corpus = [generate_tsx(rng, phrases, args.lines) for _ in range(args.files)]
+    total_bytes = sum(len(c.encode('utf-8')) for c in corpus)
+
+    start = time.perf_counter()
+    legacy = [translate_content_legacy(c, translations) for c in corpus]
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = batch_translate.build_matcher(translations)
+    build_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [batch_translate.translate_content(c, matcher) for c in corpus]
+    fast_elapsed = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(legacy, fast) if a != b)
+
+    print(f'文件数: {args.files}, 总大小: {total_bytes / 1024 / 1024:.1f} MB, 词条数: {len(translations)}')
+    print(f'旧实现 (逐条 replace): {legacy_elapsed:.3f}s')
+    print(f'新实现 (单次扫描):     {fast_elapsed:.3f}s  (构建匹配器 {build_elapsed * 1000:.1f}ms)')
+    print(f'加速比: {legacy_elapsed / fast_elapsed:.1f}x')
+    print(f'输出不一致的文件: {mismatches}')
+
+if __name__ == '__main__':
+    main()
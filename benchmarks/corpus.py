@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试用的合成语料生成器（固定随机种子，结果可复现）
+
+  - .tsx 源码树：文案取自翻译字典，中文密度与真实 src/ 接近；
+    可生成未翻译的原始树，或 check_chinese 实际面对的"大部分已翻译"的树
+  - INSERT INTO articles 的 SQL 文件：结构与迁移 56 相同（11 列、HTML 正文、'' 转义、NOW()），
+    正文长度、中英文比例、单行/多行 VALUES 都可调
+
+用法: python benchmarks/corpus.py --out /tmp/corpus [--files 200] [--articles 2000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import batch_translate
+from bench_check_chinese import build_tree
+from bench_translate import generate_tsx
+
+ARTICLE_COLUMNS = ('title, slug, content, excerpt, cover_image, category_id, author_id, '
+                   'status, view_count, language, published_at')
+
+_WORDS = ('repair screen battery replacement device technician tool careful connector '
+          'adhesive display charging port water damage diagnostic customer warranty '
+          'component solder board camera speaker frame housing calibration test').split()
+_TOPICS = ('iPhone Screen', 'Samsung Battery', 'Charging Port', 'Water Damage', 'Camera Module',
+           'Back Glass', 'Face ID', 'Logic Board', 'Speaker', 'Touch Panel')
+_SECTIONS = ('Introduction', 'Understanding the Fundamentals', 'Essential Tools and Equipment',
+             'Step-by-Step Process', 'Common Mistakes', 'Conclusion')
+
+def generate_tsx_tree(root, files, lines, seed, translated=False):
+    """生成 .tsx 源码树，返回文件路径列表
+
+    translated 为 False 时所有文案都是中文（batch_translate 的输入）；
+    为 True 时与 bench_check_chinese 相同：约 80% 完全翻译，15% 残留零星中文，5% 未翻译。
+    """
+    if translated:
+        return build_tree(root, files, lines, seed)
+    rng = random.Random(seed)
+    phrases = list(batch_translate.get_translations())
+    paths = []
+    for i in range(files):
+        directory = os.path.join(root, f'module{i % 20}')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'Page{i}.tsx')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(generate_tsx(rng, phrases, lines))
+        paths.append(path)
+    return paths
+
+def _sentence(rng, chinese, phrases):
+    if chinese:
+        return '，'.join(rng.choice(phrases) for _ in range(rng.randint(3, 8))) + '。'
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 20))]
+    # 撇号在 SQL 中要写成 ''，与迁移 56 中的 it''s 一样
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words)), "it's")
+    return ' '.join(words).capitalize() + '.'
+
+def generate_article(rng, index, paragraphs, chinese_ratio, phrases):
+    """生成一篇文章的列值（字符串值未转义）"""
+    chinese = rng.random() < chinese_ratio
+    topic = rng.choice(_TOPICS)
+    title = f'{rng.choice(phrases)}{rng.choice(phrases)}' if chinese else f'Complete Guide to {topic} Repair'
+    body = []
+    for p in range(paragraphs):
+        if p % 3 == 0:
+            body.append(f'<h2>{_SECTIONS[(p // 3) % len(_SECTIONS)]}</h2>')
+        if rng.random() < 0.1:
+            body.append(f'<img src="https://example.com/images/{uuid.UUID(int=rng.getrandbits(128))}.jpg" '
+                        f'alt="{title}" />')
+        body.append('<p>' + ' '.join(_sentence(rng, chinese, phrases) for _ in range(rng.randint(2, 5))) + '</p>')
+    content = '\n' + '\n\n'.join(body) + '\n'
+    return {
+        'title': title,
+        'slug': f'{topic.lower().replace(" ", "-")}-repair-guide-{index}',
+        'content': content,
+        'excerpt': content[:120].replace('\n', ' ').strip() + '...',
+        'cover_image': f'https://example.com/images/{uuid.UUID(int=rng.getrandbits(128))}.jpg',
+        'category_id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'author_id': str(uuid.UUID(int=rng.getrandbits(128))),
+        'status': 'published',
+        'view_count': rng.randint(0, 5000),
+        'language': 'zh' if chinese else 'en',
+    }
+
+def _quote(value):
+    return "'" + value.replace("'", "''") + "'"
+
+def _values(article):
+    return '(' + ', '.join([
+        _quote(article['title']), _quote(article['slug']), _quote(article['content']),
+        _quote(article['excerpt']), _quote(article['cover_image']), _quote(article['category_id']),
+        _quote(article['author_id']), _quote(article['status']), str(article['view_count']),
+        _quote(article['language']), 'NOW()',
+    ]) + ')'
+
+def generate_sql_file(path, articles, seed, paragraphs=12, chinese_ratio=0.2, rows_per_statement=1):
+    """生成 INSERT INTO articles 的 SQL 文件，返回文件字节数
+
+    rows_per_statement 为 1 时与迁移 56 相同，每篇文章一条语句；大于 1 时生成多行 VALUES。
+    """
+    rng = random.Random(seed)
+    phrases = list(batch_translate.get_translations())
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('-- 合成的文章数据（benchmarks/corpus.py 生成）\n')
+        for start in range(0, articles, rows_per_statement):
+            count = min(rows_per_statement, articles - start)
+            rows = [_values(generate_article(rng, start + i, paragraphs, chinese_ratio, phrases))
+                    for i in range(count)]
+            f.write(f'INSERT INTO articles ({ARTICLE_COLUMNS})\nVALUES ' + ',\n'.join(rows) + ';\n\n')
+    return os.path.getsize(path)
+
+def main():
+    parser = argparse.ArgumentParser(description='生成基准测试语料')
+    parser.add_argument('--out', required=True, help='输出目录')
+    parser.add_argument('--files', type=int, default=200, help='.tsx 文件数')
+    parser.add_argument('--lines', type=int, default=400, help='每个 .tsx 文件的行数')
+    parser.add_argument('--articles', type=int, default=2000, help='SQL 文件中的文章数')
+    parser.add_argument('--rows-per-statement', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    raw = generate_tsx_tree(os.path.join(args.out, 'tsx-raw'), args.files, args.lines, args.seed)
+    translated = generate_tsx_tree(os.path.join(args.out, 'tsx-translated'), args.files, args.lines,
+                                   args.seed, translated=True)
+    sql_path = os.path.join(args.out, 'articles.sql')
+    size = generate_sql_file(sql_path, args.articles, args.seed, rows_per_statement=args.rows_per_statement)
+    print(f'✅ 未翻译源码树: {len(raw)} 个文件')
+    print(f'✅ 已翻译源码树: {len(translated)} 个文件')
+    print(f'✅ SQL 文件: {sql_path} ({size / 1024 / 1024:.1f} MB, {args.articles} 篇文章)')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+import { Button } from "@/components/编辑/ui";
+import "./样式.css";
+const Lazy = lazy(() => import('./页面'));
+
+// 编辑分类管理
+export default function 首页() {
+  const [value, setValue] = useState<string>('搜索');
+  const pattern = /文章|产品/g;
+  const ratio = total / 首页 / 2;
+  const quoted = "说\"删除\"";
+  const message = `共 ${count} 篇文章 ${ok ? `已发布` : '草稿'}`;
+  /* 首页 与 编辑 */
+  return (
+    <div className="文章" title='编辑'>
+      首页 {/* 产品 */}
+      {open && <span data-label="删除">问答</span>}
+      <>搜索结果</>
+    </div>
+  );
+}
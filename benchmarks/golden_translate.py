@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+translate_source 的黄金文件检查
+
+两部分：
+  1. golden/cases/*.tsx 与同名 .expected 文件逐字比对（覆盖 import 路径、正则、
+     模板字符串、JSX 文本/属性、注释、重复词条等边界情况）
+  2. 对真实 src/ 目录逐个文件翻译，把 (源文件哈希, 译文哈希) 与 golden/src.json 比对；
+     源文件本身变了只提示过期，源文件没变而译文变了才算回归
+
+用法:
+  python benchmarks/golden_translate.py            # 检查，有差异时退出码为 1
+  python benchmarks/golden_translate.py --update   # 确认差异无误后重新生成黄金文件
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+import batch_translate
+import translate_manifest
+from scan_engine import list_source_files
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+CASES_DIR = os.path.join(GOLDEN_DIR, 'cases')
+SRC_GOLDEN = os.path.join(GOLDEN_DIR, 'src.json')
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def write_text(path, content):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def check_cases(update):
+    """逐字比对用例，返回失败数"""
+    failures = 0
+    for path in sorted(glob.glob(os.path.join(CASES_DIR, '*.ts*'))):
+        if path.endswith('.expected'):
+            continue
+        actual = batch_translate.translate_text(read_text(path), path)
+        expected_path = path + '.expected'
+        if update:
+            write_text(expected_path, actual)
+            continue
+        expected = read_text(expected_path) if os.path.exists(expected_path) else ''
+        if actual != expected:
+            failures += 1
+            print(f'✗ 用例不一致: {os.path.basename(path)}')
+            diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(),
+                                        'expected', 'actual', lineterm='')
+            for line in list(diff)[:40]:
+                print(f'    {line}')
+    return failures
+
+def check_src(src_dir, update):
+    """比对真实源码树的译文哈希，返回 (回归数, 过期数)"""
+    current = {}
+    for filepath, relative_path in list_source_files(src_dir):
+        content = read_text(filepath)
+        translated = batch_translate.translate_text(content, filepath)
+        current[relative_path] = [translate_manifest.content_hash(content),
+                                  translate_manifest.content_hash(translated)]
+    if update:
+        with open(SRC_GOLDEN, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1, sort_keys=True)
+            f.write('\n')
+        return 0, 0
+
+    golden = {}
+    if os.path.exists(SRC_GOLDEN):
+        with open(SRC_GOLDEN, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+    regressions = 0
+    stale = 0
+    for relative_path in sorted(set(golden) | set(current)):
+        old = golden.get(relative_path)
+        new = current.get(relative_path)
+        if old == new:
+            continue
+        if old is None or new is None or old[0] != new[0]:
+            stale += 1
+            print(f'  源文件有变动（黄金文件过期）: {relative_path}')
+        else:
+            regressions += 1
+            print(f'✗ 译文变化: {relative_path}')
+    return regressions, stale
+
+def main():
+    parser = argparse.ArgumentParser(description='translate_source 黄金文件检查')
+    parser.add_argument('--src', default=os.path.join(ROOT, 'src'), help='源码目录')
+    parser.add_argument('--update', action='store_true', help='重新生成黄金文件')
+    args = parser.parse_args()
+
+    case_failures = check_cases(args.update)
+    regressions, stale = check_src(args.src, args.update)
+
+    if args.update:
+        print(f'✅ 已更新黄金文件: {GOLDEN_DIR}')
+        return
+    print(f'用例失败: {case_failures} | 译文回归: {regressions} | 过期条目: {stale}')
+    if case_failures or regressions:
+        sys.exit(1)
+    if stale:
+        print('源文件有变动，确认译文无误后用 --update 重新生成')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python 工具链的基准测试套件
+
+在固定种子生成的合成语料上计时以下场景（每个场景重复多次，取中位数）：
+  translate       translate_content 整文件替换（未翻译的 .tsx 树）
+  translate_scope translate_source 只翻译字面量/JSX 文本/注释
+  detect          check_chinese.check_file（大部分已翻译的 .tsx 树）
+  split           sql_stream 流式切分 INSERT 语句
+  parse           direct_insert_articles.iter_insert_rows 解析 VALUES
+  load            batch_insert_articles.bulk_insert 批量写入本地 PostgREST 替身服务
+  load_async      async_insert_articles.load 并发写入替身服务
+缺少依赖（python-dotenv / requests / aiohttp）的场景会被跳过并记录原因。
+
+结果写成 JSON，可与基线比较：
+  python benchmarks/run_benchmarks.py --save benchmarks/baseline.json
+  python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json [--threshold 0.2]
+比较时用每个场景最快的一次（受后台负载干扰最小），比基线慢超过 threshold 的场景记为回归，退出码为 1。
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import batch_translate
+import check_chinese
+import postgrest_stub
+from corpus import generate_sql_file, generate_tsx_tree
+from sql_stream import iter_insert_statements
+
+RESULTS_VERSION = 1
+SCENARIOS = ('translate', 'translate_scope', 'detect', 'split', 'parse', 'load', 'load_async')
+
+class Skip(Exception):
+    """场景无法在当前环境运行"""
+
+def read_all(paths):
+    contents = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            contents.append((path, f.read()))
+    return contents
+
+@contextlib.contextmanager
+def stub_server():
+    """在后台线程启动替身服务，产出 (base_url, store)"""
+    server = postgrest_stub.serve(port=0, store=postgrest_stub.StubStore())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}', server.store
+    finally:
+        server.shutdown()
+        server.server_close()
+
+class Corpus:
+    """按需生成并缓存各场景需要的输入"""
+
+    def __init__(self, workdir, args):
+        self.workdir = workdir
+        self.args = args
+        self._cache = {}
+
+    def _get(self, name, build):
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    def raw_tsx(self):
+        return self._get('raw_tsx', lambda: read_all(generate_tsx_tree(
+            os.path.join(self.workdir, 'tsx-raw'), self.args.files, self.args.lines, self.args.seed)))
+
+    def translated_tsx(self):
+        return self._get('translated_tsx', lambda: generate_tsx_tree(
+            os.path.join(self.workdir, 'tsx-translated'), self.args.files, self.args.lines,
+            self.args.seed, translated=True))
+
+    def sql_file(self):
+        def build():
+            path = os.path.join(self.workdir, 'articles.sql')
+            generate_sql_file(path, self.args.articles, self.args.seed)
+            return path
+        return self._get('sql_file', build)
+
+    def statements(self):
+        return self._get('statements', lambda: list(iter_insert_statements(self.sql_file())))
+
+def scenario_translate(corpus):
+    contents = corpus.raw_tsx()
+    matcher = batch_translate.get_default_matcher()
+    def run():
+        for _, content in contents:
+            batch_translate.translate_content(content, matcher)
+    return run, len(contents), sum(len(c.encode('utf-8')) for _, c in contents), 'files'
+
+def scenario_translate_scope(corpus):
+    contents = corpus.raw_tsx()
+    matcher = batch_translate.get_default_matcher()
+    def run():
+        for path, content in contents:
+            batch_translate.translate_text(content, path, 'literals', matcher)
+    return run, len(contents), sum(len(c.encode('utf-8')) for _, c in contents), 'files'
+
+def scenario_detect(corpus):
+    paths = corpus.translated_tsx()
+    def run():
+        for path in paths:
+            check_chinese.check_file(path)
+    return run, len(paths), sum(os.path.getsize(p) for p in paths), 'files'
+
+def scenario_split(corpus):
+    path = corpus.sql_file()
+    def run():
+        for _ in iter_insert_statements(path):
+            pass
+    return run, len(corpus.statements()), os.path.getsize(path), 'statements'
+
+def scenario_parse(corpus):
+    try:
+        from direct_insert_articles import iter_insert_rows
+    except ImportError as e:
+        raise Skip(str(e))
+    statements = corpus.statements()
+    def run():
+        for statement in statements:
+            for _ in iter_insert_rows(statement):
+                pass
+    return run, len(statements), sum(len(s.encode('utf-8')) for s in statements), 'statements'
+
+def scenario_load(corpus):
+    try:
+        import batch_insert_articles
+    except ImportError as e:
+        raise Skip(str(e))
+    statements = corpus.statements()
+    args = corpus.args
+    def run():
+        with stub_server() as (base_url, store), contextlib.redirect_stdout(io.StringIO()):
+            success, failures = batch_insert_articles.bulk_insert(statements, args.batch_size, 0, base_url)
+        if failures:
+            raise RuntimeError(f'{len(failures)} 行写入失败: {failures[0]}')
+    return run, len(statements), sum(len(s.encode('utf-8')) for s in statements), 'rows'
+
+def scenario_load_async(corpus):
+    try:
+        import async_insert_articles
+        from batch_insert_articles import statements_to_rows
+    except ImportError as e:
+        raise Skip(str(e))
+    rows, _ = statements_to_rows(corpus.statements())
+    args = corpus.args
+    def run():
+        with stub_server() as (base_url, store), contextlib.redirect_stdout(io.StringIO()):
+            stats, failures = asyncio.run(async_insert_articles.load(
+                rows, base_url, args.batch_size, args.concurrency, rate=1000.0, retries=0))
+        if failures:
+            raise RuntimeError(f'{len(failures)} 行写入失败: {failures[0]}')
+    return run, len(rows), 0, 'rows'
+
+def measure(setup, corpus, repeat):
+    """准备输入（不计时），然后重复运行 repeat 次"""
+    run, items, size, unit = setup(corpus)
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - started)
+    median = statistics.median(runs)
+    return {
+        'median': round(median, 6),
+        'min': round(min(runs), 6),
+        'runs': [round(r, 6) for r in runs],
+        'items': items,
+        'unit': unit,
+        'bytes': size,
+        'items_per_second': round(items / median, 1) if median > 0 else None,
+        'mb_per_second': round(size / median / 1024 / 1024, 2) if median > 0 and size else None,
+    }
+
+def corpus_params(results):
+    """决定语料规模的参数（重复次数不影响可比性）"""
+    return {k: v for k, v in results['meta'].get('params', {}).items() if k != 'repeat'}
+
+def compare(current, baseline, threshold):
+    """逐场景比较最快一次的耗时，返回回归的场景列表"""
+    regressions = []
+    print(f'\n与基线比较（{baseline["meta"].get("created", "?")}，阈值 +{threshold:.0%}）:')
+    if corpus_params(baseline) != corpus_params(current):
+        print(f'  ⚠️ 语料参数与基线不同，结果不可直接比较: {baseline["meta"].get("params")}')
+    for name, result in current['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if not base or 'min' not in base or 'min' not in result:
+            print(f'  {name:<16} 无可比数据')
+            continue
+        ratio = result['min'] / base['min'] if base['min'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ⚠️ 回归'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = '  ✅ 变快'
+        print(f'  {name:<16} {base["min"]:>9.4f}s -> {result["min"]:>9.4f}s  ({ratio:.2f}x){flag}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Python 工具链基准测试套件')
+    parser.add_argument('--only', help='只运行这些场景，逗号分隔（可选: ' + ','.join(SCENARIOS) + '）')
+    parser.add_argument('--files', type=int, default=100, help='.tsx 文件数')
+    parser.add_argument('--lines', type=int, default=400, help='每个 .tsx 文件的行数')
+    parser.add_argument('--articles', type=int, default=1000, help='SQL 文件中的文章数')
+    parser.add_argument('--batch-size', type=int, default=100, help='load 场景每个请求的行数')
+    parser.add_argument('--concurrency', type=int, default=4, help='load_async 场景的并发数')
+    parser.add_argument('--repeat', type=int, default=5, help='每个场景的重复次数')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='把结果写入该 JSON 文件')
+    parser.add_argument('--compare', help='与该 JSON 基线比较')
+    parser.add_argument('--threshold', type=float, default=0.2, help='判定回归的变慢比例')
+    args = parser.parse_args()
+
+    selected = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        print(f'❌ 未知场景: {", ".join(unknown)}')
+        sys.exit(2)
+
+    results = {
+        'meta': {
+            'version': RESULTS_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': {k: getattr(args, k) for k in ('files', 'lines', 'articles', 'batch_size',
+                                                   'concurrency', 'repeat', 'seed')},
+        },
+        'scenarios': {},
+    }
+    print(f'{"场景":<16} {"中位数":>10} {"最快":>10} {"吞吐":>18}')
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = Corpus(workdir, args)
+        for name in selected:
+            setup = globals()[f'scenario_{name}']
+            try:
+                result = measure(setup, corpus, args.repeat)
+            except Skip as e:
+                results['scenarios'][name] = {'skipped': str(e)}
+                print(f'{name:<16} 跳过: {e}')
+                continue
+            results['scenarios'][name] = result
+            throughput = f'{result["items_per_second"]:.0f} {result["unit"]}/s'
+            print(f'{name:<16} {result["median"]:>9.4f}s {result["min"]:>9.4f}s {throughput:>18}')
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+            f.write('\n')
+        print(f'\n结果已写入: {args.save}')
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -4,57 +4,175 @@
 检查文件中是否还有中文字符
 """
 
-import os
+import argparse
+import io
 import re
+from collections import Counter
+from functools import partial
+
+from scan_engine import list_source_files, scan
+
+DEFAULT_SRC_DIR = "/workspace/app-7fshtpomqha9/src"
+
+# 中日韩统一表意文字（含扩展A及扩展B以后各区）、兼容表意文字与 CJK 标点。
+# 不含全角空格 U+3000、全角字母数字和半角片假名：这些单独出现不算残留中文
+CJK_PATTERN = re.compile(
+    '['
+    '\u3001-\u303f'          # CJK 符号和标点（不含全角空格）
+    '\u3400-\u4dbf'          # 扩展A
+    '\u4e00-\u9fff'          # 基本区
+    '\uf900-\ufaff'          # 兼容表意文字
+    '\ufe30-\ufe4f'          # 兼容形式（竖排标点）
+    '\uff01-\uff0f'          # 全角标点 ！＂＃…／
+    '\uff1a-\uff20'          # 全角标点 ：；＜＝＞？＠
+    '\uff3b-\uff40'          # 全角标点 ［＼］＾＿｀
+    '\uff5b-\uff60'          # 全角标点 ｛｜｝～｟｠
+    '\U00020000-\U0003134f'  # 扩展B-G
+    '\U0002f800-\U0002fa1f'  # 兼容表意文字补充
+    ']'
+)
+
+# 预筛：U+3001 以上的任意字符。单一区间的字符类比上面的多区间（含增补平面）快得多，
+# 命中后再用 CJK_PATTERN 确认
+_CANDIDATE = re.compile('[\u3001-\U0010ffff]')
+
+# 连续的中文片段，以及其中可以作为字典词条的表意文字部分（不含标点和全角符号）
+_CJK_RUN = re.compile(CJK_PATTERN.pattern + '+')
+_IDEOGRAPH_RUN = re.compile(
+    '[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\U00020000-\U0003134f\U0002f800-\U0002fa1f]+')
 
 def has_chinese(text):
     """检查文本中是否包含中文字符"""
-    return bool(re.search(r'[\u4e00-\u9fa5]', text))
+    pos = 0
+    while True:
+        m = _CANDIDATE.search(text, pos)
+        if m is None:
+            return False
+        if CJK_PATTERN.match(text, m.start()):
+            return True
+        pos = m.end()
+
+def iter_chinese_lines(f, chunk_size=1 << 16):
+    """流式产出含中文的行 (行号, 列号, 行内容)
+
+    按块读取，只在整行边界处切块；在块内用预编译的模式直接跳到下一个命中，
+    没有中文的部分不会逐行处理。每行只报告一次，列号从 1 开始。
+    """
+    line_no = 1
+    carry = ''
+    while True:
+        chunk = f.read(chunk_size)
+        block = carry + chunk if carry else chunk
+        # 只处理到最后一个完整行，剩余部分留给下一块（不复制整块）
+        end = block.rfind('\n') + 1 if chunk else len(block)
+        carry = block[end:]
+        pos = 0
+        while pos < end:
+            m = _CANDIDATE.search(block, pos, end)
+            if m is None:
+                line_no += block.count('\n', pos, end)
+                break
+            start = m.start()
+            line_no += block.count('\n', pos, start)
+            if not CJK_PATTERN.match(block, start):
+                # 其他非 ASCII 字符（如 emoji），继续在同一行向后找
+                pos = start + 1
+                continue
+            line_start = block.rfind('\n', 0, start) + 1
+            line_end = block.find('\n', start, end)
+            if line_end < 0:
+                line_end = end
+            yield line_no, start - line_start + 1, block[line_start:line_end].strip()
+            pos = line_end + 1
+            if line_end < end:
+                line_no += 1
+        if not chunk:
+            return
+
+def find_chinese_lines(text):
+    """在内存中的内容上查找含中文的行，返回 [(行号, 列号, 行内容)]
+
+    与 check_file 的结果完全一致（同一个扫描器），用于直接检查翻译后的结果，不必再读一遍文件。
+    """
+    return list(iter_chinese_lines(io.StringIO(text)))
 
-def check_file(filepath):
-    """检查文件中的中文字符"""
+def rank_missing_phrases(hits_by_file):
+    """按出现次数排列残留的中文词组
+
+    hits_by_file 为 {文件: [(行号, 列号, 行内容)]}，返回 [(词组, 出现次数, 文件数)]，
+    出现次数越多的词组加进字典后能清掉的残留越多。
+    """
+    occurrences = Counter()
+    files = Counter()
+    for hits in hits_by_file.values():
+        seen = set()
+        for _, _, line in hits:
+            for phrase in _IDEOGRAPH_RUN.findall(line):
+                occurrences[phrase] += 1
+                seen.add(phrase)
+        files.update(seen)
+    return sorted(((phrase, n, files[phrase]) for phrase, n in occurrences.items()),
+                  key=lambda item: (-item[1], -item[2], item[0]))
+
+def print_chinese_report(files_with_chinese):
+    """打印仍包含中文的文件（最多 10 个文件，每个文件 5 处）"""
+    if not files_with_chinese:
+        print("✓ 所有文件已完成英文翻译！")
+        return
+    print(f"发现 {len(files_with_chinese)} 个文件仍包含中文:\n")
+    for filepath, lines in list(files_with_chinese.items())[:10]:
+        print(f"\n文件: {filepath}")
+        for line_num, column, line in lines[:5]:
+            print(f"  行 {line_num}, 列 {column}: {line[:100]}")
+        if len(lines) > 5:
+            print(f"  ... 还有 {len(lines) - 5} 行")
+
+def print_missing_phrases(ranked, limit=30):
+    """打印出现最多的未翻译词组"""
+    if not ranked:
+        return
+    print(f"\n出现最多的未翻译词组（共 {len(ranked)} 个）:")
+    for phrase, count, file_count in ranked[:limit]:
+        print(f"  {count:>5} 次 / {file_count:>3} 个文件  {phrase}")
+    if len(ranked) > limit:
+        print(f"  ... 还有 {len(ranked) - limit} 个")
+
+def check_file(filepath, max_hits=0):
+    """检查文件中的中文字符，返回 [(行号, 列号, 行内容)]
+
+    单遍流式扫描；max_hits > 0 时找到这么多行就提前结束（只需判断有无时传 1）。
+    """
+    chinese_lines = []
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        if has_chinese(content):
-            lines = content.split('\n')
-            chinese_lines = []
-            for i, line in enumerate(lines, 1):
-                if has_chinese(line):
-                    chinese_lines.append((i, line.strip()))
-            return chinese_lines
-        return []
+            for hit in iter_chinese_lines(f):
+                chinese_lines.append(hit)
+                if max_hits and len(chinese_lines) >= max_hits:
+                    break
+        return chinese_lines
     except Exception as e:
         return []
 
 def main():
     """主函数：检查所有文件"""
-    src_dir = "/workspace/app-7fshtpomqha9/src"
+    parser = argparse.ArgumentParser(description='检查 src 目录中是否还有中文')
+    parser.add_argument('--src', default=DEFAULT_SRC_DIR, help='源码目录')
+    parser.add_argument('--jobs', type=int, default=1, help='并行进程数，0 表示使用全部 CPU 核心')
+    parser.add_argument('--max-hits', type=int, default=0,
+                        help='每个文件最多记录的行数，0 表示不限；只需判断有无时用 1')
+    args = parser.parse_args()
+    src_dir = args.src
     
     files_with_chinese = {}
     
-    # 遍历所有 .tsx 和 .ts 文件
-    for root, dirs, files in os.walk(src_dir):
-        for file in files:
-            if file.endswith(('.tsx', '.ts')) and not file.endswith('.d.ts'):
-                filepath = os.path.join(root, file)
-                relative_path = os.path.relpath(filepath, src_dir)
-                
-                chinese_lines = check_file(filepath)
-                if chinese_lines:
-                    files_with_chinese[relative_path] = chinese_lines
+    # 遍历所有 .tsx 和 .ts 文件，按固定顺序分发到进程池
+    files = list_source_files(src_dir)
+    worker = partial(check_file, max_hits=args.max_hits)
+    for relative_path, chinese_lines in scan(worker, files, jobs=args.jobs):
+        if chinese_lines:
+            files_with_chinese[relative_path] = chinese_lines
     
-    if files_with_chinese:
-        print(f"发现 {len(files_with_chinese)} 个文件仍包含中文:\n")
-        for filepath, lines in list(files_with_chinese.items())[:10]:
-            print(f"\n文件: {filepath}")
-            for line_num, line in lines[:5]:
-                print(f"  行 {line_num}: {line[:100]}")
-            if len(lines) > 5:
-                print(f"  ... 还有 {len(lines) - 5} 行")
-    else:
-        print("✓ 所有文件已完成英文翻译！")
+    print_chinese_report(files_with_chinese)
 
 if __name__ == "__main__":
     main()
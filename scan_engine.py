@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量翻译 / 中文检查共用的源码扫描引擎
+
+按固定顺序列出 src 目录下的 .ts/.tsx 文件，把逐文件的处理函数分发到进程池，
+并按文件顺序流式返回结果，保证多进程与单进程的输出完全一致。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+SOURCE_EXTENSIONS = ('.tsx', '.ts')
+
+def is_source_file(filename):
+    """是否为需要处理的 .ts/.tsx 源文件（排除 .d.ts）"""
+    return filename.endswith(SOURCE_EXTENSIONS) and not filename.endswith('.d.ts')
+
+def list_source_files(src_dir):
+    """按确定的顺序返回 [(filepath, relative_path)]"""
+    found = []
+    for root, dirs, files in os.walk(src_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if is_source_file(file):
+                filepath = os.path.join(root, file)
+                found.append((filepath, os.path.relpath(filepath, src_dir)))
+    return found
+
+def resolve_jobs(jobs):
+    """--jobs 0 表示使用全部 CPU 核心"""
+    if jobs is None or jobs < 0:
+        return 1
+    if jobs == 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def scan(worker, files, jobs=1):
+    """对每个文件调用 worker(filepath)，按 files 的顺序逐个产出 (relative_path, result)
+
+    worker 必须是模块顶层函数（进程池需要可序列化）。
+    """
+    jobs = resolve_jobs(jobs)
+    paths = [filepath for filepath, _ in files]
+    if jobs == 1 or len(paths) <= 1:
+        for filepath, relative_path in files:
+            yield relative_path, worker(filepath)
+        return
+
+    # 每个进程一次领取一批文件，减少进程间通信次数
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for (_, relative_path), result in zip(files, pool.map(worker, paths, chunksize=chunksize)):
+            yield relative_path, result
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+page_views → analytics_summary 的按天汇总任务
+
+从 PostgREST 按 (created_at, id) 键集分页读取 page_views，或读取 CSV/NDJSON 导出，
+每读入一块就用 NumPy 做向量化的按天聚合：
+  total_views      bincount 计数
+  avg_duration     bincount 加权求和后除以访问量
+  unique_visitors  每天一个 HyperLogLog 草图（2^HLL_PRECISION 个寄存器）
+  bounce_rate      按 session_id 还原会话，只有一次浏览的会话记为跳出，计入会话首日；
+                   开始超过 SESSION_DAYS 天的会话视为已结束，折算进当天的会话数与跳出数；
+                   已结束的会话在 CLOSED_RETENTION_DAYS 天内仍保留键与浏览数，
+                   之后才到达的同一会话的浏览只修正首日的跳出数，不会再算成一个新会话
+
+增量运行：状态文件保存水位线（最后一行的 created_at 与 id）、每天的计数与草图，
+以及尚未结束的会话。再次运行时只读取水位线之后的行，
+并且只 upsert 有变化的日期（按 date 冲突合并）。
+注意：水位线之前的行后来被修改（如 update_page_duration 补写停留时长）不会反映到汇总中，
+需要时用 --full 全量重算。
+
+用法:
+  python scripts/analytics_rollup.py --url $VITE_SUPABASE_URL
+  python scripts/analytics_rollup.py --csv page_views.csv --dry-run
+"""
+import argparse
+import base64
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+STATE_VERSION = 2
+DEFAULT_STATE = '.analytics_rollup_state.json'
+DEFAULT_PAGE_SIZE = 5000
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+# 会话最多跨越的天数；更早开始的会话视为已结束
+SESSION_DAYS = 2
+# 已结束的会话保留键的天数，用于识别迟到的浏览
+CLOSED_RETENTION_DAYS = 30
+COLUMNS = 'id,visitor_id,session_id,duration,created_at'
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+_OFFSET = re.compile(r'[+-]\d{2}(?::?\d{2})?$')
+
+# ---------------------------------------------------------------- 向量化工具
+
+def hash64(values):
+    """把字符串逐个哈希成 uint64 数组"""
+    digest = b''.join(hashlib.blake2b(str(v).encode('utf-8'), digest_size=8).digest() for v in values)
+    return np.frombuffer(digest, dtype='>u8').astype(np.uint64)
+
+def bit_length(values):
+    """uint64 数组每个元素的二进制位数（0 的位数为 0）"""
+    values = values.copy()
+    length = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        values[high] >>= np.uint64(shift)
+    length[values > 0] += 1
+    return length
+
+def hll_update(registers, rows, hashes):
+    """按行更新 HLL 寄存器：registers[rows[i]] 这一组吸收 hashes[i]"""
+    bucket = (hashes >> np.uint64(64 - HLL_PRECISION)).astype(np.intp)
+    rest_bits = 64 - HLL_PRECISION
+    rest = hashes & np.uint64((1 << rest_bits) - 1)
+    rank = (rest_bits - bit_length(rest) + 1).astype(np.uint8)
+    np.maximum.at(registers, (rows, bucket), rank)
+
+def hll_estimate(registers):
+    """HyperLogLog 基数估计（小基数时用线性计数修正）"""
+    m = registers.size
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return int(round(estimate))
+
+def _pack(array):
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii')
+
+def _unpack(text, dtype):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype).copy()
+
+# ---------------------------------------------------------------- 汇总状态
+
+class Rollup:
+    """按天累积的汇总状态，可序列化到状态文件"""
+
+    def __init__(self):
+        self.watermark = None
+        self.days = {}
+        self.session_keys = np.zeros(0, dtype=np.uint64)
+        self.session_views = np.zeros(0, dtype=np.int64)
+        self.session_day = np.zeros(0, dtype=np.int64)
+        # 已折算进按天计数的会话（按键排序）
+        self.closed_keys = np.zeros(0, dtype=np.uint64)
+        self.closed_views = np.zeros(0, dtype=np.int64)
+        self.closed_day = np.zeros(0, dtype=np.int64)
+        self.changed = set()
+
+    @classmethod
+    def load(cls, path):
+        rollup = cls()
+        if not path or not os.path.exists(path):
+            return rollup
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return rollup
+        if state.get('version') != STATE_VERSION or state.get('hll_precision') != HLL_PRECISION:
+            return rollup
+        rollup.watermark = tuple(state['watermark']) if state.get('watermark') else None
+        for day, entry in state['days'].items():
+            rollup.days[int(day)] = {
+                'views': entry['views'],
+                'duration': entry['duration'],
+                'sessions': entry['sessions'],
+                'bounced': entry['bounced'],
+                'hll': _unpack(entry['hll'], np.uint8),
+            }
+        sessions = state['sessions']
+        rollup.session_keys = _unpack(sessions['keys'], np.uint64)
+        rollup.session_views = _unpack(sessions['views'], np.int64)
+        rollup.session_day = _unpack(sessions['day'], np.int64)
+        closed = state['closed_sessions']
+        rollup.closed_keys = _unpack(closed['keys'], np.uint64)
+        rollup.closed_views = _unpack(closed['views'], np.int64)
+        rollup.closed_day = _unpack(closed['day'], np.int64)
+        return rollup
+
+    def save(self, path):
+        state = {
+            'version': STATE_VERSION,
+            'hll_precision': HLL_PRECISION,
+            'watermark': list(self.watermark) if self.watermark else None,
+            'days': {str(day): dict(e, hll=_pack(e['hll'])) for day, e in sorted(self.days.items())},
+            'sessions': {
+                'keys': _pack(self.session_keys),
+                'views': _pack(self.session_views),
+                'day': _pack(self.session_day),
+            },
+            'closed_sessions': {
+                'keys': _pack(self.closed_keys),
+                'views': _pack(self.closed_views),
+                'day': _pack(self.closed_day),
+            },
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def _day(self, day):
+        entry = self.days.get(day)
+        if entry is None:
+            entry = self.days[day] = {'views': 0, 'duration': 0, 'sessions': 0, 'bounced': 0,
+                                      'hll': np.zeros(HLL_REGISTERS, dtype=np.uint8)}
+        return entry
+
+    def add(self, days, visitors, sessions, durations):
+        """吸收一块数据：days 为距 1970-01-01 的天数，visitors/sessions 为 uint64 哈希"""
+        if days.size == 0:
+            return
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        views = np.bincount(inverse)
+        duration = np.bincount(inverse, weights=durations)
+        registers = np.zeros((unique_days.size, HLL_REGISTERS), dtype=np.uint8)
+        hll_update(registers, inverse, visitors)
+        for i, day in enumerate(unique_days.tolist()):
+            entry = self._day(day)
+            entry['views'] += int(views[i])
+            entry['duration'] += int(duration[i])
+            np.maximum(entry['hll'], registers[i], out=entry['hll'])
+            self.changed.add(day)
+        late = self._late_views(sessions)
+        self._merge_sessions(sessions[~late], days[~late])
+        last_day = max(self.days)
+        self._close_sessions(last_day - SESSION_DAYS)
+        self._prune_closed(last_day - CLOSED_RETENTION_DAYS)
+
+    def _late_views(self, sessions):
+        """属于已结束会话的浏览：累加到该会话上，原本跳出的会话不再算跳出；返回这些行的掩码"""
+        if self.closed_keys.size == 0:
+            return np.zeros(sessions.size, dtype=bool)
+        index = np.searchsorted(self.closed_keys, sessions)
+        index[index == self.closed_keys.size] = 0
+        late = self.closed_keys[index] == sessions
+        if not late.any():
+            return late
+        touched = np.unique(index[late])
+        was_bounced = self.closed_views[touched] == 1
+        np.add.at(self.closed_views, index[late], 1)
+        for day in self.closed_day[touched[was_bounced]].tolist():
+            self.days[day]['bounced'] -= 1
+            self.changed.add(day)
+        return late
+
+    def _merge_sessions(self, sessions, days):
+        """把本块的会话合并进已有会话：浏览数相加，首日取最小"""
+        keys = np.concatenate([self.session_keys, sessions])
+        views = np.concatenate([self.session_views, np.ones(sessions.size, dtype=np.int64)])
+        first = np.concatenate([self.session_day, days])
+        order = np.argsort(keys, kind='stable')
+        keys, views, first = keys[order], views[order], first[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        self.session_keys = keys[starts]
+        self.session_views = np.add.reduceat(views, starts)
+        self.session_day = np.minimum.reduceat(first, starts)
+        # 本块涉及的会话的首日，其跳出率可能变化
+        touched = np.isin(self.session_keys, sessions)
+        self.changed.update(np.unique(self.session_day[touched]).tolist())
+
+    def _close_sessions(self, cutoff):
+        """把首日不晚于 cutoff 的会话折算进当天的会话数与跳出数，移入已结束会话"""
+        closed = self.session_day <= cutoff
+        if not closed.any():
+            return
+        days, inverse = np.unique(self.session_day[closed], return_inverse=True)
+        counts = np.bincount(inverse)
+        bounced = np.bincount(inverse, weights=self.session_views[closed] == 1)
+        for i, day in enumerate(days.tolist()):
+            entry = self._day(day)
+            entry['sessions'] += int(counts[i])
+            entry['bounced'] += int(bounced[i])
+        keys = np.concatenate([self.closed_keys, self.session_keys[closed]])
+        order = np.argsort(keys, kind='stable')
+        self.closed_keys = keys[order]
+        self.closed_views = np.concatenate([self.closed_views, self.session_views[closed]])[order]
+        self.closed_day = np.concatenate([self.closed_day, self.session_day[closed]])[order]
+        keep = ~closed
+        self.session_keys = self.session_keys[keep]
+        self.session_views = self.session_views[keep]
+        self.session_day = self.session_day[keep]
+
+    def _prune_closed(self, cutoff):
+        """丢弃首日早于 cutoff 的已结束会话的键"""
+        keep = self.closed_day >= cutoff
+        if not keep.all():
+            self.closed_keys = self.closed_keys[keep]
+            self.closed_views = self.closed_views[keep]
+            self.closed_day = self.closed_day[keep]
+
+    def summary(self, day):
+        """一天的汇总行"""
+        entry = self.days[day]
+        in_day = self.session_day == day
+        total_sessions = entry['sessions'] + int(np.count_nonzero(in_day))
+        bounced = entry['bounced'] + int(np.count_nonzero(in_day & (self.session_views == 1)))
+        views = entry['views']
+        return {
+            'date': str(_EPOCH + np.timedelta64(day, 'D')),
+            'total_views': views,
+            'unique_visitors': hll_estimate(entry['hll']),
+            'avg_duration': int(round(entry['duration'] / views)) if views else 0,
+            'bounce_rate': round(100.0 * bounced / total_sessions, 2) if total_sessions else 0,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+    def changed_rows(self):
+        """本次运行中有变化的日期的汇总行"""
+        return [self.summary(day) for day in sorted(self.changed) if day in self.days]
+
+# ---------------------------------------------------------------- 数据源
+
+def parse_timestamp(value):
+    """created_at 字符串 → UTC datetime；不带时区的时间按 UTC 处理（与 page_views 的存储一致），
+    不随运行机器的本地时区变化"""
+    moment = datetime.fromisoformat(str(value).strip().replace(' ', 'T', 1))
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+def utc_day(value):
+    """created_at 字符串 → UTC 日期距 1970-01-01 的天数"""
+    text = str(value)
+    # 已是 UTC 或不带时区（按 UTC 处理）时直接取日期部分
+    if len(text) <= 10 or text.endswith(('Z', '+00:00', '+00')) or not _OFFSET.search(text, 10):
+        return (np.datetime64(text[:10], 'D') - _EPOCH).astype(int)
+    return (np.datetime64(parse_timestamp(text).date(), 'D') - _EPOCH).astype(int)
+
+def watermark_key(created_at, row_id):
+    """(created_at, id) → 可比较的键：时间按解析后的 UTC 时刻比较，CSV 与 NDJSON 的写法不同也一致"""
+    return parse_timestamp(created_at), str(row_id)
+
+def make_watermark(row):
+    """由一行生成要保存的水位线：时间统一写成带 +00:00 的 ISO 格式，也直接用于 PostgREST 过滤"""
+    return parse_timestamp(row['created_at']).isoformat(), str(row['id'])
+
+def to_arrays(rows):
+    """把一块行字典转换成向量化聚合需要的数组"""
+    days = np.fromiter((utc_day(r['created_at']) for r in rows), dtype=np.int64, count=len(rows))
+    durations = np.fromiter((int(r.get('duration') or 0) for r in rows), dtype=np.float64, count=len(rows))
+    visitors = hash64(r['visitor_id'] for r in rows)
+    sessions = hash64(r['session_id'] for r in rows)
+    return days, visitors, sessions, durations
+
+def iter_rest_chunks(session, base_url, headers, watermark, page_size=DEFAULT_PAGE_SIZE):
+    """按 (created_at, id) 键集分页读取水位线之后的 page_views"""
+    url = f'{base_url}/rest/v1/page_views'
+    last_ts, last_id = watermark or (None, None)
+    while True:
+        rows = []
+        if last_ts is not None:
+            # 先取完与水位线同一时刻、id 更大的行
+            params = {'select': COLUMNS, 'created_at': f'eq.{last_ts}', 'id': f'gt.{last_id}',
+                      'order': 'id.asc', 'limit': page_size}
+            rows = _get(session, url, headers, params)
+        if len(rows) < page_size:
+            params = {'select': COLUMNS, 'order': 'created_at.asc,id.asc', 'limit': page_size - len(rows)}
+            if last_ts is not None:
+                params['created_at'] = f'gt.{last_ts}'
+            rows += _get(session, url, headers, params)
+        if not rows:
+            return
+        yield rows
+        last_ts, last_id = rows[-1]['created_at'], rows[-1]['id']
+
+def _get(session, url, headers, params):
+    response = session.get(url, headers=headers, params=params, timeout=60)
+    if response.status_code != 200:
+        raise RuntimeError(f'读取 page_views 失败: HTTP {response.status_code}: {response.text}')
+    return response.json()
+
+def _after(row, threshold):
+    return threshold is None or watermark_key(row['created_at'], row['id']) > threshold
+
+def iter_file_chunks(path, watermark, page_size=DEFAULT_PAGE_SIZE):
+    """读取 CSV 或 NDJSON 导出，按块产出水位线之后的行（导出需按 created_at, id 排序）"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            reader = csv.DictReader(f)
+        else:
+            reader = (json.loads(line) for line in f if line.strip())
+        threshold = watermark_key(*watermark) if watermark else None
+        chunk = []
+        for row in reader:
+            if _after(row, threshold):
+                chunk.append(row)
+                if len(chunk) >= page_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+def upsert_summary(session, base_url, headers, rows):
+    url = f'{base_url}/rest/v1/analytics_summary?on_conflict=date'
+    response = session.post(url, headers=dict(headers, Prefer='resolution=merge-duplicates,return=minimal'),
+                            json=rows, timeout=60)
+    if response.status_code not in (200, 201, 204):
+        raise RuntimeError(f'写入 analytics_summary 失败: HTTP {response.status_code}: {response.text}')
+
+def main():
+    parser = argparse.ArgumentParser(description='把 page_views 汇总到 analytics_summary')
+    parser.add_argument('--url', default=os.getenv('VITE_SUPABASE_URL'), help='Supabase/PostgREST 地址')
+    parser.add_argument('--csv', dest='export', help='page_views 的 CSV 导出（代替 --url 读取）')
+    parser.add_argument('--ndjson', dest='export', help='page_views 的 NDJSON 导出（代替 --url 读取）')
+    parser.add_argument('--state', default=DEFAULT_STATE, help='水位线与草图状态文件')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='每块读取的行数')
+    parser.add_argument('--full', action='store_true', help='忽略状态文件，从头重算')
+    parser.add_argument('--dry-run', action='store_true', help='只输出有变化的日期，不写库也不保存状态')
+    args = parser.parse_args()
+
+    if not args.export and not args.url:
+        parser.error('需要指定 --url 或 --csv/--ndjson')
+
+    rollup = Rollup() if args.full else Rollup.load(args.state)
+    key = os.getenv('VITE_SUPABASE_ANON_KEY') or ''
+    headers = {'apikey': key, 'Authorization': f'Bearer {key}', 'Content-Type': 'application/json'}
+    session = None
+    if args.url and not (args.export and args.dry_run):
+        import requests
+        session = requests.Session()
+
+    if args.export:
+        chunks = iter_file_chunks(args.export, rollup.watermark, max(1, args.page_size))
+    else:
+        chunks = iter_rest_chunks(session, args.url, headers, rollup.watermark, max(1, args.page_size))
+
+    total = 0
+    for chunk in chunks:
+        rollup.add(*to_arrays(chunk))
+        rollup.watermark = make_watermark(chunk[-1])
+        total += len(chunk)
+        print(f'\r  已汇总 {total} 行', end='', flush=True)
+    print()
+
+    rows = rollup.changed_rows()
+    print(f'✅ 新增访问 {total} 条，变化的日期 {len(rows)} 天')
+    if args.dry_run:
+        for row in rows:
+            print(f"  {row['date']}  浏览 {row['total_views']}  访客 {row['unique_visitors']}  "
+                  f"平均停留 {row['avg_duration']}s  跳出率 {row['bounce_rate']}%")
+        return
+    if rows:
+        if session is None:
+            print('❌ 写入 analytics_summary 需要 --url', file=sys.stderr)
+            sys.exit(1)
+        upsert_summary(session, args.url, headers, rows)
+    rollup.save(args.state)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+文章 HTML 预计算
+
+在加载前把每篇文章的 content 用流式 HTML 解析器扫描一遍，生成页面展示要用的派生数据：
+  toc           标题大纲 [{level, text, id}]，id 按出现顺序去重，前端按同样顺序给标题加锚点
+  image_urls    正文图片地址（去重，保持顺序）
+  word_count    英文按单词、中日韩文字按字计数
+  reading_time  预计阅读分钟数（至少 1）
+  excerpt       纯文本摘要（原行已有 excerpt 时保留）
+  content_hash  content 的 SHA-256，内容没变就不必重新计算
+
+用法:
+  python scripts/article_precompute.py --file insert-phone-repair-articles.sql [--output precomputed.jsonl]
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+from html.parser import HTMLParser
+
+# 每分钟阅读的英文单词数 / 中日韩文字数
+WORDS_PER_MINUTE = 200
+CJK_CHARS_PER_MINUTE = 400
+EXCERPT_LENGTH = 160
+FEED_CHUNK = 1 << 14
+
+PRECOMPUTED_COLUMNS = ('toc', 'image_urls', 'word_count', 'reading_time', 'content_hash')
+
+_HEADINGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+# 块级元素结束时在纯文本中补一个空格，避免相邻段落粘连
+_BLOCKS = {'p', 'div', 'li', 'ul', 'ol', 'br', 'tr', 'td', 'th', 'table', 'section', 'article',
+           'blockquote', 'pre', 'figure', 'figcaption'} | set(_HEADINGS)
+_SKIPPED = {'script', 'style', 'noscript', 'template'}
+_CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]')
+_WORD = re.compile(r'[A-Za-z0-9À-ɏ]+(?:[\'’][A-Za-z]+)*')
+_SPACES = re.compile(r'\s+')
+_SLUG_STRIP = re.compile(r'[^\w-]+')
+
+def heading_id(text, used):
+    """由标题文字生成锚点 id，重复时追加 -2、-3"""
+    base = _SLUG_STRIP.sub('', _SPACES.sub('-', text.strip().lower())).strip('-') or 'section'
+    candidate = base
+    n = 1
+    while candidate in used:
+        n += 1
+        candidate = f'{base}-{n}'
+    used.add(candidate)
+    return candidate
+
+class ArticleScanner(HTMLParser):
+    """单遍扫描文章 HTML，收集标题、图片与纯文本"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.toc = []
+        self.image_urls = []
+        self._seen_images = set()
+        self._used_ids = set()
+        self._text = []
+        self._heading = None
+        self._heading_text = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED:
+            self._skip_depth += 1
+        elif tag in _HEADINGS:
+            self._heading = tag
+            self._heading_text = []
+        elif tag == 'img':
+            src = dict(attrs).get('src')
+            if src and src not in self._seen_images:
+                self._seen_images.add(src)
+                self.image_urls.append(src)
+        if tag in _BLOCKS:
+            self._text.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == self._heading:
+            text = _SPACES.sub(' ', ''.join(self._heading_text)).strip()
+            if text:
+                self.toc.append({'level': _HEADINGS[tag], 'text': text,
+                                 'id': heading_id(text, self._used_ids)})
+            self._heading = None
+        if tag in _BLOCKS:
+            self._text.append(' ')
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        self._text.append(data)
+        if self._heading:
+            self._heading_text.append(data)
+
+    def plain_text(self):
+        return _SPACES.sub(' ', ''.join(self._text)).strip()
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """截取纯文本摘要，尽量在单词边界处截断"""
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    space = cut.rfind(' ')
+    if space > length * 0.6:
+        cut = cut[:space]
+    return cut.rstrip(' ,.;:，。；：') + '…'
+
+def precompute(html):
+    """扫描一篇文章的 HTML，返回派生字段字典"""
+    scanner = ArticleScanner()
+    for start in range(0, len(html), FEED_CHUNK):
+        scanner.feed(html[start:start + FEED_CHUNK])
+    scanner.close()
+    text = scanner.plain_text()
+    cjk_chars = len(_CJK.findall(text))
+    words = len(_WORD.findall(text))
+    minutes = words / WORDS_PER_MINUTE + cjk_chars / CJK_CHARS_PER_MINUTE
+    return {
+        'toc': scanner.toc,
+        'image_urls': scanner.image_urls,
+        'word_count': words + cjk_chars,
+        'reading_time': max(1, round(minutes)),
+        'excerpt': make_excerpt(text),
+        'content_hash': hashlib.sha256(html.encode('utf-8')).hexdigest(),
+    }
+
+def precompute_row(row):
+    """给一行文章数据补上预计算字段；content 不是字符串时原样返回"""
+    content = row.get('content')
+    if not isinstance(content, str):
+        return row
+    derived = precompute(content)
+    result = dict(row)
+    excerpt = derived.pop('excerpt')
+    if not result.get('excerpt'):
+        result['excerpt'] = excerpt
+    result.update(derived)
+    return result
+
+def precompute_rows(indexed_rows):
+    """对 (文章编号, 行) 逐行预计算，按需产出，不把整个文件的结果留在内存里"""
+    for i, row in indexed_rows:
+        yield i, precompute_row(row)
+
+def main():
+    from batch_insert_articles import iter_statement_rows
+    from sql_stream import iter_insert_statements
+
+    parser = argparse.ArgumentParser(description='预计算文章的目录、阅读时间、图片列表与摘要')
+    parser.add_argument('--file', default='insert-phone-repair-articles.sql', help='SQL文件路径')
+    parser.add_argument('--output', help='输出 JSONL 文件（默认输出到标准输出）')
+    args = parser.parse_args()
+
+    failures = []
+    rows = iter_statement_rows(iter_insert_statements(args.file), failures)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for i, row in precompute_rows(rows):
+            record = {'slug': row.get('slug'), 'excerpt': row.get('excerpt')}
+            record.update((c, row.get(c)) for c in PRECOMPUTED_COLUMNS)
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    for i, error in failures:
+        print(f'❌ 文章 {i}: {error}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+异步并发批量插入文章
+
+- aiohttp 连接池（keep-alive），所有请求复用少量 TCP/TLS 连接
+- 限制同时在途的请求数
+- 令牌桶限速：遇到 429/5xx 时减半速率（并遵守 Retry-After），成功后逐步恢复
+- 结束时输出吞吐量与单请求延迟 p50/p95
+- 边读边写：SQL 文件流式切分、逐条解析，行随解析进入有界队列，内存占用与文件大小无关
+
+用法:
+  python scripts/async_insert_articles.py --file insert-phone-repair-articles.sql \
+      --batch-size 100 --concurrency 8 --rate 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+
+from article_precompute import precompute_rows
+from batch_insert_articles import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RETRIES,
+    RETRYABLE_STATUS,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+    iter_statement_rows,
+)
+from sql_stream import iter_insert_statements
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 20.0
+
+class AdaptiveRateLimiter:
+    """令牌桶限速器（AIMD）：被限流时速率减半，成功时线性回升"""
+
+    def __init__(self, rate, burst=None, min_rate=0.5, max_rate=None):
+        self.rate = rate
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self):
+        # 每次成功把速率提高 max_rate 的 5%
+        self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttle(self, retry_after=None):
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+class LoadStats:
+    """吞吐量与延迟统计"""
+
+    def __init__(self):
+        self.latencies = []
+        self.rows_ok = 0
+        self.rows_failed = 0
+        self.requests = 0
+        self.throttled = 0
+        self.started = time.monotonic()
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.rows_ok / elapsed if elapsed > 0 else 0.0
+        return (f'⏱️ 耗时 {elapsed:.1f}s | {rate:.1f} 行/秒 | 请求 {self.requests} 次 '
+                f'(限流/5xx {self.throttled} 次) | 延迟 p50 {self.percentile(50) * 1000:.0f}ms '
+                f'p95 {self.percentile(95) * 1000:.0f}ms')
+
+def parse_retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+async def post_batch(session, url, headers, rows, limiter, stats, retries):
+    """写入一批行，返回 None 表示成功，否则返回错误信息"""
+    error = None
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        started = time.monotonic()
+        try:
+            async with session.post(url, headers=headers, json=rows) as response:
+                text = await response.text()
+                status = response.status
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, text, retry_after = None, str(e), None
+        stats.latencies.append(time.monotonic() - started)
+        stats.requests += 1
+
+        if status in (200, 201, 204):
+            limiter.on_success()
+            return None
+        error = f'HTTP {status}: {text}' if status is not None else text
+        if status is not None and status not in RETRYABLE_STATUS:
+            return error
+        stats.throttled += 1
+        limiter.on_throttle(retry_after)
+        if attempt < retries:
+            await asyncio.sleep(0.2 * (2 ** attempt))
+    return error
+
+async def worker(queue, session, url, headers, limiter, stats, retries, failures):
+    while True:
+        batch = await queue.get()
+        if batch is None:
+            queue.task_done()
+            return
+        error = await post_batch(session, url, headers, [row for _, row in batch], limiter, stats, retries)
+        if error is None:
+            stats.rows_ok += len(batch)
+        else:
+            stats.rows_failed += len(batch)
+            failures.extend((i, row.get('slug'), error) for i, row in batch)
+        queue.task_done()
+
+async def report_progress(stats):
+    """每秒刷新一次进度行（行是边解析边写入的，总数事先未知）"""
+    while True:
+        await asyncio.sleep(1)
+        done = stats.rows_ok + stats.rows_failed
+        elapsed = time.monotonic() - stats.started
+        print(f'\r  已写入 {done} 行 | {stats.rows_ok / elapsed:.1f} 行/秒 '
+              f'| p50 {stats.percentile(50) * 1000:.0f}ms', end='', flush=True)
+
+async def load(rows, base_url, batch_size, concurrency, rate, retries):
+    """并发写入所有行，返回 (stats, failures)
+
+    rows 为 (文章编号, 行) 的任意可迭代对象，按需取用：队列满时生产者停下，不会提前读完。
+    """
+    url = f'{base_url}/rest/v1/articles'
+    headers = {
+        'apikey': SUPABASE_KEY or '',
+        'Authorization': f'Bearer {SUPABASE_KEY or ""}',
+        'Content-Type': 'application/json',
+        'Prefer': 'return=minimal'
+    }
+    stats = LoadStats()
+    failures = []
+    limiter = AdaptiveRateLimiter(rate, burst=concurrency)
+    # 队列容量有限，在内存中的最多是这些批次加上各工作协程手上的批次
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    connector = aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=60)
+
+    async def produce():
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await queue.put(batch)
+                batch = []
+        if batch:
+            await queue.put(batch)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        progress = asyncio.create_task(report_progress(stats))
+        try:
+            # 任一工作协程异常时 TaskGroup 会取消生产者和其余协程，避免生产者卡在满队列上
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                for _ in range(concurrency):
+                    group.create_task(worker(queue, session, url, headers, limiter, stats, retries, failures))
+        finally:
+            progress.cancel()
+    print()
+    return stats, sorted(failures, key=lambda f: f[0])
+
+def main():
+    parser = argparse.ArgumentParser(description='异步并发批量插入文章')
+    parser.add_argument('--file', default='insert-phone-repair-articles.sql', help='SQL文件路径')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每个请求的行数')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='最大在途请求数')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='每秒最多请求数（遇到限流会自动下调）')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='每批的重试次数')
+    parser.add_argument('--url', default=SUPABASE_URL, help='Supabase/PostgREST 地址（可指向本地替身服务）')
+    parser.add_argument('--precompute', action='store_true',
+                        help='写入前预计算目录、图片列表、字数、阅读时间与内容哈希（需要迁移 00103）')
+    args = parser.parse_args()
+
+    print('=' * 60)
+    print('异步并发批量插入文章')
+    print('=' * 60)
+    print()
+
+    if not os.path.exists(args.file):
+        print(f'❌ 错误: 找不到文件 {args.file}')
+        sys.exit(1)
+
+    print(f'📖 流式读取SQL文件: {args.file}\n')
+    parse_failures = []
+    rows = iter_statement_rows(iter_insert_statements(args.file), parse_failures)
+    if args.precompute:
+        rows = precompute_rows(rows)
+
+    try:
+        stats, failures = asyncio.run(load(rows, args.url, max(1, args.batch_size),
+                                           max(1, args.concurrency), args.rate, args.retries))
+    except* Exception as group:
+        print()
+        for error in group.exceptions:
+            print(f'❌ 写入中止: {type(error).__name__}: {error}')
+        sys.exit(1)
+    failures.extend((i, None, error) for i, error in parse_failures)
+
+    print()
+    print('=' * 60)
+    print('执行完成！')
+    print('=' * 60)
+    print(f'✅ 成功: {stats.rows_ok} 篇')
+    print(f'❌ 失败: {len(failures)} 篇')
+    print(stats.summary())
+    for i, slug, error in failures[:20]:
+        print(f'  - 文章 {i} ({slug}): {(error or "")[:100]}')
+    if len(failures) > 20:
+        print(f'  ... 还有 {len(failures) - 20} 篇')
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -2,45 +2,43 @@
 """
 批量插入100篇手机维修文章到数据库
 """
+import argparse
 import os
 import sys
 import time
+from datetime import datetime, timezone
+
 import requests
 from dotenv import load_dotenv
 
+from article_precompute import precompute_rows
+from direct_insert_articles import iter_insert_rows, materialize_row
+from load_journal import (
+    DEFAULT_JOURNAL,
+    DEFAULT_LOOKUP_SIZE,
+    CheckpointJournal,
+    lookup_existing,
+    statement_hash,
+)
+from sql_stream import iter_insert_statements
+
 # 加载环境变量
 load_dotenv()
 
 SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('VITE_SUPABASE_ANON_KEY')
 
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_RETRIES = 3
+# 这些状态码说明服务端暂时不可用，整批重试即可
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# 复用同一个会话，所有请求共享 keep-alive 连接
+_session = requests.Session()
+
 def read_sql_statements(filename):
-    """读取SQL文件并分割成单独的INSERT语句"""
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    inserts = []
-    lines = content.split('\n')
-    current_insert = []
-    in_insert = False
-    
-    for line in lines:
-        if line.strip().startswith('INSERT INTO articles'):
-            if current_insert:
-                inserts.append('\n'.join(current_insert))
-            current_insert = [line]
-            in_insert = True
-        elif in_insert:
-            current_insert.append(line)
-            if line.strip().endswith(';'):
-                inserts.append('\n'.join(current_insert))
-                current_insert = []
-                in_insert = False
-    
-    if current_insert:
-        inserts.append('\n'.join(current_insert))
-    
-    return inserts
+    """读取SQL文件并分割成单独的INSERT语句（流式切分，正确处理字符串中的分号）"""
+    return list(iter_insert_statements(filename))
 
 def execute_sql(sql_statement):
     """通过Supabase REST API执行SQL"""
@@ -53,7 +51,7 @@ def execute_sql(sql_statement):
     data = {'sql_query': sql_statement}
     
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = _session.post(url, headers=headers, json=data, timeout=30)
         if response.status_code == 200 or response.status_code == 201:
             return True, None
         else:
@@ -61,13 +59,175 @@ def execute_sql(sql_statement):
     except Exception as e:
         return False, str(e)
 
+def iter_statement_rows(statements, failures, hashes=None):
+    """逐条解析INSERT语句（支持多行 VALUES），按顺序产出 (文章编号, 行)
+
+    无法解析或含不支持表达式的行以 (文章编号, 错误) 追加到 failures。
+    now() 之类的时间表达式统一换成加载时刻；其他无法用JSON表达的SQL表达式视为失败。
+    传入字典 hashes 时，会填入 {文章编号: 所在语句的哈希}。
+    """
+    loaded_at = datetime.now(timezone.utc).isoformat()
+    index = 0
+    for sql in statements:
+        try:
+            parsed = list(iter_insert_rows(sql))
+        except ValueError as e:
+            index += 1
+            failures.append((index, f'无法解析INSERT语句: {e}'))
+            continue
+        key = statement_hash(sql) if hashes is not None else None
+        for row in parsed:
+            index += 1
+            if hashes is not None:
+                hashes[index] = key
+            row, unsupported = materialize_row(row, loaded_at)
+            if unsupported:
+                failures.append((index, f'不支持的SQL表达式: {", ".join(unsupported)}'))
+            else:
+                yield index, row
+
+def statements_to_rows(statements, hashes=None):
+    """把INSERT语句解析成行字典，返回 (rows, failures)
+
+    rows 为 [(文章编号, 行)]，failures 为 [(文章编号, 错误)]，见 iter_statement_rows。
+    """
+    failures = []
+    rows = list(iter_statement_rows(statements, failures, hashes))
+    return rows, failures
+
+def rest_headers(prefer=None):
+    headers = {
+        'apikey': SUPABASE_KEY or '',
+        'Authorization': f'Bearer {SUPABASE_KEY or ""}',
+        'Content-Type': 'application/json',
+    }
+    if prefer:
+        headers['Prefer'] = prefer
+    return headers
+
+def post_rows(session, base_url, rows, upsert=False):
+    """一次请求写入多行（PostgREST JSON数组插入，整批原子）
+
+    upsert 为真时按 slug 冲突合并，已存在的行被覆盖而不是报 409。
+    """
+    url = f"{base_url}/rest/v1/articles"
+    if upsert:
+        url += '?on_conflict=slug'
+        headers = rest_headers('resolution=merge-duplicates,return=minimal')
+    else:
+        headers = rest_headers('return=minimal')
+    try:
+        response = session.post(url, headers=headers, json=rows, timeout=60)
+    except Exception as e:
+        return None, str(e)
+    if response.status_code in (200, 201, 204):
+        return response.status_code, None
+    return response.status_code, f"HTTP {response.status_code}: {response.text}"
+
+def insert_batch(session, base_url, rows, retries, upsert=False):
+    """写入一批行，遇到网络错误或 429/5xx 时指数退避重试
+
+    返回 (success, retryable, error)。
+    """
+    error = None
+    for attempt in range(retries + 1):
+        status, error = post_rows(session, base_url, rows, upsert)
+        if error is None:
+            return True, False, None
+        if status is not None and status not in RETRYABLE_STATUS:
+            return False, False, error
+        if attempt < retries:
+            time.sleep(0.5 * (2 ** attempt))
+    return False, True, error
+
+def insert_isolating(session, base_url, indexed_rows, retries, upsert=False):
+    """写入一批行；整批被拒绝时二分拆批，定位到具体失败的行
+
+    返回失败列表 [(文章编号, slug, 错误)]。
+    """
+    rows = [row for _, row in indexed_rows]
+    success, retryable, error = insert_batch(session, base_url, rows, retries, upsert)
+    if success:
+        return []
+    if retryable or len(indexed_rows) == 1:
+        return [(i, row.get('slug'), error) for i, row in indexed_rows]
+    middle = len(indexed_rows) // 2
+    return (insert_isolating(session, base_url, indexed_rows[:middle], retries, upsert)
+            + insert_isolating(session, base_url, indexed_rows[middle:], retries, upsert))
+
+def pending_rows(session, base_url, rows, hashes, journal, lookup_size):
+    """去掉日志中已提交、或 slug 已在数据库中的行，返回待写入的行"""
+    remaining = [(i, row) for i, row in rows if (hashes[i], row.get('slug')) not in journal]
+    journaled = len(rows) - len(remaining)
+    existing = lookup_existing(session, base_url, 'articles', 'slug',
+                               [row.get('slug') for _, row in remaining], rest_headers(), lookup_size)
+    pending = [(i, row) for i, row in remaining if row.get('slug') not in existing]
+    print(f'♻️ 日志中已提交 {journaled} 行，数据库中已存在 {len(remaining) - len(pending)} 行，'
+          f'待写入 {len(pending)} 行')
+    return pending
+
+def bulk_insert(statements, batch_size, retries, base_url, journal_path=None,
+                lookup_size=DEFAULT_LOOKUP_SIZE, precompute=False):
+    """批量模式：每个请求写入 batch_size 行，返回 (成功数, 失败列表)
+
+    指定 journal_path 时可断点续传：跳过已提交或已存在的行，其余按 slug upsert，
+    每提交一批就记入日志。precompute 为真时写入前逐批给每行补上目录、阅读时间等预计算字段。
+    """
+    hashes = {} if journal_path else None
+    rows, parse_failures = statements_to_rows(statements, hashes)
+    journal = CheckpointJournal(journal_path) if journal_path else None
+    if journal is not None:
+        rows = pending_rows(_session, base_url, rows, hashes, journal, lookup_size)
+    failures = []
+    total_batches = (len(rows) + batch_size - 1) // batch_size
+    session = _session
+    start = time.time()
+    
+    for b in range(total_batches):
+        batch = rows[b * batch_size:(b + 1) * batch_size]
+        if precompute:
+            # 逐批预计算：已跳过的行不做无用功，也不必同时保留全部结果
+            batch = list(precompute_rows(batch))
+        print(f'[批次 {b + 1}/{total_batches}] 写入 {len(batch)} 篇文章...', end=' ', flush=True)
+        batch_failures = insert_isolating(session, base_url, batch, retries, upsert=journal is not None)
+        failures.extend(batch_failures)
+        if journal is not None:
+            failed = {i for i, _, _ in batch_failures}
+            journal.record((hashes[i], row.get('slug')) for i, row in batch if i not in failed)
+        if batch_failures:
+            print(f'⚠️ {len(batch_failures)} 篇失败')
+        else:
+            print('✅')
+    
+    elapsed = time.time() - start
+    success_count = len(rows) - len(failures)
+    if elapsed > 0:
+        print(f'\n⏱️ 耗时 {elapsed:.1f}s，{success_count / elapsed:.1f} 行/秒')
+    failures.extend((i, None, error) for i, error in parse_failures)
+    return success_count, sorted(failures, key=lambda f: f[0])
+
 def main():
+    parser = argparse.ArgumentParser(description='批量插入手机维修文章')
+    parser.add_argument('--file', default='insert-phone-repair-articles.sql', help='SQL文件路径')
+    parser.add_argument('--bulk', action='store_true', help='批量模式：多行JSON数组写入 /rest/v1/articles')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='批量模式每个请求的行数')
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help='批量模式每批的重试次数')
+    parser.add_argument('--url', default=SUPABASE_URL, help='Supabase/PostgREST 地址（可指向本地替身服务）')
+    parser.add_argument('--resume', action='store_true',
+                        help='批量模式断点续传：跳过已提交/已存在的文章，其余按 slug upsert')
+    parser.add_argument('--journal', default=DEFAULT_JOURNAL, help='--resume 使用的检查点日志路径')
+    parser.add_argument('--lookup-size', type=int, default=DEFAULT_LOOKUP_SIZE,
+                        help='--resume 时每次 slug=in.(...) 查询的 slug 数')
+    parser.add_argument('--precompute', action='store_true',
+                        help='批量模式写入前预计算目录、图片列表、字数、阅读时间与内容哈希（需要迁移 00103）')
+    args = parser.parse_args()
+    
     print('=' * 60)
     print('批量插入100篇手机维修英文文章')
     print('=' * 60)
     print()
     
-    sql_file = 'insert-phone-repair-articles.sql'
+    sql_file = args.file
     
     if not os.path.exists(sql_file):
         print(f'❌ 错误: 找不到文件 {sql_file}')
@@ -77,6 +237,22 @@ def main():
     statements = read_sql_statements(sql_file)
     print(f'✅ 找到 {len(statements)} 条INSERT语句\n')
     
+    if args.bulk:
+        success_count, failures = bulk_insert(statements, max(1, args.batch_size), args.retries, args.url,
+                                              journal_path=args.journal if args.resume else None,
+                                              lookup_size=max(1, args.lookup_size),
+                                              precompute=args.precompute)
+        print()
+        print('=' * 60)
+        print('执行完成！')
+        print('=' * 60)
+        print(f'✅ 成功: {success_count} 篇')
+        print(f'❌ 失败: {len(failures)} 篇')
+        for i, slug, error in failures:
+            print(f'  - 文章 {i} ({slug}): {(error or "")[:100]}')
+        print()
+        return
+    
     success_count = 0
     fail_count = 0
     failed_indices = []
@@ -3,12 +3,15 @@
 直接通过Python插入100篇手机维修文章
 绕过RLS策略
 """
+import argparse
 import os
 import sys
 import time
 import re
 from dotenv import load_dotenv
 
+from sql_stream import iter_insert_statements
+
 # 加载环境变量
 load_dotenv()
 
@@ -16,92 +19,316 @@ SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('VITE_SUPABASE_ANON_KEY')
 
 def read_sql_statements(filename):
-    """读取SQL文件并提取INSERT语句"""
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 使用正则表达式匹配完整的INSERT语句
-    pattern = r"INSERT INTO articles.*?VALUES.*?;(?=\s*(?:INSERT INTO|$))"
-    statements = re.findall(pattern, content, re.DOTALL)
-    
-    return statements
+    """读取SQL文件并提取INSERT语句（流式切分，正确处理字符串中的分号）"""
+    return list(iter_insert_statements(filename))
+
+class SQLExpr(str):
+    """无法转换成Python值的SQL表达式（如 now()、gen_random_uuid()），保留原文"""
+
+    def __repr__(self):
+        return f'SQLExpr({str.__repr__(self)})'
+
+_HEADER = re.compile(
+    r'\s*INSERT\s+INTO\s+((?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?)\s*\(([^)]*)\)\s*VALUES\s*',
+    re.IGNORECASE)
+_STRING = re.compile(r"'([^']*(?:''[^']*)*)'")
+_ESCAPE_STRING = re.compile(r"[Ee]'((?:[^'\\]|''|\\.)*)'", re.DOTALL)
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?=\s*(?:[,)]|::))')
+_KEYWORD = re.compile(r'(NULL|TRUE|FALSE)\b(?=\s*(?:[,)]|::))', re.IGNORECASE)
+_CAST = re.compile(r'\s*::\s*([\w ]+?(?:\(\d+(?:,\s*\d+)?\))?(?:\[\])?)(?=\s*(?:[,)]|::))')
+_EXPR_STOP = re.compile(r"[()\[\],']")
+_SPACE = re.compile(r'\s*')
+_BACKSLASH_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f'}
+_INT_TYPES = {'int', 'integer', 'int2', 'int4', 'int8', 'smallint', 'bigint'}
+_FLOAT_TYPES = {'float', 'float4', 'float8', 'real', 'double precision'}
+
+def _unquote_identifier(name):
+    name = name.strip()
+    if name.startswith('"') and name.endswith('"'):
+        return name[1:-1].replace('""', '"')
+    return name.lower()
+
+def _apply_cast(value, type_name):
+    """对带类型转换的字面量做对应的Python转换；其余类型保持原值"""
+    type_name = type_name.strip().lower()
+    if value is None or isinstance(value, SQLExpr):
+        return value
+    base = type_name.split('(')[0].strip()
+    if base in _INT_TYPES:
+        return int(value)
+    if base in _FLOAT_TYPES:
+        return float(value)
+    if base in ('numeric', 'decimal'):
+        number = float(value)
+        return int(number) if number.is_integer() and '.' not in str(value) else number
+    if base in ('bool', 'boolean') and isinstance(value, str):
+        return value.strip().lower() in ('t', 'true', 'yes', 'on', '1')
+    return value
+
+def _scan_expression(sql, pos):
+    """扫描一个通用表达式（函数调用、数组等），到括号外的 , 或 ) 为止"""
+    depth = 0
+    start = pos
+    while True:
+        m = _EXPR_STOP.search(sql, pos)
+        if m is None:
+            raise ValueError('VALUES 子句未闭合')
+        ch = m.group(0)
+        if ch == "'":
+            string = _STRING.match(sql, m.start())
+            if string is None:
+                raise ValueError('字符串未闭合')
+            pos = string.end()
+        elif ch in '([':
+            depth += 1
+            pos = m.end()
+        elif depth == 0:
+            return SQLExpr(sql[start:m.start()].strip()), m.start()
+        else:
+            if ch in ')]':
+                depth -= 1
+            pos = m.end()
+
+def _decode_escape_string(body):
+    """解码 E'...' 字符串中的反斜杠转义"""
+    out = []
+    i = 0
+    while True:
+        j = body.find('\\', i)
+        if j < 0 or j + 1 >= len(body):
+            out.append(body[i:])
+            break
+        out.append(body[i:j])
+        ch = body[j + 1]
+        out.append(_BACKSLASH_ESCAPES.get(ch, ch))
+        i = j + 2
+    return ''.join(out).replace("''", "'")
+
+def _scan_value(sql, pos):
+    """从 pos 开始解析一个值，返回 (值, 结束位置)"""
+    m = _STRING.match(sql, pos)
+    if m:
+        value, pos = m.group(1).replace("''", "'"), m.end()
+    else:
+        m = _ESCAPE_STRING.match(sql, pos)
+        if m:
+            value, pos = _decode_escape_string(m.group(1)), m.end()
+        else:
+            m = _NUMBER.match(sql, pos)
+            if m:
+                text = m.group(0)
+                is_float = any(c in text for c in '.eE')
+                value, pos = (float(text) if is_float else int(text)), m.end()
+            else:
+                m = _KEYWORD.match(sql, pos)
+                if m:
+                    value = {'null': None, 'true': True, 'false': False}[m.group(1).lower()]
+                    pos = m.end()
+                else:
+                    value, pos = _scan_expression(sql, pos)
+    while True:
+        cast = _CAST.match(sql, pos)
+        if not cast:
+            return value, pos
+        value, pos = _apply_cast(value, cast.group(1)), cast.end()
+
+def iter_insert_rows(sql):
+    """解析INSERT语句（支持多行 VALUES (...), (...)），逐行产出以列名为键的字典
+
+    字符串、数字、NULL、布尔值与带 :: 类型转换的字面量会转成对应的Python值，
+    now() 之类的表达式以 SQLExpr 保留原文。
+    """
+    header = _HEADER.match(sql)
+    if not header:
+        raise ValueError('不是带列名的 INSERT ... VALUES 语句')
+    columns = [_unquote_identifier(c) for c in header.group(2).split(',')]
+    pos = header.end()
+    length = len(sql)
+    while True:
+        pos = _SPACE.match(sql, pos).end()
+        if pos >= length or sql[pos] != '(':
+            raise ValueError(f'位置 {pos} 处缺少 "("')
+        pos += 1
+        values = []
+        while True:
+            pos = _SPACE.match(sql, pos).end()
+            value, pos = _scan_value(sql, pos)
+            values.append(value)
+            pos = _SPACE.match(sql, pos).end()
+            if pos >= length:
+                raise ValueError('VALUES 子句未闭合')
+            if sql[pos] == ',':
+                pos += 1
+                continue
+            if sql[pos] == ')':
+                pos += 1
+                break
+            raise ValueError(f'位置 {pos} 处出现意外字符 {sql[pos]!r}')
+        if len(values) != len(columns):
+            raise ValueError(f'值的数量 ({len(values)}) 与列数 ({len(columns)}) 不一致')
+        yield dict(zip(columns, values))
+        pos = _SPACE.match(sql, pos).end()
+        if pos < length and sql[pos] == ',':
+            pos += 1
+            continue
+        # 其后可能是 ; 或 ON CONFLICT / RETURNING 子句
+        return
 
 def parse_insert_statement(sql):
-    """解析INSERT语句，提取字段值"""
-    # 提取VALUES部分
-    match = re.search(r"VALUES\s*\((.*)\);", sql, re.DOTALL)
-    if not match:
+    """解析单行INSERT语句，返回以列名为键的字典；无法解析时返回 None"""
+    try:
+        return next(iter_insert_rows(sql), None)
+    except ValueError:
         return None
-    
-    values_str = match.group(1)
-    
-    # 手动解析值（处理嵌套的引号和逗号）
-    values = []
-    current_value = ''
-    in_string = False
-    escape_next = False
-    paren_count = 0
-    
-    for char in values_str:
-        if escape_next:
-            current_value += char
-            escape_next = False
-            continue
-            
-        if char == '\\':
-            escape_next = True
-            current_value += char
-            continue
-            
-        if char == "'" and not escape_next:
-            in_string = not in_string
-            current_value += char
-            continue
-            
-        if char == ',' and not in_string and paren_count == 0:
-            values.append(current_value.strip())
-            current_value = ''
-            continue
-            
-        if char == '(' and not in_string:
-            paren_count += 1
-        elif char == ')' and not in_string:
-            paren_count -= 1
-            
-        current_value += char
-    
-    if current_value.strip():
-        values.append(current_value.strip())
-    
-    # 清理值
-    cleaned_values = []
-    for v in values:
-        v = v.strip()
-        if v.startswith("'") and v.endswith("'"):
-            v = v[1:-1]  # 移除外层引号
-            v = v.replace("''", "'")  # 反转义单引号
-        cleaned_values.append(v)
-    
-    if len(cleaned_values) < 11:
+
+# 可以在加载时用当前时刻替换的时间表达式
+NOW_EXPRESSIONS = {'now()', 'current_timestamp', 'localtimestamp', 'transaction_timestamp()'}
+
+def materialize_row(row, now_value):
+    """把行中的 now() 类表达式替换为 now_value
+
+    返回 (新行, 无法替换的表达式列表)；COPY 和 JSON 写入都不能执行SQL表达式。
+    """
+    result = {}
+    unsupported = []
+    for column, value in row.items():
+        if isinstance(value, SQLExpr):
+            if value.lower() in NOW_EXPRESSIONS:
+                value = now_value
+            else:
+                unsupported.append(f'{column}={value}')
+        result[column] = value
+    return result, unsupported
+
+def group_by_columns(rows):
+    """按列集合分组（保持首次出现的顺序），返回 [(columns, rows)]"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row), []).append(row)
+    return list(groups.items())
+
+def quote_identifier(name):
+    """必要时给列名/表名加双引号"""
+    if re.fullmatch(r'[a-z_][a-z0-9_$]*', name):
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+def sql_literal(value):
+    """把Python值写成SQL字面量"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, SQLExpr):
+        return str(value)
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def copy_text(value):
+    """值在 COPY 文本格式中的（未转义）文本表示，None 表示 NULL"""
+    if value is None:
         return None
-    
-    return {
-        'title': cleaned_values[0],
-        'slug': cleaned_values[1],
-        'content': cleaned_values[2],
-        'excerpt': cleaned_values[3],
-        'cover_image': cleaned_values[4],
-        'category_id': cleaned_values[5],
-        'author_id': cleaned_values[6],
-        'status': cleaned_values[7],
-        'view_count': int(cleaned_values[8]) if cleaned_values[8].isdigit() else 100,
-        'language': cleaned_values[9]
-    }
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+_COPY_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+def copy_escape(value):
+    """COPY 文本格式转义：反斜杠、制表符、换行、回车；NULL 写作 \\N"""
+    text = copy_text(value)
+    if text is None:
+        return '\\N'
+    return text.translate(_COPY_ESCAPES)
+
+def copy_unescape(field):
+    """copy_escape 的逆操作"""
+    if field == '\\N':
+        return None
+    if '\\' not in field:
+        return field
+    out = []
+    i = 0
+    while True:
+        j = field.find('\\', i)
+        if j < 0 or j + 1 >= len(field):
+            out.append(field[i:])
+            return ''.join(out)
+        out.append(field[i:j])
+        out.append(_COPY_UNESCAPES.get(field[j + 1], field[j + 1]))
+        i = j + 2
+
+def write_copy(f, table, rows):
+    """把行写成 COPY <table> (...) FROM stdin 数据块，返回块数"""
+    groups = group_by_columns(rows)
+    for columns, group in groups:
+        f.write(f'COPY {quote_identifier(table)} ({", ".join(quote_identifier(c) for c in columns)}) FROM stdin;\n')
+        for row in group:
+            f.write('\t'.join(copy_escape(row[c]) for c in columns))
+            f.write('\n')
+        f.write('\\.\n\n')
+    return len(groups)
+
+def write_chunked_inserts(f, table, rows, rows_per_statement):
+    """把行写成多行 INSERT ... VALUES (...), (...) 语句，返回语句数"""
+    count = 0
+    for columns, group in group_by_columns(rows):
+        header = f'INSERT INTO {quote_identifier(table)} ({", ".join(quote_identifier(c) for c in columns)})\nVALUES\n'
+        for start in range(0, len(group), rows_per_statement):
+            chunk = group[start:start + rows_per_statement]
+            f.write(header)
+            f.write(',\n'.join('(' + ', '.join(sql_literal(row[c]) for c in columns) + ')' for row in chunk))
+            f.write(';\n\n')
+            count += 1
+    return count
+
+def iter_copy_rows(source):
+    """读取 write_copy 生成的文件，逐行产出字典（用于往返校验）"""
+    header = re.compile(r'COPY\s+\S+\s*\(([^)]*)\)\s+FROM\s+stdin;', re.IGNORECASE)
+    columns = None
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if columns is None:
+                m = header.match(line)
+                if m:
+                    columns = [_unquote_identifier(c) for c in m.group(1).split(',')]
+                continue
+            if line == '\\.':
+                columns = None
+                continue
+            yield dict(zip(columns, (copy_unescape(v) for v in line.split('\t'))))
+
+def verify_round_trip(output_file, output_format, rows):
+    """把导出文件重新解析，逐行与原始数据比对；返回不一致的行数"""
+    if output_format == 'copy':
+        expected = [{k: copy_text(v) for k, v in row.items()} for row in rows]
+        actual = list(iter_copy_rows(output_file))
+    else:
+        expected = rows
+        actual = [r for stmt in iter_insert_statements(output_file) for r in iter_insert_rows(stmt)]
+    # 导出按列集合分组，比对时按相同规则排序
+    expected = [row for _, group in group_by_columns(expected) for row in group]
+    if len(actual) != len(expected):
+        return abs(len(actual) - len(expected)) + sum(1 for a, b in zip(actual, expected) if a != b)
+    return sum(1 for a, b in zip(actual, expected) if a != b)
+
+_session = None
+
+def get_session():
+    """惰性创建共享的 requests 会话（keep-alive 连接复用）"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
 
 def insert_via_sql(sql_statement):
     """通过SQL直接插入"""
-    import requests
-    
     # 使用Supabase的SQL执行端点（如果存在）
     url = f"{SUPABASE_URL}/rest/v1/rpc/execute_sql"
     headers = {
@@ -114,7 +341,7 @@ def insert_via_sql(sql_statement):
     data = {'query': sql_statement}
     
     try:
-        response = requests.post(url, headers=headers, json=data, timeout=30)
+        response = get_session().post(url, headers=headers, json=data, timeout=30)
         if response.status_code in [200, 201, 204]:
             return True, None
         else:
@@ -123,12 +350,21 @@ def insert_via_sql(sql_statement):
         return False, str(e)
 
 def main():
+    parser = argparse.ArgumentParser(description='生成可在 SQL Editor / psql 中执行的文章导入文件')
+    parser.add_argument('--file', default='insert-phone-repair-articles.sql', help='SQL文件路径')
+    parser.add_argument('--output', default=None, help='输出文件（默认按格式命名）')
+    parser.add_argument('--format', choices=('insert', 'copy', 'chunked'), default='insert',
+                        help='insert: 原样合并语句; copy: COPY FROM stdin; chunked: 多行INSERT')
+    parser.add_argument('--rows-per-statement', type=int, default=500, help='chunked 模式每条语句的行数')
+    parser.add_argument('--verify', action='store_true', help='导出后重新解析文件，与原始数据逐行比对')
+    args = parser.parse_args()
+    
     print('=' * 70)
     print('批量插入100篇手机维修英文文章')
     print('=' * 70)
     print()
     
-    sql_file = 'insert-phone-repair-articles.sql'
+    sql_file = args.file
     
     if not os.path.exists(sql_file):
         print(f'❌ 错误: 找不到文件 {sql_file}')
@@ -142,21 +378,73 @@ def main():
     print('注意: 由于RLS策略限制，需要使用管理员权限执行')
     print('建议: 在Supabase Dashboard的SQL Editor中执行这些语句\n')
     
-    # 将所有语句合并成一个文件，方便在Dashboard中执行
-    output_file = 'articles_insert_for_dashboard.sql'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write('-- 批量插入100篇手机维修英文文章\n')
-        f.write('-- 请在Supabase Dashboard的SQL Editor中执行此文件\n')
-        f.write('-- 生成时间: ' + time.strftime('%Y-%m-%d %H:%M:%S') + '\n\n')
+    default_outputs = {
+        'insert': 'articles_insert_for_dashboard.sql',
+        'copy': 'articles_copy.sql',
+        'chunked': 'articles_insert_chunked.sql',
+    }
+    output_file = args.output or default_outputs[args.format]
+    
+    if args.format == 'insert':
+        # 将所有语句合并成一个文件，方便在Dashboard中执行
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('-- 批量插入100篇手机维修英文文章\n')
+            f.write('-- 请在Supabase Dashboard的SQL Editor中执行此文件\n')
+            f.write('-- 生成时间: ' + time.strftime('%Y-%m-%d %H:%M:%S') + '\n\n')
+            
+            for i, stmt in enumerate(statements, 1):
+                f.write(f'-- 文章 {i}\n')
+                f.write(stmt)
+                f.write('\n\n')
+        
+        print(f'✅ 已生成SQL文件: {output_file}')
+        print(f'📝 文件包含 {len(statements)} 条INSERT语句')
+    else:
+        rows = []
+        for stmt in statements:
+            try:
+                rows.extend(iter_insert_rows(stmt))
+            except ValueError as e:
+                print(f'❌ 跳过无法解析的语句: {e}')
+        
+        if args.format == 'copy':
+            # COPY 无法执行表达式，now() 统一换成生成时刻
+            now_value = time.strftime('%Y-%m-%d %H:%M:%S%z')
+            materialized = []
+            for row in rows:
+                row, unsupported = materialize_row(row, now_value)
+                if unsupported:
+                    print(f'❌ 跳过 {row.get("slug")}: COPY 不支持表达式 {", ".join(unsupported)}')
+                    continue
+                materialized.append(row)
+            rows = materialized
+        
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            f.write('-- 批量导入手机维修英文文章\n')
+            f.write('-- 生成时间: ' + time.strftime('%Y-%m-%d %H:%M:%S') + '\n\n')
+            if args.format == 'copy':
+                blocks = write_copy(f, 'articles', rows)
+                summary = f'{blocks} 个 COPY 数据块'
+            else:
+                blocks = write_chunked_inserts(f, 'articles', rows, max(1, args.rows_per_statement))
+                summary = f'{blocks} 条多行INSERT语句'
+        
+        print(f'✅ 已生成SQL文件: {output_file}')
+        print(f'📝 文件包含 {len(rows)} 行，{summary}')
         
-        for i, stmt in enumerate(statements, 1):
-            f.write(f'-- 文章 {i}\n')
-            f.write(stmt)
-            f.write('\n\n')
+        if args.verify:
+            mismatches = verify_round_trip(output_file, args.format, rows)
+            if mismatches:
+                print(f'❌ 往返校验失败: {mismatches} 行不一致')
+                sys.exit(1)
+            print('✅ 往返校验通过')
     
-    print(f'✅ 已生成SQL文件: {output_file}')
-    print(f'📝 文件包含 {len(statements)} 条INSERT语句')
     print()
+    if args.format == 'copy':
+        print('COPY FROM stdin 需要通过 psql 执行（SQL Editor 不支持）:')
+        print(f'   psql <your-database-url> -f {output_file}')
+        print()
+        return
     print('执行步骤:')
     print('1. 登录 Supabase Dashboard')
     print('2. 进入 SQL Editor')
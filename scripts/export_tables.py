@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+并发、键集分页的数据导出
+
+迁移 00096 的导出函数只生成 DDL；数据导出原本靠 offset 分页读取，offset 越大越慢。
+本脚本通过 PostgREST 并发导出多张表：
+  - 每张表按 (created_at, id) 键集分页（可为每张表指定其他键列），每页查询代价与位置无关
+  - 每个工作线程持有自己的 keep-alive 会话（连接池）
+  - 行直接流式写入 gzip / zstd / 不压缩的 NDJSON 或 CSV，内存只与页大小有关
+  - 每写满 --part-rows 行切一个分片文件，并把行数、SHA-256 与游标写进 manifest.json
+
+断点续传：manifest 中每张表记录已完成的分片与游标。再次运行时已完成的表直接跳过，
+未完成的表删除没有记入清单的残缺分片，从最后一个完成分片的游标继续。
+
+注意：键列为 NULL 的行不会被键集分页读到（created_at 为空的行需改用 id 作为键）。
+
+用法:
+  python scripts/export_tables.py --url $VITE_SUPABASE_URL --out export \
+      --table articles --table products --table page_views --table redirects:id \
+      --format ndjson --compression gzip --jobs 4
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+DEFAULT_KEY = ('created_at', 'id')
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_PART_ROWS = 100000
+DEFAULT_JOBS = 4
+EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+_local = threading.local()
+
+def get_session(pool_size):
+    """每个线程一个会话，复用 keep-alive 连接"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = _local.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+    return session
+
+def parse_table_spec(spec):
+    """articles 或 redirects:id 或 t:col1,col2"""
+    name, _, columns = spec.partition(':')
+    key = tuple(c.strip() for c in columns.split(',') if c.strip()) if columns else DEFAULT_KEY
+    return name.strip(), key
+
+# ---------------------------------------------------------------- 写入
+
+class HashingFile:
+    """写文件的同时计算 SHA-256 与字节数"""
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def open_compressed(raw, compression):
+    """在 raw 之上套一层压缩流，返回二进制可写对象"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', mtime=0)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise SystemExit('❌ --compression zstd 需要安装 zstandard')
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return raw
+
+class PartWriter:
+    """一个分片文件：NDJSON 或 CSV，流式压缩"""
+
+    def __init__(self, path, output_format, compression):
+        self.path = path
+        self.raw = HashingFile(path)
+        self.stream = open_compressed(self.raw, compression)
+        self.format = output_format
+        self.columns = None
+        self.rows = 0
+
+    def write_rows(self, rows):
+        if self.format == 'ndjson':
+            text = ''.join(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n' for row in rows)
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if self.columns is None:
+                self.columns = list(rows[0].keys())
+                writer.writerow(self.columns)
+            writer.writerows([_csv_value(row.get(c)) for c in self.columns] for row in rows)
+            text = buffer.getvalue()
+        self.stream.write(text.encode('utf-8'))
+        self.rows += len(rows)
+
+    def close(self):
+        if self.stream is not self.raw:
+            self.stream.close()
+        self.raw.close()
+        return {'file': os.path.basename(self.path), 'rows': self.rows,
+                'bytes': self.raw.size, 'sha256': self.raw.sha256.hexdigest()}
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+# ---------------------------------------------------------------- 读取
+
+def fetch_page(session, base_url, headers, table, key, cursor, limit):
+    """读取游标之后的一页（按键列升序）
+
+    键集条件 (k1, k2) > (c1, c2) 拆成两次查询：先取 k1 = c1 且 k2 > c2，不足一页再取 k1 > c1。
+    """
+    url = f'{base_url}/rest/v1/{table}'
+    order = ','.join(f'{column}.asc' for column in key)
+    if cursor is None:
+        return _get(session, url, headers, {'select': '*', 'order': order, 'limit': limit})
+    rows = []
+    # 依次放宽：最后一列 >，前面各列 =；然后倒数第二列 >……
+    for depth in range(len(key) - 1, -1, -1):
+        params = {'select': '*', 'order': order, 'limit': limit - len(rows)}
+        for column, value in zip(key[:depth], cursor[:depth]):
+            params[column] = f'eq.{value}'
+        params[key[depth]] = f'gt.{cursor[depth]}'
+        rows += _get(session, url, headers, params)
+        if len(rows) >= limit:
+            break
+    return rows
+
+def _get(session, url, headers, params):
+    for attempt in range(4):
+        try:
+            response = session.get(url, headers=headers, params=params, timeout=120)
+        except requests.RequestException as e:
+            error = str(e)
+        else:
+            if response.status_code == 200:
+                return response.json()
+            error = f'HTTP {response.status_code}: {response.text[:200]}'
+            if response.status_code not in (429, 500, 502, 503, 504):
+                break
+        time.sleep(0.5 * (2 ** attempt))
+    raise RuntimeError(f'读取 {url} 失败: {error}')
+
+# ---------------------------------------------------------------- 清单
+
+class Manifest:
+    """manifest.json：每张表的分片、行数、校验和与游标（线程安全，原子写入）"""
+
+    def __init__(self, out_dir, settings):
+        self.path = os.path.join(out_dir, MANIFEST_FILE)
+        self.lock = threading.Lock()
+        self.data = {'version': MANIFEST_VERSION, 'settings': settings, 'tables': {}}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            if existing.get('version') == MANIFEST_VERSION and existing.get('settings') == settings:
+                self.data = existing
+
+    def table(self, name, key):
+        with self.lock:
+            entry = self.data['tables'].get(name)
+            if entry is None or entry.get('key') != list(key):
+                entry = self.data['tables'][name] = {
+                    'key': list(key), 'status': 'pending', 'rows': 0, 'cursor': None, 'parts': []}
+            return json.loads(json.dumps(entry))
+
+    def update(self, name, entry):
+        with self.lock:
+            self.data['tables'][name] = entry
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+def part_name(table, index, output_format, compression):
+    return f'{table}.part-{index:04d}.{output_format}{EXTENSIONS[compression]}'
+
+def export_table(name, key, manifest, args, headers):
+    """导出一张表，返回 (表名, 本次写出的行数, 总行数)"""
+    entry = manifest.table(name, key)
+    if entry['status'] == 'done':
+        return name, 0, entry['rows']
+    table_dir = args.out
+    recorded = {part['file'] for part in entry['parts']}
+    prefix = f'{name}.part-'
+    for filename in os.listdir(table_dir):
+        if filename.startswith(prefix) and filename not in recorded:
+            # 上次中断时未完成的分片
+            os.remove(os.path.join(table_dir, filename))
+
+    session = get_session(args.jobs)
+    cursor = entry['cursor']
+    written = 0
+    writer = None
+    while True:
+        rows = fetch_page(session, args.url, headers, name, key, cursor, args.page_size)
+        if rows:
+            if writer is None:
+                writer = PartWriter(os.path.join(table_dir, part_name(name, len(entry['parts']) + 1,
+                                                                      args.format, args.compression)),
+                                    args.format, args.compression)
+            writer.write_rows(rows)
+            written += len(rows)
+            cursor = [rows[-1].get(column) for column in key]
+        finished = len(rows) < args.page_size
+        if writer is not None and (writer.rows >= args.part_rows or finished):
+            entry['parts'].append(writer.close())
+            entry['rows'] += writer.rows
+            entry['cursor'] = cursor
+            entry['status'] = 'partial'
+            writer = None
+            manifest.update(name, entry)
+        if finished:
+            break
+    entry['status'] = 'done'
+    entry['completed_at'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    manifest.update(name, entry)
+    return name, written, entry['rows']
+
+def verify(out_dir):
+    """按清单校验每个分片的 SHA-256，返回不一致的文件列表"""
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    bad = []
+    for entry in manifest['tables'].values():
+        for part in entry['parts']:
+            digest = hashlib.sha256()
+            path = os.path.join(out_dir, part['file'])
+            try:
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            except OSError:
+                bad.append(part['file'])
+                continue
+            if digest.hexdigest() != part['sha256']:
+                bad.append(part['file'])
+    return bad
+
+def export_all(args, tables):
+    """并发导出 tables（[(表名, 键列)]），返回 [(表名, 本次行数, 总行数)]"""
+    os.makedirs(args.out, exist_ok=True)
+    settings = {'format': args.format, 'compression': args.compression}
+    manifest = Manifest(args.out, settings)
+    anon_key = os.getenv('VITE_SUPABASE_ANON_KEY') or ''
+    headers = {'apikey': anon_key, 'Authorization': f'Bearer {anon_key}'}
+    results = []
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(export_table, name, key_columns, manifest, args, headers): name
+                   for name, key_columns in tables}
+        for future in as_completed(futures):
+            results.append(future.result())
+            name, written, total = results[-1]
+            print(f'  ✅ {name:<24} 本次 {written:>9} 行，共 {total:>9} 行')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='并发、键集分页的数据导出')
+    parser.add_argument('--url', default=os.getenv('VITE_SUPABASE_URL'), help='Supabase/PostgREST 地址')
+    parser.add_argument('--table', action='append', default=[],
+                        help='要导出的表，可重复；默认按 created_at,id 分页，可写成 表名:键列1,键列2')
+    parser.add_argument('--out', default='export', help='输出目录')
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson')
+    parser.add_argument('--compression', choices=tuple(EXTENSIONS), default='gzip')
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='同时导出的表数')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='每次请求的行数')
+    parser.add_argument('--part-rows', type=int, default=DEFAULT_PART_ROWS, help='每个分片文件的行数上限')
+    parser.add_argument('--verify', action='store_true', help='只按 manifest 校验已导出的文件')
+    args = parser.parse_args()
+
+    if args.verify:
+        bad = verify(args.out)
+        print('✅ 所有分片校验通过' if not bad else f'❌ 校验失败: {", ".join(bad)}')
+        raise SystemExit(1 if bad else 0)
+    if not args.url or not args.table:
+        parser.error('需要 --url 和至少一个 --table')
+    args.jobs = max(1, args.jobs)
+    args.page_size = max(1, args.page_size)
+    args.part_rows = max(1, args.part_rows)
+
+    started = time.time()
+    results = export_all(args, [parse_table_spec(spec) for spec in args.table])
+    written = sum(r[1] for r in results)
+    elapsed = time.time() - started
+    print(f'⏱️ 耗时 {elapsed:.1f}s，本次导出 {written} 行'
+          + (f'，{written / elapsed:.0f} 行/秒' if elapsed > 0 else ''))
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import os
-import re
 import time
 from supabase import create_client, Client
 
+from sql_stream import iter_insert_statements
+
 # 加载环境变量
 from dotenv import load_dotenv
 load_dotenv()
@@ -13,15 +14,8 @@ supabase_key = os.getenv('VITE_SUPABASE_ANON_KEY')
 supabase: Client = create_client(supabase_url, supabase_key)
 
 def read_sql_file(filename):
-    """读取SQL文件并提取INSERT语句"""
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 使用正则表达式提取所有INSERT语句
-    pattern = r"INSERT INTO articles.*?;(?=\s*(?:INSERT INTO|$))"
-    statements = re.findall(pattern, content, re.DOTALL)
-    
-    return statements
+    """读取SQL文件并提取INSERT语句（流式切分，正确处理字符串中的分号）"""
+    return list(iter_insert_statements(filename))
 
 def execute_sql_statement(sql):
     """执行单条SQL语句"""
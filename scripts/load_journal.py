@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+文章加载的检查点日志
+
+每提交成功一批，就向日志末尾追加一行 JSON，记录这批行的 (语句哈希, slug)。
+写入后立即 fsync，进程中途退出时最多丢失最后一行（读取时丢弃并截掉不完整的行）。
+再次运行时：
+  - 日志中已有的行直接跳过
+  - 其余行的 slug 用 slug=in.(...) 批量查询，数据库中已存在的也跳过
+  - 剩下的行按 on_conflict=slug upsert，上次中断时"已写入但未记日志"的那一批也能安全重发
+"""
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_JOURNAL = '.insert_journal.jsonl'
+# 每次 in.(...) 查询的 slug 数，控制 URL 长度
+DEFAULT_LOOKUP_SIZE = 200
+
+def statement_hash(sql):
+    """INSERT 语句的内容哈希（同一语句中的多行共用）"""
+    return hashlib.sha256(sql.encode('utf-8')).hexdigest()[:16]
+
+class CheckpointJournal:
+    """只追加的检查点日志，按 (语句哈希, slug) 记录已提交的行"""
+
+    def __init__(self, path):
+        self.path = path
+        self.committed = set()
+        self.batches = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 上次运行在写这一行时退出：丢弃半行
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self.committed.update(tuple(key) for key in record.get('rows', []))
+                self.batches += 1
+        if complete < os.path.getsize(self.path):
+            # 截掉半行，之后追加的记录才能从新的一行开始
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+
+    def __contains__(self, key):
+        return key in self.committed
+
+    def record(self, keys):
+        """记录一批已提交的行并落盘"""
+        keys = [tuple(key) for key in keys]
+        if not keys:
+            return
+        self.batches += 1
+        line = json.dumps({'batch': self.batches, 'committed_at': time.time(), 'rows': keys},
+                          ensure_ascii=False)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.committed.update(keys)
+
+def quote_in_value(value):
+    """按 PostgREST 规则给 in.(...) 中的值加引号"""
+    text = str(value)
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def lookup_existing(session, base_url, table, column, values, headers, chunk_size=DEFAULT_LOOKUP_SIZE):
+    """分批查询 values 中已存在于 table.column 的值，返回集合"""
+    url = f'{base_url}/rest/v1/{table}'
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    existing = set()
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        params = {
+            'select': column,
+            column: 'in.(' + ','.join(quote_in_value(v) for v in chunk) + ')',
+        }
+        response = session.get(url, headers=headers, params=params, timeout=60)
+        if response.status_code != 200:
+            raise RuntimeError(f'查询已存在的 {column} 失败: HTTP {response.status_code}: {response.text}')
+        existing.update(row.get(column) for row in response.json())
+    return existing
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+页面访问批量采集服务
+
+浏览器把访问事件发到本服务，而不是每次访问都调用 record_page_view：
+  POST /events    JSON 对象或数组。访问事件需要 visitor_id、session_id、page_url，
+                  返回 202 与服务生成的访问 id；
+                  停留时长事件为 {view_id, session_id, duration}
+  GET  /metrics   队列深度、刷新延迟 p50/p95/max、累计写入数等
+
+事件先缓冲在内存里，满 --flush-size 条或距上次刷新超过 --flush-interval 秒时刷新一次。
+每次刷新只调用一次 ingest_page_view_batch（迁移 00104，00107 重新定义），在一个事务中多行插入 page_views、
+按会话合并后的计数器每个会话 upsert 一行 visitor_sessions，并补写停留时长。
+
+背压：缓冲区达到 --max-pending 条时，新请求最多等待 --accept-timeout 秒，
+仍没有空间就返回 503 与 Retry-After。刷新遇到网络错误、超时或 5xx 时事件留在缓冲区中，
+退避后重试；4xx（批次本身被拒绝，重试也不会成功）则丢弃该批次并计入 /metrics，
+指定 --dead-letter 时把被拒绝的批次追加写入该 NDJSON 文件。
+停止服务时等待正在进行的刷新完成，再把剩余事件刷新一次。
+
+停留时长事件是该访问的最新停留时长（覆盖而不是累加）。访问还在缓冲区时直接改写；
+否则按 view_id 只保留最后一个值，由数据库函数把与已存储时长的差额计入会话，
+重复上报或整批重试不会重复累加，view_id 不存在时忽略。
+
+用法:
+  SUPABASE_SERVICE_ROLE_KEY=... python scripts/pageview_ingest.py --port 8787 --url $VITE_SUPABASE_URL
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+import aiohttp
+from aiohttp import web
+
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_MAX_PENDING = 20000
+DEFAULT_ACCEPT_TIMEOUT = 1.0
+MAX_RETRY_DELAY = 30.0
+# 单次访问停留时长上限（秒），超过的按上限记录，避免累加溢出 integer 列
+MAX_DURATION = 24 * 3600
+LATENCY_WINDOW = 1000
+
+VIEW_COLUMNS = ('visitor_id', 'session_id', 'page_url', 'page_title', 'referrer', 'user_agent',
+                'device_type', 'browser', 'os', 'ip_address', 'country', 'region', 'city', 'duration')
+REQUIRED_COLUMNS = ('visitor_id', 'session_id', 'page_url')
+
+class EventError(ValueError):
+    """事件格式不正确"""
+
+class BatchRejected(Exception):
+    """批次被服务端以 4xx 拒绝，重试不会成功"""
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _duration(value):
+    try:
+        return min(MAX_DURATION, max(0, int(value or 0)))
+    except (TypeError, ValueError, OverflowError):
+        raise EventError(f'duration 不是整数: {value!r}')
+
+def _view_id(value):
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise EventError(f'view_id 不是 UUID: {value!r}')
+
+def normalize_view(event, request_headers=None, remote=None):
+    """校验访问事件，只保留 page_views 的列，补上 id、created_at 以及请求头中的 UA/IP"""
+    missing = [c for c in REQUIRED_COLUMNS if not event.get(c)]
+    if missing:
+        raise EventError(f'缺少字段: {", ".join(missing)}')
+    view = {c: event[c] for c in VIEW_COLUMNS if event.get(c) is not None}
+    view['duration'] = _duration(view.get('duration'))
+    if request_headers is not None:
+        view.setdefault('user_agent', request_headers.get('User-Agent'))
+        forwarded = request_headers.get('X-Forwarded-For')
+        view.setdefault('ip_address', forwarded.split(',')[0].strip() if forwarded else remote)
+    view['id'] = str(uuid.uuid4())
+    view['created_at'] = _now()
+    return view
+
+def normalize_duration(event):
+    """校验停留时长事件：view_id 必须是 UUID，时长截断到 [0, MAX_DURATION]"""
+    if not event.get('session_id'):
+        raise EventError('时长事件缺少 session_id')
+    return {'view_id': _view_id(event['view_id']), 'session_id': event['session_id'],
+            'visitor_id': event.get('visitor_id'),
+            'duration': _duration(event.get('duration')), 'received_at': _now()}
+
+def merge_sessions(views):
+    """把一次刷新中的新访问按会话合并成每个会话一行的计数器增量
+
+    之前刷新过的访问的时长更新不在这里合并，由数据库函数按差额计入会话。
+    """
+    sessions = {}
+    for view in views:
+        s = sessions.get(view['session_id'])
+        if s is None:
+            sessions[view['session_id']] = {
+                'session_id': view['session_id'],
+                'visitor_id': view['visitor_id'],
+                'first_visit': view['created_at'],
+                'last_visit': view['created_at'],
+                'page_views_count': 1,
+                'total_duration': view['duration'],
+            }
+            continue
+        s['first_visit'] = min(s['first_visit'], view['created_at'])
+        s['last_visit'] = max(s['last_visit'], view['created_at'])
+        s['page_views_count'] += 1
+        s['total_duration'] += view['duration']
+    return list(sessions.values())
+
+class IngestMetrics:
+    """队列与刷新统计"""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = 0
+        self.invalid = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.batches_rejected = 0
+        self.events_dropped = 0
+        self.views_written = 0
+        self.sessions_written = 0
+        self.latencies = []
+        self.last_error = None
+        self.started = time.monotonic()
+
+    def record_flush(self, seconds):
+        self.latencies.append(seconds)
+        if len(self.latencies) > LATENCY_WINDOW:
+            del self.latencies[:len(self.latencies) - LATENCY_WINDOW]
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def snapshot(self, buffer):
+        return {
+            'queue_depth': buffer.depth(),
+            'max_pending': buffer.max_pending,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'invalid': self.invalid,
+            'flushes': self.flushes,
+            'flush_failures': self.flush_failures,
+            'batches_rejected': self.batches_rejected,
+            'events_dropped': self.events_dropped,
+            'views_written': self.views_written,
+            'sessions_written': self.sessions_written,
+            'flush_latency_ms': {
+                'p50': round(self.percentile(50) * 1000, 1),
+                'p95': round(self.percentile(95) * 1000, 1),
+                'max': round(max(self.latencies, default=0.0) * 1000, 1),
+            },
+            'last_error': self.last_error,
+            'uptime_s': round(time.monotonic() - self.started, 1),
+        }
+
+class RpcWriter:
+    """通过 PostgREST 调用 ingest_page_view_batch"""
+
+    def __init__(self, session, base_url, key):
+        self.session = session
+        self.url = f'{base_url}/rest/v1/rpc/ingest_page_view_batch'
+        self.headers = {
+            'apikey': key or '',
+            'Authorization': f'Bearer {key or ""}',
+            'Content-Type': 'application/json',
+        }
+
+    async def write(self, views, durations, sessions):
+        payload = {
+            'p_views': views,
+            'p_durations': [{'id': d['view_id'], 'duration': d['duration']} for d in durations],
+            'p_sessions': sessions,
+        }
+        async with self.session.post(self.url, headers=self.headers, json=payload) as response:
+            if response.status in (200, 201, 204):
+                return
+            text = (await response.text())[:200]
+            # 408/429 是暂时性的，与 5xx 一样重试
+            if 400 <= response.status < 500 and response.status not in (408, 429):
+                raise BatchRejected(f'HTTP {response.status}: {text}')
+            raise RuntimeError(f'HTTP {response.status}: {text}')
+
+class IngestBuffer:
+    """内存缓冲：按条数/时间阈值刷新，满了就让调用方等待"""
+
+    def __init__(self, writer, flush_size=DEFAULT_FLUSH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_pending=DEFAULT_MAX_PENDING, dead_letter=None):
+        self.writer = writer
+        self.dead_letter = dead_letter
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.views = []
+        self.buffered_views = {}
+        # view_id -> 最新的时长更新（同一访问只保留最后一个值）
+        self.durations = {}
+        self.metrics = IngestMetrics()
+        self._wake = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._closing = False
+
+    def depth(self):
+        return len(self.views) + len(self.durations)
+
+    async def put(self, views, durations, timeout):
+        """放入事件；缓冲区满时最多等待 timeout 秒，仍无空间返回 False"""
+        needed = len(views) + len(durations)
+        async with self._space:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self.depth() + needed <= self.max_pending
+                                         or (self.depth() == 0 and needed > self.max_pending)),
+                    timeout)
+            except asyncio.TimeoutError:
+                self.metrics.rejected += needed
+                return False
+        for view in views:
+            self.views.append(view)
+            self.buffered_views[view['id']] = view
+        for update in durations:
+            view = self.buffered_views.get(update['view_id'])
+            if view is not None:
+                # 访问还在缓冲区里，直接改写，不产生额外的 UPDATE
+                view['duration'] = update['duration']
+            else:
+                self.durations.pop(update['view_id'], None)
+                self.durations[update['view_id']] = update
+        self.metrics.accepted += needed
+        if self.depth() >= self.flush_size:
+            self._wake.set()
+        return True
+
+    async def run(self):
+        """后台刷新循环"""
+        delay = 0.0
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval + delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            delay = 0.0 if await self.flush() else min(MAX_RETRY_DELAY, max(1.0, delay * 2))
+
+    async def flush(self):
+        """写出当前缓冲的全部事件，返回是否成功（被拒绝而丢弃的批次也算完成）"""
+        if not self.depth():
+            return True
+        views, durations = self.views, list(self.durations.values())
+        self.views, self.durations, self.buffered_views = [], {}, {}
+        sessions = merge_sessions(views)
+        started = time.monotonic()
+        try:
+            await self.writer.write(views, durations, sessions)
+        except BatchRejected as e:
+            self.metrics.batches_rejected += 1
+            self.metrics.events_dropped += len(views) + len(durations)
+            self.metrics.last_error = str(e)
+            self._write_dead_letter(views, durations, str(e))
+        except (aiohttp.ClientError, asyncio.TimeoutError, RuntimeError) as e:
+            self._requeue(views, durations)
+            self.metrics.flush_failures += 1
+            self.metrics.last_error = str(e)
+            return False
+        except asyncio.CancelledError:
+            self._requeue(views, durations)
+            raise
+        else:
+            self.metrics.flushes += 1
+            self.metrics.views_written += len(views)
+            self.metrics.sessions_written += len(sessions)
+        finally:
+            self.metrics.record_flush(time.monotonic() - started)
+        async with self._space:
+            self._space.notify_all()
+        return True
+
+    def _requeue(self, views, durations):
+        """放回缓冲区前部，保持顺序；期间到达的时长更新比放回的更新更新，优先保留"""
+        self.views = views + self.views
+        newer = self.durations
+        self.durations = {d['view_id']: d for d in durations if d['view_id'] not in newer}
+        self.durations.update(newer)
+        self.buffered_views = {v['id']: v for v in self.views}
+
+    def _write_dead_letter(self, views, durations, error):
+        if not self.dead_letter:
+            return
+        record = {'rejected_at': _now(), 'error': error, 'views': views, 'durations': durations}
+        with open(self.dead_letter, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def stop(self):
+        """让刷新循环在当前这次刷新结束后退出"""
+        self._closing = True
+        self._wake.set()
+
+    async def close(self):
+        self.stop()
+        await self.flush()
+
+def parse_events(body, request):
+    """把请求体拆成 (访问列表, 时长更新列表)"""
+    events = body if isinstance(body, list) else [body]
+    views = []
+    durations = []
+    for event in events:
+        if not isinstance(event, dict):
+            raise EventError('事件必须是 JSON 对象')
+        if event.get('view_id'):
+            durations.append(normalize_duration(event))
+        else:
+            views.append(normalize_view(event, request.headers, request.remote))
+    return views, durations
+
+def make_app(buffer, accept_timeout=DEFAULT_ACCEPT_TIMEOUT):
+    async def post_events(request):
+        try:
+            body = await request.json()
+            views, durations = parse_events(body, request)
+        except (ValueError, EventError) as e:
+            buffer.metrics.invalid += 1
+            return web.json_response({'message': str(e)}, status=400)
+        if not await buffer.put(views, durations, accept_timeout):
+            retry_after = max(1, round(buffer.flush_interval))
+            return web.json_response({'message': 'ingest buffer full'}, status=503,
+                                     headers={'Retry-After': str(retry_after)})
+        return web.json_response({'ids': [v['id'] for v in views]}, status=202)
+
+    async def get_metrics(request):
+        return web.json_response(buffer.metrics.snapshot(buffer))
+
+    app = web.Application()
+    app.router.add_post('/events', post_events)
+    app.router.add_get('/metrics', get_metrics)
+    return app
+
+async def serve(args):
+    timeout = aiohttp.ClientTimeout(total=30)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        writer = RpcWriter(session, args.url, os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
+        buffer = IngestBuffer(writer, max(1, args.flush_size), args.flush_interval, max(1, args.max_pending),
+                              args.dead_letter)
+        runner = web.AppRunner(make_app(buffer, args.accept_timeout))
+        await runner.setup()
+        await web.TCPSite(runner, args.host, args.port).start()
+        print(f'页面访问采集服务已启动: http://{args.host}:{args.port}/events')
+        flusher = asyncio.create_task(buffer.run())
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+            # 不取消刷新任务：等它写完手上的批次，再把剩余事件刷新一次
+            buffer.stop()
+            await flusher
+            await buffer.close()
+            print(f'已写入 {buffer.metrics.views_written} 条访问，剩余 {buffer.depth()} 条未写入')
+
+def main():
+    parser = argparse.ArgumentParser(description='页面访问批量采集服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    parser.add_argument('--url', default=os.getenv('VITE_SUPABASE_URL'), help='Supabase/PostgREST 地址')
+    parser.add_argument('--flush-size', type=int, default=DEFAULT_FLUSH_SIZE, help='缓冲满多少条就刷新')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL, help='最长刷新间隔（秒）')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING, help='缓冲区上限，超过后开始背压')
+    parser.add_argument('--accept-timeout', type=float, default=DEFAULT_ACCEPT_TIMEOUT,
+                        help='缓冲区满时请求最多等待的秒数，超时返回 503')
+    parser.add_argument('--dead-letter', help='被服务端拒绝（4xx）的批次追加写入的 NDJSON 文件')
+    args = parser.parse_args()
+    if not args.url:
+        parser.error('需要 --url 或环境变量 VITE_SUPABASE_URL')
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+本地 PostgREST 替身服务，用于在不连接 Supabase 的情况下调试批量写入脚本
+
+只实现脚本用到的一小部分接口：
+  POST /rest/v1/<table>        插入 JSON 对象或数组（整批原子写入）；
+                               Prefer: resolution=merge-duplicates / ignore-duplicates
+                               配合 on_conflict=col1,col2 时按冲突列 upsert
+  POST /rest/v1/rpc/<name>     调用 RPC_FUNCTIONS 中用 Python 实现的函数
+  GET  /rest/v1/<table>        支持 select=、col=eq.x、col=in.(a,b)、gt/gte/lt/lte 过滤，
+                               以及 order=col.asc|desc、limit=、offset=
+
+用法:
+  python scripts/postgrest_stub.py --port 54321 [--fail-rate 0.1] [--unique slug]
+  VITE_SUPABASE_URL=http://127.0.0.1:54321 python scripts/batch_insert_articles.py --bulk
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# 新插入的行缺少这些列时按数据库的默认值补上
+TABLE_DEFAULTS = {
+    'translation_cache': {'hit_count': 1},
+}
+
+class StubStore:
+    """内存中的表数据，按表名保存行列表"""
+
+    def __init__(self, unique_columns=('slug',), fail_rate=0.0, seed=None):
+        self.tables = {}
+        self.defaults = TABLE_DEFAULTS
+        self.unique_columns = tuple(unique_columns)
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    def should_fail(self):
+        """按 fail_rate 随机注入 503，用于验证重试逻辑"""
+        with self.lock:
+            self.request_count += 1
+            return self.fail_rate > 0 and self.random.random() < self.fail_rate
+
+    def insert(self, table, rows):
+        """整批插入；违反唯一约束时整批回滚，返回 (status, body)"""
+        with self.lock:
+            existing = self.tables.setdefault(table, [])
+            for column in self.unique_columns:
+                seen = {row.get(column) for row in existing if column in row}
+                for row in rows:
+                    value = row.get(column)
+                    if value is None:
+                        continue
+                    if value in seen:
+                        return 409, {
+                            'code': '23505',
+                            'message': f'duplicate key value violates unique constraint "{table}_{column}_key"',
+                            'details': f'Key ({column})=({value}) already exists.',
+                        }
+                    seen.add(value)
+            existing.extend(self._with_defaults(table, row) for row in rows)
+            return 201, None
+
+    def _with_defaults(self, table, row):
+        return {**self.defaults.get(table, {}), **row}
+
+    def upsert(self, table, rows, conflict_columns, ignore_duplicates=False):
+        """按冲突列 upsert：已存在的行合并新值（或忽略），其余插入"""
+        with self.lock:
+            existing = self.tables.setdefault(table, [])
+            index = {tuple(row.get(c) for c in conflict_columns): row for row in existing}
+            for row in rows:
+                key = tuple(row.get(c) for c in conflict_columns)
+                current = index.get(key)
+                if current is None:
+                    current = index[key] = self._with_defaults(table, row)
+                    existing.append(current)
+                elif not ignore_duplicates:
+                    current.update(row)
+            return 201, None
+
+    def select(self, table, filters, columns, order=None, limit=None, offset=0):
+        """按 eq / in / gt / gte / lt / lte 过滤，排序、分页并投影列"""
+        with self.lock:
+            rows = list(self.tables.get(table, []))
+        for column, op, value in filters:
+            if op == 'eq':
+                rows = [r for r in rows if str(r.get(column)) == value]
+            elif op == 'in':
+                wanted = set(parse_in_list(value))
+                rows = [r for r in rows if str(r.get(column)) in wanted]
+            elif op in _COMPARISONS:
+                compare = _COMPARISONS[op]
+                rows = [r for r in rows if r.get(column) is not None and compare(str(r.get(column)), value)]
+        for column, descending in reversed(order or []):
+            rows.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=descending)
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        if columns and columns != ['*']:
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        return rows
+
+# 范围过滤按字符串比较（ISO 时间戳、定长编号等场景足够）
+_COMPARISONS = {
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+    'lte': lambda a, b: a <= b,
+}
+
+def parse_order(value):
+    """解析 order=a.desc,b 为 [(列, 是否降序)]"""
+    order = []
+    for part in value.split(','):
+        column, _, direction = part.strip().partition('.')
+        if column:
+            order.append((column, direction.startswith('desc')))
+    return order
+
+def parse_in_list(value):
+    """解析 in.(a,b,"c,d") 形式的值列表"""
+    inner = value[1:-1] if value.startswith('(') and value.endswith(')') else value
+    items = []
+    current = []
+    quoted = False
+    i = 0
+    while i < len(inner):
+        ch = inner[i]
+        if quoted:
+            if ch == '\\' and i + 1 < len(inner):
+                current.append(inner[i + 1])
+                i += 1
+            elif ch == '"':
+                quoted = False
+            else:
+                current.append(ch)
+        elif ch == '"':
+            quoted = True
+        elif ch == ',':
+            items.append(''.join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    if current or inner:
+        items.append(''.join(current))
+    return items
+
+def _increment_translation_cache_hits(store, args):
+    """迁移 00106：按键累加 hit_count，返回更新的行数"""
+    updated = 0
+    with store.lock:
+        index = {(r.get('source_text'), r.get('source_lang'), r.get('target_lang')): r
+                 for r in store.tables.get('translation_cache', [])}
+        for item in args.get('p_rows') or []:
+            row = index.get((item.get('source_text'), item.get('source_lang'), item.get('target_lang')))
+            if row is not None and (item.get('hits') or 0) > 0:
+                row['hit_count'] = (row.get('hit_count') or 0) + item['hits']
+                updated += 1
+    return updated
+
+def _ingest_page_view_batch(store, args):
+    """迁移 00107：插入访问、upsert 会话计数器，时长按与已存储值的差额计入会话"""
+    with store.lock:
+        views = store.tables.setdefault('page_views', [])
+        sessions = store.tables.setdefault('visitor_sessions', [])
+        views.extend(dict(row, duration=row.get('duration') or 0) for row in args.get('p_views') or [])
+        by_session = {row.get('session_id'): row for row in sessions}
+        for row in args.get('p_sessions') or []:
+            current = by_session.get(row['session_id'])
+            if current is None:
+                current = by_session[row['session_id']] = dict(row)
+                sessions.append(current)
+                continue
+            current['first_visit'] = min(current['first_visit'], row['first_visit'])
+            current['last_visit'] = max(current['last_visit'], row['last_visit'])
+            current['page_views_count'] += row['page_views_count']
+            current['total_duration'] += row['total_duration']
+        latest = {item['id']: item['duration'] for item in args.get('p_durations') or []}
+        by_id = {row.get('id'): row for row in views}
+        for view_id, duration in latest.items():
+            view = by_id.get(view_id)
+            if view is None:
+                continue
+            delta = duration - (view.get('duration') or 0)
+            view['duration'] = duration
+            session = by_session.get(view.get('session_id'))
+            if session is not None and delta:
+                session['total_duration'] = max(0, session['total_duration'] + delta)
+    return None
+
+RPC_FUNCTIONS = {
+    'increment_translation_cache_hits': _increment_translation_cache_hits,
+    'ingest_page_view_batch': _ingest_page_view_batch,
+}
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=None):
+            payload = b'' if body is None else json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            if payload:
+                self.wfile.write(payload)
+
+        def _route(self):
+            parts = urlsplit(self.path)
+            prefix = '/rest/v1/'
+            if not parts.path.startswith(prefix):
+                return None, []
+            return parts.path[len(prefix):], parse_qsl(parts.query, keep_blank_values=True)
+
+        def do_POST(self):
+            table, query = self._route()
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length)
+            if not table:
+                self._send(404, {'message': 'not found'})
+                return
+            if store.should_fail():
+                self._send(503, {'message': 'injected failure'})
+                return
+            try:
+                body = json.loads(raw or b'null')
+            except ValueError:
+                self._send(400, {'code': 'PGRST102', 'message': 'Empty or invalid json'})
+                return
+            if table.startswith('rpc/'):
+                function = RPC_FUNCTIONS.get(table[len('rpc/'):])
+                if function is None or not isinstance(body, dict):
+                    self._send(404, {'code': 'PGRST202', 'message': f'function {table[4:]} not found'})
+                    return
+                self._send(200, function(store, body))
+                return
+            rows = body if isinstance(body, list) else [body]
+            if not all(isinstance(r, dict) for r in rows):
+                self._send(400, {'code': 'PGRST102', 'message': 'Expected JSON object or array of objects'})
+                return
+            prefer = self.headers.get('Prefer') or ''
+            conflict = dict(query).get('on_conflict')
+            if 'resolution=' in prefer:
+                columns = conflict.split(',') if conflict else list(store.unique_columns)
+                status, error = store.upsert(table, rows, columns,
+                                             ignore_duplicates='ignore-duplicates' in prefer)
+            else:
+                status, error = store.insert(table, rows)
+            self._send(status, error)
+
+        def do_GET(self):
+            table, query = self._route()
+            if not table:
+                self._send(404, {'message': 'not found'})
+                return
+            columns = ['*']
+            filters = []
+            order = None
+            limit = None
+            offset = 0
+            for key, value in query:
+                if key == 'select':
+                    columns = [c.strip() for c in value.split(',') if c.strip()]
+                elif key == 'order':
+                    order = parse_order(value)
+                elif key == 'limit':
+                    limit = int(value)
+                elif key == 'offset':
+                    offset = int(value)
+                elif '.' in value:
+                    op, _, operand = value.partition('.')
+                    filters.append((key, op, operand))
+            self._send(200, store.select(table, filters, columns, order, limit, offset))
+
+    return Handler
+
+def serve(host='127.0.0.1', port=54321, store=None):
+    """启动替身服务并返回 server 对象（调用方负责 serve_forever / shutdown）"""
+    store = store or StubStore()
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    server.store = store
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='本地 PostgREST 替身服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='随机返回 503 的比例')
+    parser.add_argument('--unique', action='append', default=None, help='唯一约束列，可重复指定（默认 slug）')
+    args = parser.parse_args()
+
+    store = StubStore(unique_columns=args.unique or ('slug',), fail_rate=args.fail_rate)
+    server = serve(args.host, args.port, store)
+    print(f'PostgREST 替身服务已启动: http://{args.host}:{args.port}/rest/v1/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f'共处理 {store.request_count} 个写入请求')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+把 redirects 表编译成静态查找表
+
+读取启用的 redirects 规则，把 A→B→C 这样的链折叠成 A→C，检测并剔除环，
+然后生成以下产物，让每个重定向在边缘一跳完成：
+  nginx-redirects-map.conf  http 级别的 map（放进 /etc/nginx/conf.d/）
+  nginx-redirects.conf      server 级别的 return 片段（放进 /etc/nginx/redirects/，nginx.conf 已 include）
+                            默认输出到 build/redirects 时 Dockerfile 会把这两个文件装进镜像
+  _redirects                Netlify 规则片段（--inject-netlify 可直接写进 public/_redirects 的 SPA 回退规则之前）
+  redirects.json            前端用的紧凑查找表：按 from 排序（JS 字符串顺序），可二分查找
+
+折叠后的状态码：整条链都是永久重定向（301/308）才是永久的；
+任意一跳保留请求方法（307/308）则结果也保留方法。
+目标为外部地址（http:// 或 https://）时链到此为止。
+nginx 转发原请求的查询串：目标本身不带 ? 时用 ? 拼接，带 ? 时用 & 拼接。
+
+用法:
+  python scripts/redirects_compile.py --url $VITE_SUPABASE_URL --out build/redirects --inject-netlify public/_redirects
+  python scripts/redirects_compile.py --json redirects.json --out build/redirects
+"""
+import argparse
+import json
+import os
+import sys
+
+DEFAULT_PAGE_SIZE = 1000
+PERMANENT = {301, 308}
+PRESERVE_METHOD = {307, 308}
+STATUSES = (301, 302, 307, 308)
+NETLIFY_BEGIN = '# BEGIN compiled redirects (scripts/redirects_compile.py)'
+NETLIFY_END = '# END compiled redirects'
+
+# ---------------------------------------------------------------- 数据源
+
+def iter_rest_rules(base_url, key=None, page_size=DEFAULT_PAGE_SIZE):
+    """从 PostgREST 按 id 键集分页读取启用的规则"""
+    import requests
+    session = requests.Session()
+    headers = {'apikey': key or '', 'Authorization': f'Bearer {key or ""}'}
+    last_id = None
+    while True:
+        params = {'select': 'id,from_path,to_path,redirect_type', 'is_active': 'eq.true',
+                  'order': 'id.asc', 'limit': page_size}
+        if last_id is not None:
+            params['id'] = f'gt.{last_id}'
+        response = session.get(f'{base_url}/rest/v1/redirects', headers=headers, params=params, timeout=60)
+        if response.status_code != 200:
+            raise RuntimeError(f'读取 redirects 失败: HTTP {response.status_code}: {response.text}')
+        page = response.json()
+        yield from page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]['id']
+
+def iter_json_rules(path):
+    """读取导出的 JSON 数组或 NDJSON，跳过 is_active 为假的行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        f.seek(0)
+        rows = json.load(f) if first == '[' else (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if row.get('is_active', True):
+                yield row
+
+# ---------------------------------------------------------------- 编译
+
+def is_external(path):
+    return path.startswith(('http://', 'https://', '//'))
+
+def normalize_path(path):
+    path = (path or '').strip()
+    if path and not is_external(path) and not path.startswith('/'):
+        path = '/' + path
+    return path
+
+def combine_status(statuses):
+    permanent = all(s in PERMANENT for s in statuses)
+    preserve = any(s in PRESERVE_METHOD for s in statuses)
+    if permanent:
+        return 308 if preserve else 301
+    return 307 if preserve else 302
+
+class CompileResult:
+    def __init__(self):
+        self.rules = {}
+        self.cycles = []
+        self.dead = []
+        self.duplicates = []
+        self.invalid = []
+        self.max_hops = 0
+
+def compile_rules(rows):
+    """折叠链、检测环，返回 CompileResult（rules 为 {from: (to, status, hops)}）"""
+    result = CompileResult()
+    edges = {}
+    for row in rows:
+        source = normalize_path(row.get('from_path'))
+        target = normalize_path(row.get('to_path'))
+        status = int(row.get('redirect_type') or 301)
+        if not source or not target or status not in STATUSES or is_external(source):
+            result.invalid.append(row)
+            continue
+        if source in edges:
+            result.duplicates.append(source)
+            continue
+        edges[source] = (target, status)
+
+    resolved = {}   # 节点 → (终点, [状态码]) ；None 表示落入环
+    for start in edges:
+        if start in resolved:
+            continue
+        path = []
+        on_path = {}
+        node = start
+        while True:
+            if node in resolved:
+                tail = resolved[node]
+                break
+            if node in on_path:
+                cycle = path[on_path[node]:]
+                result.cycles.append(cycle)
+                tail = None
+                break
+            if node not in edges or is_external(node):
+                tail = (node, [])
+                break
+            on_path[node] = len(path)
+            path.append(node)
+            node = edges[node][0]
+        # 从链尾往回填充每个节点的结果
+        for node in reversed(path):
+            if tail is None:
+                resolved[node] = None
+                continue
+            target, status = edges[node]
+            tail = (tail[0], [status] + tail[1])
+            resolved[node] = tail
+
+    in_cycle = {node for cycle in result.cycles for node in cycle}
+    for source in edges:
+        outcome = resolved[source]
+        if outcome is None:
+            if source not in in_cycle:
+                result.dead.append(source)
+            continue
+        target, statuses = outcome
+        result.rules[source] = (target, combine_status(statuses), len(statuses))
+        result.max_hops = max(result.max_hops, len(statuses))
+    return result
+
+# ---------------------------------------------------------------- 产物
+
+def js_order(text):
+    """JS 字符串比较按 UTF-16 码元排序"""
+    return text.encode('utf-16-be')
+
+def _nginx_quote(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _next_power_of_two(n, minimum):
+    size = minimum
+    while size < n:
+        size *= 2
+    return size
+
+def nginx_safe(path):
+    # map 的值中 $ 会被当作变量展开，空白会截断参数
+    return '$' not in path and not any(c.isspace() for c in path)
+
+def _nginx_variable(status, target):
+    # 目标自带查询串时用单独的变量，return 时用 & 而不是 ? 拼接请求参数
+    return f'$compiled_redirect_{status}_query' if '?' in target else f'$compiled_redirect_{status}'
+
+def write_nginx(rules, out_dir):
+    """生成 map（http 级别）与 return 片段（server 级别），返回写入的规则数"""
+    usable = {s: r for s, r in rules.items() if nginx_safe(s) and nginx_safe(r[0])}
+    longest = max((len(s.encode('utf-8')) for s in usable), default=0)
+    lines = [
+        '# 由 scripts/redirects_compile.py 生成，请勿手工修改',
+        f'map_hash_max_size {_next_power_of_two(len(usable), 2048)};',
+        f'map_hash_bucket_size {_next_power_of_two(longest + 32, 64)};',
+        'map $args $compiled_redirect_more_args {',
+        '    "" "";',
+        '    default "&$args";',
+        '}',
+    ]
+    for status in STATUSES:
+        for variable in (f'$compiled_redirect_{status}', f'$compiled_redirect_{status}_query'):
+            lines.append(f'map $uri {variable} {{')
+            lines.append('    default "";')
+            for source in sorted(usable):
+                target, rule_status, _ = usable[source]
+                if rule_status == status and _nginx_variable(status, target) == variable:
+                    lines.append(f'    {_nginx_quote(source)} {_nginx_quote(target)};')
+            lines.append('}')
+    with open(os.path.join(out_dir, 'nginx-redirects-map.conf'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+    snippet = ['# 由 scripts/redirects_compile.py 生成，请勿手工修改']
+    for status in STATUSES:
+        snippet.append(f'if ($compiled_redirect_{status}) {{')
+        snippet.append(f'    return {status} $compiled_redirect_{status}$is_args$args;')
+        snippet.append('}')
+        snippet.append(f'if ($compiled_redirect_{status}_query) {{')
+        snippet.append(f'    return {status} $compiled_redirect_{status}_query$compiled_redirect_more_args;')
+        snippet.append('}')
+    with open(os.path.join(out_dir, 'nginx-redirects.conf'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(snippet) + '\n')
+    return len(usable)
+
+def netlify_lines(rules):
+    return [f'{source} {target} {status}' for source, (target, status, _) in sorted(rules.items())
+            if not any(c.isspace() for c in source + target)]
+
+def inject_netlify(path, lines):
+    """把规则写进 _redirects 的标记区域；没有标记时插在 SPA 回退规则（/* ...）之前"""
+    with open(path, 'r', encoding='utf-8') as f:
+        existing = f.read().splitlines()
+    block = [NETLIFY_BEGIN] + lines + [NETLIFY_END]
+    if NETLIFY_BEGIN in existing and NETLIFY_END in existing:
+        begin = existing.index(NETLIFY_BEGIN)
+        end = existing.index(NETLIFY_END)
+        updated = existing[:begin] + block + existing[end + 1:]
+    else:
+        fallback = next((i for i, line in enumerate(existing) if line.startswith('/* ')), len(existing))
+        while fallback > 0 and existing[fallback - 1].startswith('#'):
+            fallback -= 1
+        updated = existing[:fallback] + block + [''] + existing[fallback:]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(updated) + '\n')
+
+def lookup_table(rules):
+    """{targets: [...], rules: [[from, 目标下标, 状态码], ...]}，rules 按 JS 字符串顺序排序"""
+    targets = sorted({target for target, _, _ in rules.values()}, key=js_order)
+    position = {target: i for i, target in enumerate(targets)}
+    ordered = sorted(rules.items(), key=lambda item: js_order(item[0]))
+    return {
+        'version': 1,
+        'targets': targets,
+        'rules': [[source, position[target], status] for source, (target, status, _) in ordered],
+    }
+
+def write_outputs(result, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    nginx_count = write_nginx(result.rules, out_dir)
+    lines = netlify_lines(result.rules)
+    with open(os.path.join(out_dir, '_redirects'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    with open(os.path.join(out_dir, 'redirects.json'), 'w', encoding='utf-8') as f:
+        json.dump(lookup_table(result.rules), f, ensure_ascii=False, separators=(',', ':'))
+    return nginx_count, lines
+
+def main():
+    parser = argparse.ArgumentParser(description='把 redirects 表编译成 nginx / Netlify / JSON 查找表')
+    parser.add_argument('--url', help='从 PostgREST 读取（如 $VITE_SUPABASE_URL）')
+    parser.add_argument('--json', help='redirects 表导出的 JSON 数组或 NDJSON 文件')
+    parser.add_argument('--out', default='build/redirects', help='输出目录')
+    parser.add_argument('--inject-netlify', help='同时把规则写进该 _redirects 文件（如 public/_redirects）')
+    args = parser.parse_args()
+
+    if args.url:
+        rows = iter_rest_rules(args.url, os.getenv('VITE_SUPABASE_ANON_KEY'))
+    elif args.json:
+        rows = iter_json_rules(args.json)
+    else:
+        parser.error('需要指定 --url 或 --json')
+
+    result = compile_rules(rows)
+    nginx_count, lines = write_outputs(result, args.out)
+    if args.inject_netlify:
+        inject_netlify(args.inject_netlify, lines)
+
+    collapsed = sum(1 for _, _, hops in result.rules.values() if hops > 1)
+    print(f'✅ 规则 {len(result.rules)} 条（折叠链 {collapsed} 条，最长 {result.max_hops} 跳），'
+          f'nginx {nginx_count} 条，Netlify {len(lines)} 条')
+    for cycle in result.cycles[:20]:
+        print(f'  ⚠️ 环: {" → ".join(cycle + cycle[:1])}', file=sys.stderr)
+    if len(result.cycles) > 20:
+        print(f'  ... 还有 {len(result.cycles) - 20} 个环', file=sys.stderr)
+    if result.dead:
+        print(f'  ⚠️ {len(result.dead)} 条规则最终指向环，已跳过', file=sys.stderr)
+    if result.duplicates:
+        print(f'  ⚠️ {len(result.duplicates)} 条重复的 from_path，只保留第一条', file=sys.stderr)
+    if result.invalid:
+        print(f'  ⚠️ {len(result.invalid)} 条规则无效（路径为空或状态码不支持）', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+文章搜索的离线倒排索引
+
+从种子SQL文件或 PostgREST 导出中流式读取文章，分词后生成带 BM25 统计的倒排索引，
+按词的首字符分片写出，前端或边缘函数只需下载查询词所在的分片。
+
+分词：
+  - 英文/数字按单词切分并转小写
+  - 连续的中日韩文字切成二元组（单个字时保留单字）
+  - 标题中的词按 TITLE_WEIGHT 倍计入词频
+
+输出目录结构：
+  manifest.json          版本、BM25 参数、文档数、平均长度、分片列表
+  docs.json              文档表 [[slug, title, 长度, 内容哈希] | null]，下标即文档编号
+  shards/<分片>.json.gz  {词: [df, 倒排表]}；倒排表为 (文档编号差值, 词频) 的 varint 序列再 base64
+
+分片规则：ASCII 词取首字符（数字统一归入 "0"），其他词取 "cjk" + ord(首字符) % cjk_shards。
+
+增量更新：再次运行时按 slug 比对内容哈希，只对新增/变化的文章重新分词，
+旧的文档编号留空位（--rebuild 时重新紧凑编号），只有内容变化的分片才会被重写。
+
+用法:
+  python scripts/search_index.py --file supabase/migrations/56_insert_phone_repair_articles_batch1.sql --out search-index
+  python scripts/search_index.py --url $VITE_SUPABASE_URL --out search-index
+  python scripts/search_index.py --out search-index --query "screen replacement"
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+
+from article_precompute import ArticleScanner
+
+INDEX_VERSION = 1
+DEFAULT_CJK_SHARDS = 32
+DEFAULT_PAGE_SIZE = 500
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+
+_ASCII_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_CJK_RUN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]+')
+_STOPWORDS = frozenset('a an and are as at be by for from in into is it its of on or that the this to with'.split())
+
+def tokenize(text):
+    """把混合中英文文本切成词列表"""
+    text = text.lower()
+    tokens = [w for w in _ASCII_WORD.findall(text) if w not in _STOPWORDS]
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+def html_text(html):
+    scanner = ArticleScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.plain_text()
+
+def article_terms(article):
+    """一篇文章的词频（标题加权）"""
+    terms = Counter(tokenize(html_text(article.get('content') or '')))
+    terms.update(tokenize(article.get('excerpt') or ''))
+    for token in tokenize(article.get('title') or ''):
+        terms[token] += TITLE_WEIGHT
+    return terms
+
+def article_hash(article):
+    payload = '\x00'.join(str(article.get(k) or '') for k in ('title', 'excerpt', 'content'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+def shard_of(term, cjk_shards=DEFAULT_CJK_SHARDS):
+    first = term[0]
+    if first.isascii():
+        return '0' if first.isdigit() else first
+    return f'cjk{ord(first) % cjk_shards:02d}'
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def encode_postings(postings):
+    """[(文档编号, 词频)]（按编号升序）→ base64 的 varint 差值序列"""
+    out = bytearray()
+    previous = 0
+    for doc, tf in postings:
+        _write_varint(out, doc - previous)
+        _write_varint(out, tf)
+        previous = doc
+    return base64.b64encode(bytes(out)).decode('ascii')
+
+def decode_postings(encoded):
+    data = base64.b64decode(encoded)
+    postings = []
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    doc = 0
+    for i in range(0, len(values), 2):
+        doc += values[i]
+        postings.append((doc, values[i + 1]))
+    return postings
+
+# ---------------------------------------------------------------- 数据源
+
+def iter_sql_articles(paths):
+    """从种子SQL文件中流式读取文章行"""
+    from direct_insert_articles import iter_insert_rows
+    from sql_stream import iter_insert_statements
+    for path in paths:
+        for statement in iter_insert_statements(path):
+            try:
+                yield from iter_insert_rows(statement)
+            except ValueError as e:
+                print(f'⚠️ 跳过无法解析的语句: {e}', file=sys.stderr)
+
+def iter_rest_articles(base_url, key=None, page_size=DEFAULT_PAGE_SIZE):
+    """从 PostgREST 按 slug 分页读取已发布的文章"""
+    import requests
+    session = requests.Session()
+    headers = {'apikey': key or '', 'Authorization': f'Bearer {key or ""}'}
+    offset = 0
+    while True:
+        params = {'select': 'slug,title,excerpt,content', 'status': 'eq.published',
+                  'order': 'slug.asc', 'limit': page_size, 'offset': offset}
+        response = session.get(f'{base_url}/rest/v1/articles', headers=headers, params=params, timeout=60)
+        response.raise_for_status()
+        page = response.json()
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+def iter_json_articles(path):
+    """读取 PostgREST 导出的 JSON 数组或 NDJSON 文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# ---------------------------------------------------------------- 索引
+
+class SearchIndex:
+    """内存中的索引：文档表 + {词: {文档编号: 词频}}"""
+
+    def __init__(self, cjk_shards=DEFAULT_CJK_SHARDS):
+        self.cjk_shards = cjk_shards
+        self.docs = []
+        self.slots = {}
+        self.postings = defaultdict(dict)
+        self.shard_bytes = {}
+
+    @classmethod
+    def load(cls, directory):
+        """读取已有索引；不存在或版本不符时返回空索引"""
+        manifest_path = os.path.join(directory, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return cls()
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') != INDEX_VERSION:
+            return cls()
+        index = cls(manifest['cjk_shards'])
+        with open(os.path.join(directory, 'docs.json'), 'r', encoding='utf-8') as f:
+            index.docs = json.load(f)
+        index.slots = {doc[0]: i for i, doc in enumerate(index.docs) if doc}
+        for name in manifest['shards']:
+            with open(os.path.join(directory, 'shards', f'{name}.json.gz'), 'rb') as f:
+                raw = f.read()
+            index.shard_bytes[name] = raw
+            for term, (_, encoded) in json.loads(gzip.decompress(raw)).items():
+                index.postings[term] = dict(decode_postings(encoded))
+        return index
+
+    def update(self, articles):
+        """按内容哈希增量更新，返回 (新增, 更新, 未变, 删除) 数量"""
+        added = updated = unchanged = 0
+        seen = set()
+        stale = []
+        fresh = []
+        for article in articles:
+            slug = article.get('slug')
+            if not slug or slug in seen:
+                continue
+            seen.add(slug)
+            digest = article_hash(article)
+            slot = self.slots.get(slug)
+            if slot is not None and self.docs[slot][3] == digest:
+                unchanged += 1
+                continue
+            if slot is not None:
+                stale.append(slot)
+                updated += 1
+            else:
+                added += 1
+            fresh.append((slug, article.get('title') or '', digest, article_terms(article)))
+        removed = [slot for slug, slot in self.slots.items() if slug not in seen]
+        if stale or removed:
+            dropped = set(stale) | set(removed)
+            for term in list(self.postings):
+                entries = self.postings[term]
+                for slot in dropped & entries.keys():
+                    del entries[slot]
+                if not entries:
+                    del self.postings[term]
+            for slot in dropped:
+                self.slots.pop(self.docs[slot][0], None)
+                self.docs[slot] = None
+        for slug, title, digest, terms in fresh:
+            slot = len(self.docs)
+            self.docs.append([slug, title, sum(terms.values()), digest])
+            self.slots[slug] = slot
+            for term, tf in terms.items():
+                self.postings[term][slot] = tf
+        return added, updated, unchanged, len(removed)
+
+    def stats(self):
+        lengths = [doc[2] for doc in self.docs if doc]
+        return len(lengths), (sum(lengths) / len(lengths) if lengths else 0.0)
+
+    def save(self, directory):
+        """写出索引，只重写内容有变化的分片；返回重写的分片数"""
+        shard_dir = os.path.join(directory, 'shards')
+        os.makedirs(shard_dir, exist_ok=True)
+        shards = defaultdict(dict)
+        for term in sorted(self.postings):
+            entries = self.postings[term]
+            shards[shard_of(term, self.cjk_shards)][term] = [len(entries), encode_postings(sorted(entries.items()))]
+        written = 0
+        listing = {}
+        for name, terms in sorted(shards.items()):
+            payload = json.dumps(terms, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            raw = gzip.compress(payload, mtime=0)
+            listing[name] = {'terms': len(terms), 'bytes': len(raw)}
+            if self.shard_bytes.get(name) != raw:
+                _atomic_write(os.path.join(shard_dir, f'{name}.json.gz'), raw)
+                written += 1
+        for filename in os.listdir(shard_dir):
+            if filename.endswith('.json.gz') and filename[:-len('.json.gz')] not in shards:
+                os.remove(os.path.join(shard_dir, filename))
+        self.shard_bytes = {}
+        doc_count, avg_length = self.stats()
+        manifest = {
+            'version': INDEX_VERSION,
+            'k1': BM25_K1,
+            'b': BM25_B,
+            'title_weight': TITLE_WEIGHT,
+            'cjk_shards': self.cjk_shards,
+            'doc_count': doc_count,
+            'avg_length': avg_length,
+            'shards': listing,
+        }
+        _atomic_write(os.path.join(directory, 'docs.json'),
+                      json.dumps(self.docs, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        _atomic_write(os.path.join(directory, 'manifest.json'),
+                      json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+        return written
+
+def _atomic_write(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def search(directory, query, limit=10):
+    """参考实现：只读取查询词所在的分片，按 BM25 打分，返回 [(slug, title, 分数)]"""
+    with open(os.path.join(directory, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    terms = set(tokenize(query))
+    by_shard = defaultdict(list)
+    for term in terms:
+        by_shard[shard_of(term, manifest['cjk_shards'])].append(term)
+    n = manifest['doc_count']
+    avg_length = manifest['avg_length'] or 1.0
+    k1, b = manifest['k1'], manifest['b']
+    with open(os.path.join(directory, 'docs.json'), 'r', encoding='utf-8') as f:
+        docs = json.load(f)
+    scores = Counter()
+    for name, shard_terms in by_shard.items():
+        if name not in manifest['shards']:
+            continue
+        with gzip.open(os.path.join(directory, 'shards', f'{name}.json.gz'), 'rt', encoding='utf-8') as f:
+            shard = json.load(f)
+        for term in shard_terms:
+            if term not in shard:
+                continue
+            df, encoded = shard[term]
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for slot, tf in decode_postings(encoded):
+                length = docs[slot][2]
+                scores[slot] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+    return [(docs[slot][0], docs[slot][1], score) for slot, score in scores.most_common(limit)]
+
+def main():
+    parser = argparse.ArgumentParser(description='生成文章搜索的分片倒排索引')
+    parser.add_argument('--file', action='append', default=[], help='种子SQL文件，可重复指定')
+    parser.add_argument('--json', help='PostgREST 导出的 JSON 数组或 NDJSON 文件')
+    parser.add_argument('--url', help='从 PostgREST 读取已发布文章（如 $VITE_SUPABASE_URL）')
+    parser.add_argument('--out', default='search-index', help='索引输出目录')
+    parser.add_argument('--cjk-shards', type=int, default=DEFAULT_CJK_SHARDS, help='中日韩词的分片数（仅新建索引时生效）')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已有索引，全量重建')
+    parser.add_argument('--query', help='不建索引，直接在 --out 中检索并输出结果')
+    args = parser.parse_args()
+
+    if args.query:
+        for slug, title, score in search(args.out, args.query):
+            print(f'{score:8.3f}  {slug}  {title}')
+        return
+
+    if args.url:
+        articles = iter_rest_articles(args.url, os.getenv('VITE_SUPABASE_ANON_KEY'))
+    elif args.json:
+        articles = iter_json_articles(args.json)
+    elif args.file:
+        articles = iter_sql_articles(args.file)
+    else:
+        parser.error('需要指定 --file、--json 或 --url')
+
+    index = SearchIndex(max(1, args.cjk_shards)) if args.rebuild else SearchIndex.load(args.out)
+    added, updated, unchanged, removed = index.update(articles)
+    written = index.save(args.out)
+    doc_count, avg_length = index.stats()
+    print(f'✅ 文档 {doc_count} 篇（新增 {added}，更新 {updated}，未变 {unchanged}，删除 {removed}），'
+          f'词 {len(index.postings)} 个，平均长度 {avg_length:.0f}，重写分片 {written} 个')
+
+if __name__ == '__main__':
+    main()
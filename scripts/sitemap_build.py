@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+流式、分片的站点地图生成器
+
+替代在浏览器中一次性加载全部 URL 的 SitemapGenerator：从 PostgREST 或种子SQL文件中
+逐行读取文章、产品、问答、下载与视频，结合 page_seo 的 priority / change_frequency，
+写出 gzip 压缩的分片（每片最多 MAX_URLS 个 URL、未压缩不超过 MAX_BYTES）与一个站点地图索引。
+
+分片：每种内容按 key 的哈希分到固定数量的桶里，新增内容不会挪动已有 URL 所在的分片；
+某个桶超过 MAX_URLS 或 MAX_BYTES 时该类型的桶数翻倍并整体重写。
+
+增量：每张表只读取一遍数据源。
+  读取时按桶暂存到临时文件，同时计算每个分片的 URL 数、最大 updated_at（水位线）以及成员摘要（与顺序无关）
+  读完后只把水位线或摘要有变化的分片从临时文件重新写出；桶数变化时也只重新分配临时文件
+因此再次生成的写入量取决于变化的内容，而不是全部内容的数量。
+状态文件（--state，默认在工作目录）记录上次的分片状态，不放在公开的输出目录中。
+
+page_seo：
+  /articles/<slug> 这类内容详情路径视为对该条内容的覆盖（priority、change_frequency、noindex）
+  其余路径（/、/articles、/videos 等）作为静态页面写入 pages 分片；noindex 的页面不写入
+
+用法:
+  python scripts/sitemap_build.py --url $VITE_SUPABASE_URL --base-url https://example.com --out public/sitemaps
+  python scripts/sitemap_build.py --sql supabase/migrations/56_insert_phone_repair_articles_batch1.sql \
+      --sql supabase/migrations/62_create_seo_tables.sql --base-url https://example.com
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from xml.sax.saxutils import escape
+
+MAX_URLS = 50000
+# 新建时每个桶的目标 URL 数，给增长留出余量
+INITIAL_FILL = MAX_URLS // 2
+DEFAULT_PAGE_SIZE = 1000
+# 单个分片未压缩时的大小上限（sitemaps.org 规定 50MB）
+MAX_BYTES = 50 * 1024 * 1024
+STATE_VERSION = 2
+STATE_FILE = '.sitemap_state.json'
+# 状态文件默认放在工作目录，不能写进会被公开发布的输出目录
+DEFAULT_STATE = STATE_FILE
+INDEX_FILE = 'sitemap_index.xml'
+
+CONTENT_TYPES = {
+    'articles': {'path': '/articles/{slug}', 'key': 'slug', 'columns': 'id,slug,status,updated_at,created_at',
+                 'published': ('status', 'published', 'draft'), 'changefreq': 'weekly', 'priority': 0.8},
+    'products': {'path': '/products/{slug}', 'key': 'slug', 'columns': 'id,slug,status,updated_at,created_at',
+                 'published': ('status', 'published', 'draft'), 'changefreq': 'weekly', 'priority': 0.7},
+    'questions': {'path': '/questions/{id}', 'key': 'id', 'columns': 'id,status,updated_at,created_at',
+                  'published': ('status', 'approved', 'pending'), 'changefreq': 'weekly', 'priority': 0.6},
+    'downloads': {'path': '/downloads/{id}', 'key': 'id', 'columns': 'id,is_published,updated_at,created_at',
+                  'published': ('is_published', True, False), 'changefreq': 'weekly', 'priority': 0.6},
+    'videos': {'path': '/videos/{id}', 'key': 'id', 'columns': 'id,is_published,updated_at,created_at',
+               'published': ('is_published', True, False), 'changefreq': 'weekly', 'priority': 0.6},
+}
+PAGE_SEO_COLUMNS = 'page_path,priority,change_frequency,noindex,updated_at'
+_DETAIL_PATH = re.compile(r'^/(?:%s)/[^/]+$' % '|'.join(CONTENT_TYPES))
+
+# ---------------------------------------------------------------- 数据源
+
+class SqlSource:
+    """种子SQL文件（每个表单独流式扫描一遍）"""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def rows(self, table, columns):
+        from direct_insert_articles import iter_insert_rows
+        from sql_stream import iter_insert_statements
+        for path in self.paths:
+            for statement in iter_insert_statements(path, table):
+                try:
+                    yield from iter_insert_rows(statement)
+                except ValueError as e:
+                    print(f'⚠️ 跳过无法解析的 {table} 语句: {e}', file=sys.stderr)
+
+class RestSource:
+    """PostgREST，按 id 键集分页"""
+
+    def __init__(self, base_url, key, page_size=DEFAULT_PAGE_SIZE):
+        import requests
+        self.session = requests.Session()
+        self.base_url = base_url
+        self.headers = {'apikey': key or '', 'Authorization': f'Bearer {key or ""}'}
+        self.page_size = page_size
+
+    def rows(self, table, columns):
+        last_id = None
+        while True:
+            params = {'select': columns, 'order': 'id.asc', 'limit': self.page_size}
+            if last_id is not None:
+                params['id'] = f'gt.{last_id}'
+            response = self.session.get(f'{self.base_url}/rest/v1/{table}', headers=self.headers,
+                                        params=params, timeout=60)
+            if response.status_code != 200:
+                raise RuntimeError(f'读取 {table} 失败: HTTP {response.status_code}: {response.text}')
+            page = response.json()
+            yield from page
+            if len(page) < self.page_size:
+                return
+            last_id = page[-1]['id']
+
+def load_page_seo(source):
+    """返回 (详情页覆盖 {path: 行}, 静态页面 [行])"""
+    overrides = {}
+    pages = []
+    for row in source.rows('page_seo', 'id,' + PAGE_SEO_COLUMNS):
+        path = row.get('page_path')
+        if not path:
+            continue
+        if _DETAIL_PATH.match(path):
+            overrides[path] = row
+        elif not row.get('noindex'):
+            pages.append(row)
+    return overrides, pages
+
+# ---------------------------------------------------------------- URL 与分片
+
+def _is_published(row, rule):
+    column, expected, default = rule
+    value = row.get(column, default)
+    if isinstance(expected, bool) and isinstance(value, str):
+        value = value.strip().lower() in ('t', 'true', '1')
+    return value == expected
+
+def _lastmod(row):
+    value = row.get('updated_at') or row.get('created_at')
+    # now() 等表达式在种子SQL中无法求值，视为没有修改时间
+    if not value or not re.match(r'\d{4}-\d{2}-\d{2}', str(value)):
+        return None
+    return str(value).replace(' ', 'T', 1)
+
+def iter_urls(source, content_type, overrides):
+    """产出某类内容的 (key, path, lastmod, changefreq, priority)"""
+    spec = CONTENT_TYPES[content_type]
+    for row in source.rows(content_type, spec['columns']):
+        if not _is_published(row, spec['published']):
+            continue
+        key = row.get(spec['key'])
+        if key is None:
+            continue
+        path = spec['path'].format(**{spec['key']: key})
+        override = overrides.get(path)
+        if override is not None and override.get('noindex'):
+            continue
+        changefreq = (override or {}).get('change_frequency') or spec['changefreq']
+        priority = (override or {}).get('priority')
+        yield str(key), path, _lastmod(row), changefreq, float(priority if priority is not None else spec['priority'])
+
+def iter_page_urls(pages):
+    for row in pages:
+        priority = row.get('priority')
+        yield (row['page_path'], row['page_path'], _lastmod(row), row.get('change_frequency') or 'weekly',
+               float(priority if priority is not None else 0.5))
+
+def _hash(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def bucket_of(key, buckets):
+    return _hash(key) % buckets
+
+def url_xml(base_url, path, lastmod, changefreq, priority):
+    parts = [f'<url><loc>{escape(base_url + path)}</loc>']
+    if lastmod:
+        parts.append(f'<lastmod>{escape(lastmod)}</lastmod>')
+    parts.append(f'<changefreq>{changefreq}</changefreq><priority>{priority:.1f}</priority></url>\n')
+    return ''.join(parts)
+
+def shard_name(content_type, bucket):
+    return f'sitemap-{content_type}-{bucket}.xml.gz'
+
+URLSET_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                 '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+URLSET_FOOTER = '</urlset>\n'
+
+class ShardStats:
+    """一个分片的 URL 数、未压缩字节数、水位线与成员摘要"""
+
+    def __init__(self):
+        self.count = 0
+        self.size = len(URLSET_HEADER) + len(URLSET_FOOTER)
+        self.digest = 0
+        self.watermark = ''
+
+    def add(self, base_url, path, lastmod, changefreq, priority):
+        self.count += 1
+        self.size += len(url_xml(base_url, path, lastmod, changefreq, priority).encode('utf-8'))
+        self.digest = (self.digest + _hash(f'{path}\t{lastmod}\t{changefreq}\t{priority}')) & 0xffffffffffffffff
+        if lastmod and lastmod > self.watermark:
+            self.watermark = lastmod
+
+    def oversized(self):
+        # 只剩一个 URL 时无法再拆分
+        return self.count > 1 and (self.count > MAX_URLS or self.size > MAX_BYTES)
+
+    def as_state(self):
+        return {'count': self.count, 'digest': f'{self.digest:016x}', 'watermark': self.watermark}
+
+class ShardSpool:
+    """把一类内容的 URL 按桶暂存到临时文件，同时统计每个桶
+
+    数据源只读一遍；桶数变化时从临时文件重新分配，需要重写的分片也从临时文件写出。
+    """
+
+    def __init__(self, directory, name, buckets, base_url):
+        self.directory = directory
+        self.name = name
+        self.buckets = buckets
+        self.base_url = base_url
+        self.stats = {}
+        self.handles = {}
+
+    def path(self, bucket):
+        return os.path.join(self.directory, f'{self.name}-{self.buckets}-{bucket}.jsonl')
+
+    def add(self, url):
+        bucket = bucket_of(url[0], self.buckets)
+        f = self.handles.get(bucket)
+        if f is None:
+            f = self.handles[bucket] = open(self.path(bucket), 'w', encoding='utf-8')
+        f.write(json.dumps(url, ensure_ascii=False) + '\n')
+        self.stats.setdefault(bucket, ShardStats()).add(self.base_url, *url[1:])
+
+    def close(self):
+        for f in self.handles.values():
+            f.close()
+        self.handles = {}
+
+    def records(self, bucket):
+        """读出某个桶暂存的 (key, path, lastmod, changefreq, priority)"""
+        with open(self.path(bucket), 'r', encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+    def resplit(self, buckets):
+        """按新的桶数重新分配已暂存的 URL，返回新的 ShardSpool"""
+        self.close()
+        spool = ShardSpool(self.directory, self.name, buckets, self.base_url)
+        try:
+            for bucket in self.stats:
+                for url in self.records(bucket):
+                    spool.add(url)
+                os.remove(self.path(bucket))
+        finally:
+            spool.close()
+        return spool
+
+def write_shard(urls, base_url, path):
+    """把一个桶的 URL 写成 gzip 分片（先写临时文件再替换）"""
+    with gzip.GzipFile(path + '.tmp', 'wb', mtime=0) as f:
+        f.write(URLSET_HEADER.encode('utf-8'))
+        for key, url_path, lastmod, changefreq, priority in urls:
+            f.write(url_xml(base_url, url_path, lastmod, changefreq, priority).encode('utf-8'))
+        f.write(URLSET_FOOTER.encode('utf-8'))
+    os.replace(path + '.tmp', path)
+
+def load_state(state_path, base_url, out_dir):
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (state.get('version') != STATE_VERSION or state.get('base_url') != base_url
+            or state.get('out_dir') != os.path.abspath(out_dir)):
+        return {}
+    return state.get('types', {})
+
+def save_state(state_path, base_url, out_dir, types):
+    directory = os.path.dirname(state_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, 'base_url': base_url, 'out_dir': os.path.abspath(out_dir),
+                   'types': types}, f, indent=2)
+    os.replace(tmp_path, state_path)
+
+def build_type(name, urls, previous, base_url, out_dir, spool_dir):
+    """生成一类内容的分片，返回 (该类型的新状态, 重写的分片数)"""
+    spool = ShardSpool(spool_dir, name, previous.get('buckets') or 1, base_url)
+    try:
+        for url in urls:
+            spool.add(url)
+    finally:
+        spool.close()
+    if not previous:
+        total = sum(s.count for s in spool.stats.values())
+        buckets = max(1, -(-total // INITIAL_FILL))
+        if buckets != spool.buckets:
+            spool = spool.resplit(buckets)
+    while any(s.oversized() for s in spool.stats.values()):
+        spool = spool.resplit(spool.buckets * 2)
+    buckets = spool.buckets
+    old_shards = previous.get('shards', {}) if previous.get('buckets') == buckets else {}
+
+    shards = {str(b): s.as_state() for b, s in spool.stats.items()}
+    written = 0
+    for b in spool.stats:
+        path = os.path.join(out_dir, shard_name(name, b))
+        if old_shards.get(str(b)) != shards[str(b)] or not os.path.exists(path):
+            write_shard(spool.records(b), base_url, path)
+            written += 1
+    # 清理已不存在的桶（类型被删空或桶数变化）
+    prefix = f'sitemap-{name}-'
+    for filename in os.listdir(out_dir):
+        if filename.startswith(prefix) and filename.endswith('.xml.gz'):
+            bucket = filename[len(prefix):-len('.xml.gz')]
+            if bucket not in shards:
+                os.remove(os.path.join(out_dir, filename))
+    return {'buckets': buckets, 'shards': shards}, written
+
+def write_index(types, out_dir, base_url, public_path):
+    entries = []
+    for name, state in sorted(types.items()):
+        for bucket, shard in sorted(state['shards'].items(), key=lambda item: int(item[0])):
+            loc = f'{base_url}{public_path}/{shard_name(name, int(bucket))}'
+            lastmod = f'<lastmod>{escape(shard["watermark"])}</lastmod>' if shard['watermark'] else ''
+            entries.append(f'<sitemap><loc>{escape(loc)}</loc>{lastmod}</sitemap>\n')
+    tmp_path = os.path.join(out_dir, INDEX_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        f.writelines(entries)
+        f.write('</sitemapindex>\n')
+    os.replace(tmp_path, os.path.join(out_dir, INDEX_FILE))
+    return len(entries)
+
+def build(source, base_url, out_dir, public_path, full=False, state_path=DEFAULT_STATE):
+    """生成全部分片与索引，返回 {类型: (URL 数, 重写的分片数)}"""
+    os.makedirs(out_dir, exist_ok=True)
+    base_url = base_url.rstrip('/')
+    previous = {} if full else load_state(state_path, base_url, out_dir)
+    overrides, pages = load_page_seo(source)
+    types = {}
+    report = {}
+    makers = {'pages': lambda: iter_page_urls(pages)}
+    for content_type in CONTENT_TYPES:
+        makers[content_type] = lambda t=content_type: iter_urls(source, t, overrides)
+    with tempfile.TemporaryDirectory(prefix='sitemap-') as spool_dir:
+        for name, make_urls in makers.items():
+            state, written = build_type(name, make_urls(), previous.get(name, {}), base_url, out_dir, spool_dir)
+            types[name] = state
+            report[name] = (sum(s['count'] for s in state['shards'].values()), written)
+    write_index(types, out_dir, base_url, public_path.rstrip('/'))
+    save_state(state_path, base_url, out_dir, types)
+    # 旧版本把状态文件写在输出目录里，会随站点一起公开
+    legacy = os.path.join(out_dir, STATE_FILE)
+    if os.path.exists(legacy) and os.path.abspath(legacy) != os.path.abspath(state_path):
+        os.remove(legacy)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='生成分片的站点地图与索引')
+    parser.add_argument('--url', help='从 PostgREST 读取（如 $VITE_SUPABASE_URL）')
+    parser.add_argument('--sql', action='append', default=[], help='种子SQL文件，可重复指定')
+    parser.add_argument('--base-url', required=True, help='站点地址，如 https://www.example.com')
+    parser.add_argument('--out', default='public/sitemaps', help='输出目录')
+    parser.add_argument('--public-path', default='/sitemaps', help='输出目录在站点上的路径（用于索引中的 loc）')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help='PostgREST 每页行数')
+    parser.add_argument('--state', default=DEFAULT_STATE, help='增量状态文件（不要放在公开的输出目录中）')
+    parser.add_argument('--full', action='store_true', help='忽略状态文件，重写全部分片')
+    args = parser.parse_args()
+
+    if args.url:
+        source = RestSource(args.url, os.getenv('VITE_SUPABASE_ANON_KEY'), max(1, args.page_size))
+    elif args.sql:
+        source = SqlSource(args.sql)
+    else:
+        parser.error('需要指定 --url 或 --sql')
+
+    report = build(source, args.base_url, args.out, args.public_path, args.full, args.state)
+    for name, (count, written) in report.items():
+        print(f'  {name:<10} {count:>8} 个 URL，重写 {written} 个分片')
+    print(f'✅ 站点地图索引: {os.path.join(args.out, INDEX_FILE)}')
+
+if __name__ == '__main__':
+    main()
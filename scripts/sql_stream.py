@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+流式SQL语句切分器
+
+按块读取SQL文件，跟踪引号/注释状态，逐条产出完整的语句，内存占用与文件大小无关。
+支持:
+  - 单引号字符串（'' 转义）以及 E'...' 中的反斜杠转义
+  - 双引号标识符（"" 转义）
+  - 美元符号引用 $$...$$ / $tag$...$tag$
+  - 行注释 -- 与可嵌套的块注释 /* */
+语句之间的注释和空白不会出现在产出的语句里。
+"""
+import re
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# 语句之外：跳过空白与注释，找到语句的第一个字符
+_START = re.compile(r'--|/\*|\S')
+# 语句之内：只关注会改变状态或结束语句的记号
+_SPECIAL = re.compile(r"""[;'"]|--|/\*|\$(?:[A-Za-z_\u0080-\uffff][A-Za-z_0-9\u0080-\uffff]*)?\$""")
+_SINGLE = re.compile(r"'")
+_SINGLE_ESCAPED = re.compile(r"[\\']")
+_DOUBLE = re.compile(r'"')
+_LINE_END = re.compile(r'\n')
+_BLOCK = re.compile(r'/\*|\*/')
+_IDENT_CHAR = re.compile(r'[A-Za-z_0-9\u0080-\uffff$]')
+
+def _chunks(source, chunk_size):
+    """从路径或文件对象按块读取文本"""
+    if hasattr(source, 'read'):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        # newline='' 保留字符串字面量里的 \r\n，不做换行符转换
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+def iter_sql_statements(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐条产出 source（文件路径或文本文件对象）中的SQL语句，包含结尾的分号"""
+    reader = _chunks(source, chunk_size)
+    buf = ''
+    eof = False
+    pos = 0           # 下一个待扫描的位置
+    start = -1        # 当前语句第一个有效字符的位置，-1 表示尚未开始
+
+    def more():
+        """读入下一块并丢弃已完成的前缀，返回缓冲区前移的字符数；文件结束时返回 None"""
+        nonlocal buf, pos, start, eof
+        chunk = next(reader, None)
+        if chunk is None:
+            eof = True
+            return None
+        keep = start if start >= 0 else pos
+        buf = buf[keep:] + chunk
+        pos -= keep
+        if start >= 0:
+            start = 0
+        return keep
+
+    def find(pattern, at):
+        """在缓冲区中查找 pattern，找不到就继续读入，直到文件结束"""
+        while True:
+            m = pattern.search(buf, at)
+            # 匹配落在缓冲区末尾时，后面可能还有能改变含义的字符（如 '' 或 */）
+            if m and (m.end() < len(buf) or eof):
+                return m
+            at = max(at, len(buf) - 64)
+            shift = more()
+            if shift is None:
+                return pattern.search(buf, at)
+            at -= shift
+
+    def skip_comment(token, at):
+        """跳过注释，返回注释之后的位置"""
+        if token == '--':
+            end = find(_LINE_END, at)
+            return end.end() if end else len(buf)
+        depth = 1
+        while depth:
+            inner = find(_BLOCK, at)
+            if inner is None:
+                return len(buf)
+            depth += 1 if inner.group(0) == '/*' else -1
+            at = inner.end()
+        return at
+
+    def skip_quoted(quote, pattern, at):
+        """跳过引号内容（quote 重复两次表示转义），返回结束引号之后的位置"""
+        while True:
+            close = find(pattern, at)
+            if close is None:
+                return len(buf)
+            if close.group(0) == '\\':
+                at = close.end() + 1
+                continue
+            if close.end() < len(buf) and buf[close.end()] == quote:
+                at = close.end() + 1
+                continue
+            return close.end()
+
+    while True:
+        if start < 0:
+            m = find(_START, pos)
+            if m is None:
+                break
+            if m.group(0) in ('--', '/*'):
+                pos = skip_comment(m.group(0), m.end())
+            else:
+                start = pos = m.start()
+            continue
+
+        m = find(_SPECIAL, pos)
+        if m is None:
+            break
+        token = m.group(0)
+        tok_start = m.start()
+
+        if token == ';':
+            yield buf[start:m.end()].strip()
+            start = -1
+            pos = m.end()
+        elif token in ('--', '/*'):
+            pos = skip_comment(token, m.end())
+        elif token == "'":
+            # E'...' 字符串中反斜杠是转义符
+            escaped = tok_start > start and buf[tok_start - 1] in 'Ee' and \
+                not (tok_start - 1 > start and _IDENT_CHAR.match(buf, tok_start - 2))
+            pos = skip_quoted("'", _SINGLE_ESCAPED if escaped else _SINGLE, m.end())
+        elif token == '"':
+            pos = skip_quoted('"', _DOUBLE, m.end())
+        elif tok_start > start and _IDENT_CHAR.match(buf, tok_start - 1):
+            # 标识符中的 $（如 a$b$）不是美元引用
+            pos = tok_start + 1
+        else:
+            close = find(re.compile(re.escape(token)), m.end())
+            pos = close.end() if close else len(buf)
+
+    if start >= 0:
+        tail = buf[start:].strip()
+        if tail:
+            yield tail
+
+def iter_insert_statements(source, table='articles', chunk_size=DEFAULT_CHUNK_SIZE):
+    """只产出 INSERT INTO <table> 语句"""
+    prefix = re.compile(rf'INSERT\s+INTO\s+(?:public\.)?"?{re.escape(table)}"?[\s(]', re.IGNORECASE)
+    for statement in iter_sql_statements(source, chunk_size):
+        if prefix.match(statement):
+            yield statement
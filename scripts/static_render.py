@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+公开内容的增量静态预渲染
+
+从种子SQL或 export_tables.py 的导出目录读取文章、产品与分类，用 scripts/templates/static/
+下的模板渲染成按 slug 组织的静态页面，并在旁边写出预压缩的 .gz / .br：
+  /articles/<slug>/index.html               文章详情（含分类面包屑与同分类相关文章）
+  /products/<slug>/index.html               产品详情
+  /articles/category/<id>/index.html        文章分类列表
+  /products/category/<id>/index.html        产品分类列表
+
+依赖图：每个页面记录它用到的节点（文章全文、其他文章的摘要、分类、模板），
+每个节点记录内容指纹。再次运行时只重新渲染依赖了变化节点、依赖集合有变化或输出缺失的页面；
+不再发布的页面连同压缩文件一起删除。改一篇文章的正文只重渲染这一页，
+改标题还会波及它所在分类的列表页与同分类文章的“相关文章”，改分类名称会波及该分类下的所有页面。
+
+渲染在进程池中并行执行。.br 需要安装 brotli，未安装时只写 .gz。
+
+用法:
+  python scripts/static_render.py --sql supabase/migrations/01_init_cms_schema.sql \
+      --sql supabase/migrations/56_insert_phone_repair_articles_batch1.sql --base-url https://example.com
+  python scripts/static_render.py --export export --base-url https://example.com --out build/static
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html import escape
+from string import Template
+
+STATE_VERSION = 1
+STATE_FILE = '.static_render_state.json'
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'static')
+TEMPLATES = ('base', 'article', 'product', 'category')
+RELATED_LIMIT = 3
+SITE_NAME = 'iFixes'
+# 页面固定文字，按页面 lang 选择
+LABELS = {
+    'zh-CN': {'home': '首页', 'articles': '文章', 'products': '产品', 'related': '相关文章',
+              'reading_time': '阅读约 {} 分钟'},
+    'en': {'home': 'Home', 'articles': 'Articles', 'products': 'Products', 'related': 'Related Articles',
+           'reading_time': '{} min read'},
+}
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+# 列表页与相关文章只用到这些字段，正文变化不影响它们
+SUMMARY_FIELDS = ('title', 'name', 'slug', 'excerpt', 'description', 'cover_image', 'published_at',
+                  'created_at', 'category_id', 'language')
+# 用作路径中的一段：不含分隔符与空白，也不能是 . 或 ..（会指向输出目录之外）
+_SAFE_SLUG = re.compile(r'^(?!\.+$)[^/\\\s?#]+$')
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# ---------------------------------------------------------------- 数据源
+
+class ExportSource:
+    """export_tables.py 的输出目录（NDJSON 格式，gzip 或不压缩）"""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest['settings']['format'] != 'ndjson':
+            raise SystemExit('❌ --export 只支持 NDJSON 格式的导出')
+
+    def rows(self, table, columns=None):
+        entry = self.manifest['tables'].get(table)
+        if entry is None:
+            return
+        for part in entry['parts']:
+            path = os.path.join(self.out_dir, part['file'])
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+def open_source(args):
+    if args.export:
+        return ExportSource(args.export)
+    from sitemap_build import SqlSource
+    return SqlSource(args.sql)
+
+# ---------------------------------------------------------------- 依赖图
+
+def fingerprint(value):
+    text = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()
+
+def _key(row):
+    """种子SQL中的行通常没有 id，以 slug 作为节点键"""
+    return str(row.get('id') or row.get('slug'))
+
+def _date(row):
+    for column in ('published_at', 'created_at'):
+        value = row.get(column)
+        if value and _DATE.match(str(value)):
+            return str(value)[:10]
+    return ''
+
+def _newest_first(rows):
+    return sorted(rows, key=lambda row: (_date(row), row.get('slug') or ''), reverse=True)
+
+def _summary(row):
+    return {field: row.get(field) for field in SUMMARY_FIELDS if row.get(field) is not None}
+
+def _jsonable(row):
+    return json.loads(json.dumps(row, ensure_ascii=False, default=str))
+
+class SiteGraph:
+    """页面 → 依赖节点，以及每个节点的指纹"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.pages = {}
+        self.skipped = []
+
+    def node(self, name, value):
+        self.nodes[name] = fingerprint(value)
+        return name
+
+    def page(self, path, kind, deps, context):
+        self.pages[path] = {'kind': kind, 'deps': sorted(set(deps)), 'context': context}
+
+def build_graph(source):
+    graph = SiteGraph()
+    templates = {}
+    for name in TEMPLATES:
+        with open(os.path.join(TEMPLATE_DIR, f'{name}.html'), 'r', encoding='utf-8') as f:
+            templates[name] = graph.node(f'template:{name}', f.read())
+    # 站点名与固定文字变化时所有页面都要重渲染
+    site = graph.node('site', {'name': SITE_NAME, 'labels': LABELS})
+
+    categories = {}
+    for row in source.rows('categories', 'id,name,slug,type,description'):
+        if row.get('id'):
+            categories[str(row['id'])] = {k: row.get(k) for k in ('id', 'name', 'slug', 'type', 'description')}
+            if row.get('language'):
+                categories[str(row['id'])]['language'] = row['language']
+            graph.node(f'category:{row["id"]}', categories[str(row['id'])])
+
+    images = {}
+    for row in source.rows('product_images', 'product_id,image_url,sort_order'):
+        images.setdefault(str(row.get('product_id')), []).append((row.get('sort_order') or 0, row.get('image_url')))
+
+    for kind, table in (('article', 'articles'), ('product', 'products')):
+        published = []
+        for row in source.rows(table, '*'):
+            if row.get('status', 'draft') != 'published':
+                continue
+            if not row.get('slug') or not _SAFE_SLUG.match(str(row['slug'])):
+                graph.skipped.append(f'{table}:{row.get("slug")}')
+                continue
+            row = _jsonable(row)
+            if kind == 'product':
+                row['images'] = [url for _, url in sorted(images.get(str(row.get('id')), []), key=lambda x: x[0])]
+            graph.node(f'{kind}:{_key(row)}', row)
+            graph.node(f'summary:{kind}:{_key(row)}', _summary(row))
+            published.append(row)
+
+        by_category = {}
+        for row in _newest_first(published):
+            by_category.setdefault(str(row.get('category_id')), []).append(row)
+
+        for row in published:
+            category = categories.get(str(row.get('category_id')))
+            deps = [f'{kind}:{_key(row)}', site, templates['base'], templates[kind]]
+            context = {'row': row, 'category': category, 'related': []}
+            if category:
+                deps.append(f'category:{category["id"]}')
+            if kind == 'article':
+                siblings = [r for r in by_category.get(str(row.get('category_id')), []) if r is not row]
+                for other in siblings[:RELATED_LIMIT]:
+                    deps.append(f'summary:article:{_key(other)}')
+                    context['related'].append(_summary(other))
+            graph.page(f'/{table}/{row["slug"]}', kind, deps, context)
+
+        for category_id, members in by_category.items():
+            category = categories.get(category_id)
+            if category is None:
+                continue
+            if not _SAFE_SLUG.match(str(category_id)):
+                graph.skipped.append(f'categories:{category_id}')
+                continue
+            deps = [f'category:{category_id}', site, templates['base'], templates['category']]
+            deps += [f'summary:{kind}:{_key(r)}' for r in members]
+            graph.page(f'/{table}/category/{category_id}', 'category',
+                       deps, {'table': table, 'category': category, 'items': [_summary(r) for r in members]})
+    return graph
+
+def load_state(out_dir, base_url):
+    path = os.path.join(out_dir, STATE_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get('version') != STATE_VERSION or state.get('base_url') != base_url:
+        return {}
+    return state
+
+def plan(graph, state, out_dir, force=False):
+    """返回 (要渲染的页面路径, 要删除的页面路径, 变化的节点)"""
+    old_nodes = state.get('nodes', {})
+    old_pages = state.get('pages', {})
+    changed = {n for n, h in graph.nodes.items() if old_nodes.get(n) != h} | (set(old_nodes) - set(graph.nodes))
+    # 反向索引：节点 → 依赖它的页面
+    dependents = {}
+    for path, deps in old_pages.items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(path)
+    dirty = set()
+    for node in changed:
+        dirty |= dependents.get(node, set())
+    for path, page in graph.pages.items():
+        if force or old_pages.get(path) != page['deps'] or not os.path.exists(output_path(out_dir, path)):
+            dirty.add(path)
+    render = sorted(path for path in dirty if path in graph.pages)
+    removed = sorted(set(old_pages) - set(graph.pages))
+    return render, removed, changed
+
+def output_path(out_dir, path):
+    return os.path.join(out_dir, *path.strip('/').split('/'), 'index.html')
+
+def remove_page(out_dir, path):
+    target = output_path(out_dir, path)
+    for filename in (target,) + tuple(target + suffix for suffix in COMPRESSED_SUFFIXES):
+        if os.path.exists(filename):
+            os.remove(filename)
+    # 两边都取绝对路径：out_dir 为相对路径时也不会删到输出目录本身及其上级
+    root = os.path.abspath(out_dir)
+    directory = os.path.dirname(os.path.abspath(target))
+    while directory != root and directory.startswith(root + os.sep) and os.path.isdir(directory) \
+            and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+# ---------------------------------------------------------------- 渲染（子进程）
+
+_worker = {}
+
+def init_worker(base_url, use_brotli):
+    _worker['base_url'] = base_url.rstrip('/')
+    _worker['templates'] = {}
+    for name in TEMPLATES:
+        with open(os.path.join(TEMPLATE_DIR, f'{name}.html'), 'r', encoding='utf-8') as f:
+            _worker['templates'][name] = Template(f.read())
+    _worker['brotli'] = None
+    if use_brotli:
+        import brotli
+        _worker['brotli'] = brotli
+
+def _lang(row):
+    return 'en' if (row or {}).get('language') == 'en' else 'zh-CN'
+
+def _list_lang(category, items):
+    """分类列表页的语言：分类自己没有 language 时看列表中的内容是否全是英文"""
+    if (category or {}).get('language'):
+        return _lang(category)
+    return 'en' if items and all(_lang(item) == 'en' for item in items) else 'zh-CN'
+
+def _crumb(section, category):
+    if not category:
+        return ''
+    return f' / <a href="/{section}/category/{escape(str(category["id"]))}">{escape(category.get("name") or "")}</a>'
+
+def _card(section, item):
+    title = item.get('title') or item.get('name') or ''
+    text = item.get('excerpt') or item.get('description') or ''
+    date = _date(item)
+    return (f'<li><a href="/{section}/{escape(item["slug"])}">{escape(title)}</a>'
+            + (f'<p class="meta">{date}</p>' if date else '')
+            + (f'<p>{escape(text)}</p>' if text else '') + '</li>')
+
+def render_body(kind, context):
+    """返回 (正文 HTML, 页面变量)"""
+    templates = _worker['templates']
+    if kind == 'article':
+        from article_precompute import precompute_row
+        row = precompute_row(context['row'])
+        labels = LABELS[_lang(row)]
+        meta = [_date(row), labels['reading_time'].format(row.get('reading_time', 1))]
+        related = ''
+        if context['related']:
+            items = '\n'.join(_card('articles', item) for item in context['related'])
+            related = f'<section><h2>{labels["related"]}</h2><ul class="card-list">\n{items}\n</ul></section>'
+        body = templates['article'].substitute(
+            home_label=labels['home'], section_label=labels['articles'],
+            category_crumb=_crumb('articles', context['category']), title=escape(row.get('title') or ''),
+            meta=escape(' · '.join(m for m in meta if m)),
+            cover=f'<img src="{escape(row["cover_image"])}" alt="{escape(row.get("title") or "")}">'
+            if row.get('cover_image') else '',
+            content=row.get('content') or '', related=related)
+        return body, {'lang': _lang(row), 'title': row.get('title') or '', 'description': row.get('excerpt') or '',
+                      'og_type': 'article', 'image': row.get('cover_image')}
+    if kind == 'product':
+        row = context['row']
+        labels = LABELS[_lang(row)]
+        price = row.get('price')
+        images = '\n'.join(f'<img src="{escape(url)}" alt="{escape(row.get("name") or "")}">'
+                           for url in row.get('images', []) if url)
+        body = templates['product'].substitute(
+            home_label=labels['home'], section_label=labels['products'], category_crumb=_crumb('products', context['category']),
+            title=escape(row.get('name') or ''), price=f'<p class="meta">¥{escape(str(price))}</p>' if price else '',
+            images=images, summary=escape(row.get('description') or ''), content=row.get('content') or '')
+        image = (row.get('images') or [None])[0]
+        return body, {'lang': _lang(row), 'title': row.get('name') or '', 'description': row.get('description') or '',
+                      'og_type': 'product', 'image': image}
+    category = context['category']
+    section = context['table']
+    lang = _list_lang(category, context['items'])
+    labels = LABELS[lang]
+    body = templates['category'].substitute(
+        home_label=labels['home'], section_label=labels[section], section_path=f'/{section}',
+        title=escape(category.get('name') or ''), summary=escape(category.get('description') or ''),
+        items='\n'.join(_card(section, item) for item in context['items']))
+    return body, {'lang': lang, 'title': category.get('name') or '', 'description': category.get('description') or '',
+                  'og_type': 'website', 'image': None}
+
+def _write_atomic(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def render_page(task):
+    """渲染一个页面并写出 html / .gz / .br，返回 (路径, 原始字节数)"""
+    out_dir, path, kind, context = task
+    body, page = render_body(kind, context)
+    html = _worker['templates']['base'].substitute(
+        lang=page['lang'], title=escape(f'{page["title"]} - {SITE_NAME}'), description=escape(page['description'][:200]),
+        canonical=escape(_worker['base_url'] + path), og_type=page['og_type'],
+        og_image=f'<meta property="og:image" content="{escape(page["image"])}">' if page['image'] else '',
+        site_name=SITE_NAME, body=body)
+    data = html.encode('utf-8')
+    target = output_path(out_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    _write_atomic(target, data)
+    _write_atomic(target + '.gz', gzip.compress(data, 9, mtime=0))
+    if _worker['brotli'] is not None:
+        _write_atomic(target + '.br', _worker['brotli'].compress(data, quality=11))
+    elif os.path.exists(target + '.br'):
+        os.remove(target + '.br')
+    return path, len(data)
+
+# ---------------------------------------------------------------- 主流程
+
+def build(source, out_dir, base_url, jobs=None, force=False, use_brotli=True):
+    """增量渲染，返回统计字典"""
+    graph = build_graph(source)
+    state = load_state(out_dir, base_url)
+    render, removed, changed = plan(graph, state, out_dir, force)
+    os.makedirs(out_dir, exist_ok=True)
+    for path in removed:
+        remove_page(out_dir, path)
+
+    written = 0
+    if render:
+        tasks = [(out_dir, path, graph.pages[path]['kind'], graph.pages[path]['context']) for path in render]
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(base_url, use_brotli)) as pool:
+            for _, size in pool.map(render_page, tasks, chunksize=chunksize):
+                written += size
+
+    tmp_path = os.path.join(out_dir, STATE_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, 'base_url': base_url, 'nodes': graph.nodes,
+                   'pages': {path: page['deps'] for path, page in graph.pages.items()}}, f)
+    os.replace(tmp_path, os.path.join(out_dir, STATE_FILE))
+    return {'pages': len(graph.pages), 'rendered': len(render), 'removed': len(removed),
+            'changed_nodes': len(changed), 'bytes': written, 'skipped': graph.skipped}
+
+def main():
+    parser = argparse.ArgumentParser(description='公开内容的增量静态预渲染')
+    parser.add_argument('--sql', action='append', default=[], help='种子SQL文件，可重复指定')
+    parser.add_argument('--export', help='export_tables.py 的输出目录（NDJSON）')
+    parser.add_argument('--base-url', required=True, help='站点地址，用于 canonical 链接')
+    parser.add_argument('--out', default='build/static', help='输出目录')
+    parser.add_argument('--jobs', type=int, help='渲染进程数（默认 CPU 核数）')
+    parser.add_argument('--force', action='store_true', help='忽略依赖图，全部重新渲染')
+    parser.add_argument('--no-brotli', action='store_true', help='不生成 .br')
+    args = parser.parse_args()
+
+    if not args.sql and not args.export:
+        parser.error('需要指定 --sql 或 --export')
+    use_brotli = not args.no_brotli
+    if use_brotli:
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            print('⚠️ 未安装 brotli，只生成 .gz', file=sys.stderr)
+            use_brotli = False
+
+    started = time.time()
+    report = build(open_source(args), args.out, args.base_url, args.jobs, args.force, use_brotli)
+    print(f'✅ 页面 {report["pages"]} 个，本次渲染 {report["rendered"]} 个、删除 {report["removed"]} 个'
+          f'（变化节点 {report["changed_nodes"]} 个，{report["bytes"] / 1024:.0f} KB），'
+          f'耗时 {time.time() - started:.1f}s')
+    if report['skipped']:
+        print(f'  ⚠️ {len(report["skipped"])} 条内容的 slug 无法用作路径，已跳过', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
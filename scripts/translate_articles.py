@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+按段去重的文章批量翻译
+
+生成的维修文章大量复用相同的段落、标题与工具清单，整篇翻译会把同样的文字翻译很多遍。
+本脚本把文章 HTML 切成可翻译的文本段并保留标记：
+  - 块级元素之间的一段文字（可含 <strong>、<a> 等行内标记）作为一个 HTML 段
+  - <img> 的 alt / title 以及 title、excerpt 列作为纯文本段
+  - <pre>、<script>、<style> 内的内容与没有文字的片段原样保留
+全库按 (格式, 源语言, 目标语言, 文本) 的哈希去重，每个不同的段只提交翻译后端一次，
+译文写入翻译记忆（translation_cache.TranslationCache，LRU + SQLite），再次运行时已翻译的段不再计费。
+记忆中的目标语言带上后端标识（stub、http:<endpoint> 或 模块:类名）与段格式，如 zh|stub|html，
+不同后端的译文互不复用，调试用的 stub 译文不会混进正式运行的结果。
+
+分两遍读取数据源：第一遍收集不同的段并翻译，第二遍逐篇重新切分、替换译文，
+生成目标语言的 articles 行（slug 追加 -<语言>，language 改为目标语言），写成多行 INSERT。
+
+后端：
+  stub          本地替身，给文本加上 [目标语言] 前缀，用于调试
+  http          POST {source, target, format, texts} 到 --endpoint，期望返回 {translations: [...]}；
+                环境变量 TRANSLATE_API_KEY 作为 Bearer 令牌
+  模块:类名      自定义后端，需实现 translate(texts, fmt, source, target) -> [译文]
+
+用法:
+  python scripts/translate_articles.py --sql supabase/migrations/56_insert_phone_repair_articles_batch1.sql \
+      --target zh --backend stub --output articles_translated_zh.sql
+  python scripts/translate_articles.py --export export --target en --backend http --endpoint https://mt.example.com/translate
+"""
+import argparse
+import hashlib
+import importlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import escape, unescape
+
+DEFAULT_MEMORY = '.translation_memory.sqlite3'
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_CHARS = 20000
+DEFAULT_COST_PER_MILLION = 20.0
+ROWS_PER_STATEMENT = 50
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LANGUAGES = ('zh', 'en')
+TEXT_COLUMNS = ('title', 'excerpt')
+
+_TOKEN = re.compile(r'<!--.*?-->|<![^>]*>|<\?[^>]*>|<[^>]+>', re.S)
+_TAG_NAME = re.compile(r'<\s*(/?)\s*([a-zA-Z][\w:-]*)')
+_ATTRIBUTE = re.compile(r'(\s(?:alt|title)\s*=\s*)(?:"([^"]*)"|\'([^\']*)\')', re.I)
+_LETTER = re.compile(r'[^\W\d_]')
+_SPACES = re.compile(r'\s+')
+_EDGES = re.compile(r'^(\s*)(.*?)(\s*)$', re.S)
+
+_INLINE = {'a', 'abbr', 'b', 'bdi', 'bdo', 'br', 'cite', 'code', 'data', 'dfn', 'em', 'i', 'kbd', 'mark',
+           'q', 's', 'samp', 'small', 'span', 'strong', 'sub', 'sup', 'time', 'u', 'var', 'wbr'}
+_VERBATIM = {'pre', 'script', 'style', 'textarea'}
+
+# ---------------------------------------------------------------- 切分
+
+class Segment:
+    __slots__ = ('text', 'fmt')
+
+    def __init__(self, text, fmt):
+        self.text = text
+        self.fmt = fmt
+
+def segment_key(text, fmt, source, target, engine):
+    data = f'{engine}\0{fmt}\0{source}\0{target}\0{text}'.encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def _has_letters(html_fragment):
+    text = unescape(_TOKEN.sub('', html_fragment))
+    return _LETTER.search(text) is not None
+
+def _flush_run(run, parts):
+    fragment = ''.join(run)
+    run.clear()
+    if not fragment:
+        return
+    if not _has_letters(fragment):
+        parts.append(fragment)
+        return
+    leading, core, trailing = _EDGES.match(fragment).groups()
+    if leading:
+        parts.append(leading)
+    parts.append(Segment(_SPACES.sub(' ', core), 'html'))
+    if trailing:
+        parts.append(trailing)
+
+def _split_attributes(tag, parts):
+    """把标签中的 alt / title 值切成纯文本段"""
+    pos = 0
+    for m in _ATTRIBUTE.finditer(tag):
+        value = m.group(2) if m.group(2) is not None else m.group(3)
+        text = _SPACES.sub(' ', unescape(value)).strip()
+        if not _LETTER.search(text):
+            continue
+        quote = '"' if m.group(2) is not None else "'"
+        parts.append(tag[pos:m.start()] + m.group(1) + quote)
+        parts.append(Segment(text, 'attr'))
+        parts.append(quote)
+        pos = m.end()
+    parts.append(tag[pos:])
+
+def split_html(html):
+    """把 HTML 切成 [字面量字符串 | Segment]，按顺序拼回即为原文（段内空白已折叠）"""
+    parts = []
+    run = []
+    verbatim = None
+    pos = 0
+    for m in _TOKEN.finditer(html):
+        text = html[pos:m.start()]
+        tag = m.group(0)
+        pos = m.end()
+        if verbatim is not None:
+            parts.append(text)
+            name = _TAG_NAME.match(tag)
+            if name and name.group(1) and name.group(2).lower() == verbatim:
+                verbatim = None
+            parts.append(tag)
+            continue
+        run.append(text)
+        name = _TAG_NAME.match(tag)
+        tag_name = name.group(2).lower() if name else None
+        if tag_name in _INLINE:
+            run.append(tag)
+            continue
+        _flush_run(run, parts)
+        if tag_name in _VERBATIM and not name.group(1) and not tag.endswith('/>'):
+            verbatim = tag_name
+        if tag_name is not None and not name.group(1):
+            _split_attributes(tag, parts)
+        else:
+            parts.append(tag)
+    if verbatim is not None:
+        parts.append(html[pos:])
+    else:
+        run.append(html[pos:])
+        _flush_run(run, parts)
+    return parts
+
+def split_text(value):
+    text = _SPACES.sub(' ', value).strip()
+    return [Segment(text, 'text')] if _LETTER.search(text) else [value]
+
+def row_parts(row):
+    """一行文章中需要翻译的列 → 切分结果"""
+    result = {}
+    if isinstance(row.get('content'), str):
+        result['content'] = split_html(row['content'])
+    for column in TEXT_COLUMNS:
+        if isinstance(row.get(column), str):
+            result[column] = split_text(row[column])
+    return result
+
+def assemble(parts, translations, source, target, engine):
+    out = []
+    for part in parts:
+        if isinstance(part, Segment):
+            translated = translations[segment_key(part.text, part.fmt, source, target, engine)]
+            out.append(escape(translated, quote=True) if part.fmt == 'attr' else translated)
+        else:
+            out.append(part)
+    return ''.join(out)
+
+# ---------------------------------------------------------------- 翻译记忆与后端
+
+class SegmentMemory:
+    """建立在 TranslationCache 之上的段翻译记忆
+
+    缓存仍以 (原文, 源语言, 目标语言) 为键，目标语言写成 <目标语言>|<后端标识>|<段格式>；
+    本次运行用到的译文按段哈希放在 translations 中，供拼装时使用。
+    """
+
+    def __init__(self, cache, target, engine):
+        self.cache = cache
+        self.target = target
+        self.engine = engine
+        self.translations = {}
+
+    def languages(self, fmt, source):
+        return source, f'{self.target}|{self.engine}|{fmt}'
+
+    def lookup(self, unique):
+        """按格式与源语言批量查询 unique 中的段，命中的记入 translations，返回未命中的段"""
+        groups = {}
+        for key, (segment, language) in unique.items():
+            groups.setdefault((segment.fmt, language), []).append((key, segment.text))
+        pending = {}
+        for (fmt, language), items in groups.items():
+            found = self.cache.get_many([text for _, text in items], *self.languages(fmt, language))
+            for key, text in items:
+                if text in found:
+                    self.translations[key] = found[text]
+                else:
+                    pending[key] = unique[key]
+        return pending
+
+    def add(self, fmt, language, batch, results):
+        """记录一批译文，batch 为 [(段哈希, 原文)]"""
+        results = list(results)
+        self.cache.put_many([(text, result) for (_, text), result in zip(batch, results)],
+                            *self.languages(fmt, language))
+        self.translations.update((key, result) for (key, _), result in zip(batch, results))
+        # 译文是付费得到的：每批都立即写回 SQLite，中途退出也不会丢
+        self.cache.flush()
+
+class StubBackend:
+    """本地替身：在文本前加 [目标语言]，记录调用次数与字符数"""
+
+    def __init__(self, args=None):
+        self.calls = 0
+        self.chars = 0
+
+    def translate(self, texts, fmt, source, target):
+        self.calls += 1
+        self.chars += sum(len(t) for t in texts)
+        return [f'[{target}] {text}' for text in texts]
+
+class HttpBackend:
+    """通用 HTTP 翻译接口"""
+
+    def __init__(self, args):
+        import requests
+        if not args.endpoint:
+            raise SystemExit('❌ --backend http 需要 --endpoint')
+        self.endpoint = args.endpoint
+        self.session = requests.Session()
+        key = os.getenv('TRANSLATE_API_KEY')
+        self.headers = {'Authorization': f'Bearer {key}'} if key else {}
+
+    def translate(self, texts, fmt, source, target):
+        payload = {'source': source, 'target': target, 'format': 'text' if fmt == 'attr' else fmt, 'texts': texts}
+        for attempt in range(4):
+            response = self.session.post(self.endpoint, json=payload, headers=self.headers, timeout=120)
+            if response.status_code == 200:
+                translations = response.json()['translations']
+                if len(translations) != len(texts):
+                    raise RuntimeError(f'翻译接口返回 {len(translations)} 条，期望 {len(texts)} 条')
+                return translations
+            if response.status_code not in (429, 500, 502, 503, 504):
+                break
+            time.sleep(2 ** attempt)
+        raise RuntimeError(f'翻译失败: HTTP {response.status_code}: {response.text[:200]}')
+
+BACKENDS = {'stub': StubBackend, 'http': HttpBackend}
+
+def backend_identity(spec, args):
+    """翻译记忆中区分后端的标识；http 后端按接口地址区分"""
+    if spec == 'http':
+        return f'http:{args.endpoint or ""}'
+    return spec
+
+def load_backend(spec, args):
+    if spec in BACKENDS:
+        return BACKENDS[spec](args)
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise SystemExit(f'❌ 未知的翻译后端: {spec}（可选 {", ".join(BACKENDS)} 或 模块:类名）')
+    return getattr(importlib.import_module(module_name), class_name)(args)
+
+def make_batches(pending, batch_size, batch_chars):
+    """pending: {key: (Segment, 源语言)}，按格式与源语言分组，再按段数与字符数切批"""
+    groups = {}
+    for key, (segment, language) in pending.items():
+        groups.setdefault((segment.fmt, language), []).append((key, segment.text))
+    for (fmt, language), items in groups.items():
+        batch = []
+        size = 0
+        for key, text in items:
+            if batch and (len(batch) >= batch_size or size + len(text) > batch_chars):
+                yield fmt, language, batch
+                batch, size = [], 0
+            batch.append((key, text))
+            size += len(text)
+        if batch:
+            yield fmt, language, batch
+
+# ---------------------------------------------------------------- 主流程
+
+def source_language(row):
+    return row.get('language') or 'zh'
+
+class Report:
+    def __init__(self):
+        self.articles = 0
+        self.segments = 0
+        self.chars = 0
+        self.unique = 0
+        self.unique_chars = 0
+        self.cached = 0
+        self.billed_chars = 0
+
+def collect(source, target, engine):
+    """第一遍：统计全部段并按哈希去重，返回 ({key: (Segment, 源语言)}, Report)"""
+    unique = {}
+    report = Report()
+    for row in source.rows('articles', '*'):
+        language = source_language(row)
+        if language == target:
+            continue
+        report.articles += 1
+        for parts in row_parts(row).values():
+            for part in parts:
+                if isinstance(part, Segment):
+                    report.segments += 1
+                    report.chars += len(part.text)
+                    unique.setdefault(segment_key(part.text, part.fmt, language, target, engine), (part, language))
+    report.unique = len(unique)
+    report.unique_chars = sum(len(s.text) for s, _ in unique.values())
+    return unique, report
+
+def pending_segments(unique, memory, report):
+    """翻译记忆中没有的段，同时更新报告中的命中数与计费字符数"""
+    pending = memory.lookup(unique)
+    report.cached = len(unique) - len(pending)
+    report.billed_chars = sum(len(s.text) for s, _ in pending.values())
+    return pending
+
+def translate_pending(pending, memory, backend, target, args):
+    """把待翻译的段分批提交给后端，译文随批写入翻译记忆"""
+    batches = list(make_batches(pending, args.batch_size, args.batch_chars))
+    print(f'🌐 提交 {len(pending)} 个段（{len(batches)} 批）')
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(backend.translate, [text for _, text in batch], fmt, language, target):
+                   (fmt, language, batch)
+                   for fmt, language, batch in batches}
+        done = 0
+        for future in as_completed(futures):
+            fmt, language, batch = futures[future]
+            memory.add(fmt, language, batch, future.result())
+            done += 1
+            if done % 20 == 0 or done == len(batches):
+                print(f'  ✅ {done}/{len(batches)} 批')
+
+def translate_rows(source, target, translations, engine):
+    """第二遍：逐篇替换译文，产出目标语言的行"""
+    from article_precompute import PRECOMPUTED_COLUMNS
+    for row in source.rows('articles', '*'):
+        language = source_language(row)
+        if language == target:
+            continue
+        result = {k: v for k, v in row.items() if k != 'id' and k not in PRECOMPUTED_COLUMNS}
+        for column, parts in row_parts(row).items():
+            result[column] = assemble(parts, translations, language, target, engine)
+        result['slug'] = f'{row["slug"]}-{target}'
+        result['language'] = target
+        yield result
+
+def main():
+    parser = argparse.ArgumentParser(description='按段去重的文章批量翻译')
+    parser.add_argument('--sql', action='append', default=[], help='种子SQL文件，可重复指定')
+    parser.add_argument('--export', help='export_tables.py 的输出目录（NDJSON）')
+    parser.add_argument('--target', choices=LANGUAGES, required=True, help='目标语言')
+    parser.add_argument('--backend', default='stub', help='stub、http 或 模块:类名')
+    parser.add_argument('--endpoint', help='http 后端的接口地址')
+    parser.add_argument('--memory', default=DEFAULT_MEMORY, help='翻译记忆文件（TranslationCache 的 SQLite 文件）')
+    parser.add_argument('--output', help='输出的 INSERT 文件（默认 articles_translated_<目标语言>.sql）')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='每批最多段数')
+    parser.add_argument('--batch-chars', type=int, default=DEFAULT_BATCH_CHARS, help='每批最多字符数')
+    parser.add_argument('--jobs', type=int, default=4, help='同时进行的翻译请求数')
+    parser.add_argument('--cost-per-million', type=float, default=DEFAULT_COST_PER_MILLION,
+                        help='每百万字符的翻译费用（用于估算节省）')
+    parser.add_argument('--dry-run', action='store_true', help='只统计去重效果，不翻译')
+    args = parser.parse_args()
+
+    if not args.sql and not args.export:
+        parser.error('需要指定 --sql 或 --export')
+    from static_render import open_source
+    source = open_source(args)
+
+    engine = backend_identity(args.backend, args)
+    unique, report = collect(source, args.target, engine)
+    # translation_cache.py 在仓库根目录
+    if ROOT_DIR not in sys.path:
+        sys.path.append(ROOT_DIR)
+    from translation_cache import TranslationCache
+    with TranslationCache(args.memory) as cache:
+        memory = SegmentMemory(cache, args.target, engine)
+        pending = pending_segments(unique, memory, report)
+        if not args.dry_run:
+            if pending:
+                translate_pending(pending, memory, load_backend(args.backend, args), args.target, args)
+            from direct_insert_articles import write_chunked_inserts
+            output = args.output or f'articles_translated_{args.target}.sql'
+            written = 0
+            with open(output, 'w', encoding='utf-8') as f:
+                batch = []
+                for row in translate_rows(source, args.target, memory.translations, engine):
+                    batch.append(row)
+                    if len(batch) >= ROWS_PER_STATEMENT:
+                        write_chunked_inserts(f, 'articles', batch, ROWS_PER_STATEMENT)
+                        written += len(batch)
+                        batch = []
+                if batch:
+                    write_chunked_inserts(f, 'articles', batch, ROWS_PER_STATEMENT)
+                    written += len(batch)
+            print(f'✅ 已写出 {written} 篇 {args.target} 文章: {output}')
+
+    ratio = 1 - report.unique / report.segments if report.segments else 0.0
+    saved_chars = report.chars - report.billed_chars
+    rate = args.cost_per_million / 1_000_000
+    print(f'📊 文章 {report.articles} 篇，段 {report.segments} 个，去重后 {report.unique} 个（去重率 {ratio:.1%}）')
+    print(f'💰 原文 {report.chars} 字符，去重后 {report.unique_chars} 字符，翻译记忆命中 {report.cached} 个段，'
+          f'实际提交 {report.billed_chars} 字符')
+    print(f'   按 {args.cost_per_million:g}/百万字符估算：整篇翻译 {report.chars * rate:.2f}，'
+          f'本次 {report.billed_chars * rate:.2f}，节省 {saved_chars * rate:.2f}')
+
+if __name__ == '__main__':
+    main()
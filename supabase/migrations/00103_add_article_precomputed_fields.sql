@@ -0,0 +1,29 @@
+/*
+# 为articles表添加加载时预计算的字段
+
+## 说明
+文章正文是较大的 HTML，目录、图片列表、字数与阅读时间原本在每次浏览时由前端计算。
+现在由 scripts/article_precompute.py 在加载时计算一次并随文章写入。
+
+## 变更内容
+1. toc：标题大纲，jsonb 数组 [{level, text, id}]
+2. image_urls：正文图片地址，jsonb 数组
+3. word_count：字数（英文按单词，中日韩文字按字）
+4. reading_time：预计阅读分钟数
+5. content_hash：content 的 SHA-256，用于判断是否需要重新计算
+
+## 注意事项
+- 已有文章的这些字段为空，前端应在为空时回退到原来的计算方式
+*/
+
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS toc jsonb;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS image_urls jsonb;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS word_count integer;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS reading_time integer;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS content_hash text;
+
+COMMENT ON COLUMN articles.toc IS '标题大纲：[{level, text, id}]，加载时预计算';
+COMMENT ON COLUMN articles.image_urls IS '正文图片地址列表，加载时预计算';
+COMMENT ON COLUMN articles.word_count IS '字数，加载时预计算';
+COMMENT ON COLUMN articles.reading_time IS '预计阅读分钟数，加载时预计算';
+COMMENT ON COLUMN articles.content_hash IS 'content 的 SHA-256';
@@ -0,0 +1,63 @@
+/*
+# 页面访问批量写入函数
+
+## 说明
+scripts/pageview_ingest.py 在内存中缓冲访问事件，每次刷新只调用一次本函数，
+在同一个事务里完成：
+1. 多行插入 page_views
+2. 补写已写入访问记录的停留时长
+3. 每个会话一行 upsert visitor_sessions，计数器在服务中已合并，这里做增量累加
+
+## 参数
+- p_views：page_views 行数组（含服务生成的 id 与 created_at）
+- p_durations：[{id, duration}]，已写入的访问记录的停留时长
+- p_sessions：[{session_id, visitor_id, first_visit, last_visit, page_views_count, total_duration}]
+
+## 注意事项
+- 只允许 service_role 调用，采集服务使用服务端密钥
+*/
+
+CREATE OR REPLACE FUNCTION ingest_page_view_batch(
+  p_views jsonb DEFAULT '[]'::jsonb,
+  p_durations jsonb DEFAULT '[]'::jsonb,
+  p_sessions jsonb DEFAULT '[]'::jsonb
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  INSERT INTO page_views (
+    id, visitor_id, session_id, page_url, page_title, referrer,
+    user_agent, device_type, browser, os, ip_address,
+    country, region, city, duration, created_at
+  )
+  SELECT
+    id, visitor_id, session_id, page_url, page_title, referrer,
+    user_agent, device_type, browser, os, ip_address,
+    country, region, city, COALESCE(duration, 0), COALESCE(created_at, now())
+  FROM jsonb_populate_recordset(NULL::page_views, p_views);
+
+  UPDATE page_views pv
+  SET duration = d.duration
+  FROM jsonb_to_recordset(p_durations) AS d(id uuid, duration integer)
+  WHERE pv.id = d.id;
+
+  INSERT INTO visitor_sessions (
+    visitor_id, session_id, first_visit, last_visit, page_views_count, total_duration
+  )
+  SELECT visitor_id, session_id, first_visit, last_visit, page_views_count, total_duration
+  FROM jsonb_to_recordset(p_sessions) AS s(
+    visitor_id text, session_id text, first_visit timestamptz, last_visit timestamptz,
+    page_views_count integer, total_duration integer
+  )
+  ON CONFLICT (session_id) DO UPDATE SET
+    first_visit = LEAST(visitor_sessions.first_visit, EXCLUDED.first_visit),
+    last_visit = GREATEST(visitor_sessions.last_visit, EXCLUDED.last_visit),
+    page_views_count = visitor_sessions.page_views_count + EXCLUDED.page_views_count,
+    total_duration = visitor_sessions.total_duration + EXCLUDED.total_duration;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ingest_page_view_batch(jsonb, jsonb, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ingest_page_view_batch(jsonb, jsonb, jsonb) TO service_role;
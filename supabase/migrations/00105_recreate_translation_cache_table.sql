@@ -0,0 +1,69 @@
+/*
+# 重建翻译缓存表
+
+## 说明
+迁移 00093 删除了 translation_cache。translation_cache.py 的本地缓存需要与服务端同步
+（拉取其他机器的译文、推送本地译文与命中数），这里按 00091 的结构重建该表。
+
+## 表结构
+- (source_text, source_lang, target_lang) 唯一，推送时按该键 upsert
+- updated_at 由触发器维护，拉取时以它为水位线（按 updated_at 排序分页）
+- hit_count 由 increment_translation_cache_hits（迁移 00106）按增量累加
+
+## 权限
+- 所有人可读，认证用户可写入与更新（与 00091 一致）
+*/
+
+CREATE TABLE IF NOT EXISTS translation_cache (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  source_text TEXT NOT NULL,
+  source_lang VARCHAR(10) NOT NULL DEFAULT 'en',
+  target_lang VARCHAR(10) NOT NULL,
+  translated_text TEXT NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  hit_count INTEGER DEFAULT 1,
+  UNIQUE(source_text, source_lang, target_lang)
+);
+
+CREATE INDEX IF NOT EXISTS idx_translation_cache_updated
+ON translation_cache(updated_at, source_text);
+
+CREATE INDEX IF NOT EXISTS idx_translation_cache_created
+ON translation_cache(created_at DESC);
+
+ALTER TABLE translation_cache ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "翻译缓存公开可读" ON translation_cache;
+CREATE POLICY "翻译缓存公开可读"
+ON translation_cache FOR SELECT
+TO public
+USING (true);
+
+DROP POLICY IF EXISTS "认证用户可写翻译缓存" ON translation_cache;
+CREATE POLICY "认证用户可写翻译缓存"
+ON translation_cache FOR INSERT
+TO authenticated
+WITH CHECK (true);
+
+DROP POLICY IF EXISTS "认证用户可更新翻译缓存" ON translation_cache;
+CREATE POLICY "认证用户可更新翻译缓存"
+ON translation_cache FOR UPDATE
+TO authenticated
+USING (true);
+
+COMMENT ON TABLE translation_cache IS '翻译缓存表，存储已翻译的文本';
+
+CREATE OR REPLACE FUNCTION update_translation_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at = now();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_translation_cache_updated_at ON translation_cache;
+CREATE TRIGGER update_translation_cache_updated_at
+  BEFORE UPDATE ON translation_cache
+  FOR EACH ROW
+  EXECUTE FUNCTION update_translation_updated_at();
@@ -0,0 +1,38 @@
+/*
+# 翻译缓存命中数批量累加函数
+
+## 说明
+translation_cache.py 推送本地命中数时，不能用 upsert 写入 hit_count 的绝对值，
+否则会覆盖其他机器记录的命中。本函数按键把增量累加到远端的 hit_count 上，
+每批只需一次调用。
+
+## 参数
+- p_rows：[{source_text, source_lang, target_lang, hits}]
+
+## 注意事项
+- 针对迁移 00105 重建的 translation_cache 表；不存在的键会被忽略（先推送译文再推送命中数）
+- 返回实际更新的行数
+*/
+
+CREATE OR REPLACE FUNCTION increment_translation_cache_hits(p_rows jsonb DEFAULT '[]'::jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+  v_updated integer;
+BEGIN
+  UPDATE translation_cache tc
+  SET hit_count = tc.hit_count + r.hits
+  FROM jsonb_to_recordset(p_rows) AS r(source_text text, source_lang text, target_lang text, hits integer)
+  WHERE tc.source_text = r.source_text
+    AND tc.source_lang = r.source_lang
+    AND tc.target_lang = r.target_lang
+    AND r.hits > 0;
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION increment_translation_cache_hits(jsonb) FROM PUBLIC, anon;
+GRANT EXECUTE ON FUNCTION increment_translation_cache_hits(jsonb) TO authenticated;
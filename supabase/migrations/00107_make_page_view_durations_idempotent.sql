@@ -0,0 +1,89 @@
+/*
+# 停留时长按差额计入会话
+
+## 说明
+迁移 00104 的 ingest_page_view_batch 把每次刷新的停留时长直接累加到
+visitor_sessions.total_duration：同一访问的时长被重复上报或整批重试时会重复累加，
+时长事件指向不存在的访问时也会凭空创建会话行。
+
+本迁移重新定义该函数：
+1. 多行插入 page_views（不变）
+2. 每个会话一行 upsert visitor_sessions，只包含本批新访问的计数器（不变）
+3. p_durations 视为访问的最新停留时长：先锁住并读出已存储的时长，写入新值，
+   只把两者的差额计入所属会话。同一时长再次写入差额为 0，因此重复与重试都是幂等的
+4. 不存在的访问 id 直接忽略，不改动任何会话
+
+## 参数
+- p_views：page_views 行数组（含服务生成的 id 与 created_at）
+- p_durations：[{id, duration}]，同一 id 出现多次时以最后一个为准
+- p_sessions：[{session_id, visitor_id, first_visit, last_visit, page_views_count, total_duration}]
+
+## 注意事项
+- 会话 upsert 在补写时长之前执行：同一批中新插入的访问也能按差额调整时长
+- 只允许 service_role 调用，采集服务使用服务端密钥
+*/
+
+CREATE OR REPLACE FUNCTION ingest_page_view_batch(
+  p_views jsonb DEFAULT '[]'::jsonb,
+  p_durations jsonb DEFAULT '[]'::jsonb,
+  p_sessions jsonb DEFAULT '[]'::jsonb
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+BEGIN
+  INSERT INTO page_views (
+    id, visitor_id, session_id, page_url, page_title, referrer,
+    user_agent, device_type, browser, os, ip_address,
+    country, region, city, duration, created_at
+  )
+  SELECT
+    id, visitor_id, session_id, page_url, page_title, referrer,
+    user_agent, device_type, browser, os, ip_address,
+    country, region, city, COALESCE(duration, 0), COALESCE(created_at, now())
+  FROM jsonb_populate_recordset(NULL::page_views, p_views);
+
+  INSERT INTO visitor_sessions (
+    visitor_id, session_id, first_visit, last_visit, page_views_count, total_duration
+  )
+  SELECT visitor_id, session_id, first_visit, last_visit, page_views_count, total_duration
+  FROM jsonb_to_recordset(p_sessions) AS s(
+    visitor_id text, session_id text, first_visit timestamptz, last_visit timestamptz,
+    page_views_count integer, total_duration integer
+  )
+  ON CONFLICT (session_id) DO UPDATE SET
+    first_visit = LEAST(visitor_sessions.first_visit, EXCLUDED.first_visit),
+    last_visit = GREATEST(visitor_sessions.last_visit, EXCLUDED.last_visit),
+    page_views_count = visitor_sessions.page_views_count + EXCLUDED.page_views_count,
+    total_duration = visitor_sessions.total_duration + EXCLUDED.total_duration;
+
+  WITH latest AS (
+    SELECT DISTINCT ON (d.id) d.id, d.duration
+    FROM ROWS FROM (jsonb_to_recordset(p_durations) AS (id uuid, duration integer))
+      WITH ORDINALITY AS d(id, duration, n)
+    ORDER BY d.id, d.n DESC
+  ),
+  previous AS (
+    SELECT pv.id, pv.session_id, COALESCE(pv.duration, 0) AS old_duration, latest.duration AS new_duration
+    FROM page_views pv
+    JOIN latest ON latest.id = pv.id
+    FOR UPDATE OF pv
+  ),
+  changed AS (
+    UPDATE page_views pv
+    SET duration = previous.new_duration
+    FROM previous
+    WHERE pv.id = previous.id
+      AND previous.old_duration <> previous.new_duration
+    RETURNING pv.session_id, previous.new_duration - previous.old_duration AS delta
+  )
+  UPDATE visitor_sessions vs
+  SET total_duration = GREATEST(0, vs.total_duration + c.delta)
+  FROM (SELECT session_id, SUM(delta) AS delta FROM changed GROUP BY session_id) c
+  WHERE vs.session_id = c.session_id;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ingest_page_view_batch(jsonb, jsonb, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION ingest_page_view_batch(jsonb, jsonb, jsonb) TO service_role;
@@ -0,0 +1,23 @@
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'scripts')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def postgrest():
+    """在随机端口启动 scripts/postgrest_stub.py，返回 server（.store 为内存数据，.url 为地址）"""
+    from postgrest_stub import StubStore, serve
+    server = serve(port=0, store=StubStore(unique_columns=()))
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
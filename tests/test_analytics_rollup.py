@@ -0,0 +1,85 @@
+import csv
+import json
+import time
+
+from analytics_rollup import Rollup, iter_file_chunks, make_watermark, to_arrays, utc_day
+
+
+def view(i, session, created_at, visitor='v1'):
+    return {'id': i, 'visitor_id': visitor, 'session_id': session, 'duration': 10, 'created_at': created_at}
+
+
+def run(state, rows):
+    rollup = Rollup.load(state)
+    rollup.add(*to_arrays(rows))
+    rollup.save(state)
+    return {row['date']: row for row in rollup.changed_rows()}
+
+
+def test_late_view_does_not_recount_closed_session(tmp_path):
+    state = str(tmp_path / 'state.json')
+    run(state, [view(1, 's1', '2024-03-01T10:00:00Z'), view(2, 's2', '2024-03-01T11:00:00Z')])
+    # s1、s2 在 03-05 的数据到达后结束，各只有一次浏览
+    rows = run(state, [view(3, 's3', '2024-03-05T10:00:00Z')])
+    assert Rollup.load(state).summary(19783)['bounce_rate'] == 100.0
+    assert '2024-03-05' in rows
+    # s1 的迟到浏览：不再算成新会话，03-01 的跳出数减一
+    rows = run(state, [view(4, 's1', '2024-03-05T12:00:00Z')])
+    assert rows['2024-03-01']['bounce_rate'] == 50.0
+    march_5 = rows['2024-03-05']
+    assert march_5['total_views'] == 2
+    assert march_5['bounce_rate'] == 100.0
+    rollup = Rollup.load(state)
+    assert rollup.days[19783]['sessions'] == 2
+    assert rollup.session_keys.size == 1
+    # 再次迟到不会重复修正
+    rows = run(state, [view(5, 's1', '2024-03-05T13:00:00Z')])
+    assert rows.keys() == {'2024-03-05'}
+    assert Rollup.load(state).summary(19783)['bounce_rate'] == 50.0
+
+
+def test_closed_keys_pruned_after_retention(tmp_path):
+    state = str(tmp_path / 'state.json')
+    run(state, [view(1, 's1', '2024-01-01T10:00:00Z')])
+    run(state, [view(2, 's2', '2024-03-01T10:00:00Z')])
+    rollup = Rollup.load(state)
+    assert rollup.closed_keys.size == 0
+    assert rollup.days[19723]['sessions'] == 1
+
+
+def test_naive_timestamps_are_utc(monkeypatch):
+    # 运行机器在 UTC 以西时，按本地时间解析会把 23:30 挪到第二天
+    monkeypatch.setenv('TZ', 'America/Los_Angeles')
+    time.tzset()
+    try:
+        march_1 = utc_day('2024-03-01')
+        assert utc_day('2024-03-01T23:30:00') == march_1
+        assert utc_day('2024-03-01 23:30:00.123') == march_1
+        assert utc_day('2024-03-01T23:30:00Z') == march_1
+        assert utc_day('2024-03-01T23:30:00-05:00') == march_1 + 1
+        assert utc_day('2024-03-02T01:00:00+08:00') == march_1
+        assert make_watermark({'created_at': '2024-03-01 23:30:00', 'id': 7}) == ('2024-03-01T23:30:00+00:00', '7')
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
+
+
+def test_csv_and_ndjson_agree_on_watermark(tmp_path):
+    rows = [
+        {'id': 'a', 'visitor_id': 'v', 'session_id': 's', 'duration': 1, 'created_at': '2024-03-01 10:00:00+00'},
+        {'id': 'c', 'visitor_id': 'v', 'session_id': 's', 'duration': 1, 'created_at': '2024-03-01 10:00:00+00'},
+        {'id': 'b', 'visitor_id': 'v', 'session_id': 's', 'duration': 1, 'created_at': '2024-03-01T11:00:00+01:00'},
+        {'id': 'd', 'visitor_id': 'v', 'session_id': 's', 'duration': 1, 'created_at': '2024-03-01T10:00:01'},
+    ]
+    csv_path = tmp_path / 'views.csv'
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    ndjson_path = tmp_path / 'views.ndjson'
+    ndjson_path.write_text(''.join(json.dumps(row) + '\n' for row in rows), encoding='utf-8')
+    # 水位线写法与导出不同：按时刻比较，同一时刻再按 id
+    watermark = ('2024-03-01T10:00:00Z', 'b')
+    for path in (csv_path, ndjson_path):
+        ids = [row['id'] for chunk in iter_file_chunks(str(path), watermark, 2) for row in chunk]
+        assert ids == ['c', 'd']
@@ -0,0 +1,73 @@
+import sys
+import types
+
+import batch_insert_articles
+from article_precompute import EXCERPT_LENGTH, make_excerpt, precompute, precompute_row, precompute_rows
+
+
+def test_toc_ids_are_deduplicated_in_order():
+    result = precompute('<h2>Tools</h2><p>a</p><h2> Tools </h2><h3>Tools!</h3><h2><em>Step</em> 1</h2><h4> </h4>')
+    assert result['toc'] == [
+        {'level': 2, 'text': 'Tools', 'id': 'tools'},
+        {'level': 2, 'text': 'Tools', 'id': 'tools-2'},
+        {'level': 3, 'text': 'Tools!', 'id': 'tools-3'},
+        {'level': 2, 'text': 'Step 1', 'id': 'step-1'},
+    ]
+
+
+def test_script_and_style_are_skipped():
+    result = precompute('<p>Open the case.</p><script>var words = "many more words";</script>'
+                        '<style>p { color: red }</style><noscript>enable js</noscript>'
+                        '<img src="a.jpg"><img src="b.jpg"><img src="a.jpg">')
+    assert result['word_count'] == 3
+    assert result['excerpt'] == 'Open the case.'
+    assert result['image_urls'] == ['a.jpg', 'b.jpg']
+
+
+def test_cjk_characters_count_individually():
+    result = precompute('<p>更换屏幕需要 heat gun 和吸盘。</p><p>ねじを外す</p>')
+    # 更换屏幕需要 + 和吸盘 = 9 个汉字，ねじを外す = 5 个假名/汉字，2 个英文单词
+    assert result['word_count'] == 9 + 5 + 2
+    assert result['reading_time'] == 1
+    long_text = precompute('<p>' + '字' * 4000 + '</p>')
+    assert long_text['reading_time'] == 10
+
+
+def test_excerpt_truncation():
+    text = ' '.join(['screen'] * 60)
+    excerpt = make_excerpt(text)
+    assert excerpt.endswith('screen…')
+    assert len(excerpt) <= EXCERPT_LENGTH + 1
+    # 没有合适的空格时直接按长度截断，并去掉结尾的标点
+    assert make_excerpt('长' * 159 + '，' + '尾' * 10) == '长' * 159 + '…'
+    assert make_excerpt('short') == 'short'
+    kept = precompute_row({'content': '<p>' + text + '</p>', 'excerpt': 'manual'})
+    assert kept['excerpt'] == 'manual' and kept['word_count'] == 60
+
+
+def test_precompute_rows_is_lazy():
+    seen = []
+
+    def rows():
+        for i in range(3):
+            seen.append(i)
+            yield i, {'content': f'<p>row {i}</p>'}
+
+    stream = precompute_rows(rows())
+    assert isinstance(stream, types.GeneratorType) and seen == []
+    assert next(stream)[1]['word_count'] == 2
+    assert seen == [0]
+
+
+def test_bulk_loader_precompute(postgrest, tmp_path, monkeypatch):
+    sql = tmp_path / 'articles.sql'
+    sql.write_text("INSERT INTO articles (title, slug, content) VALUES "
+                   "('A', 'a', '<h2>Intro</h2><p>Hello world</p>'), ('B', 'b', NULL);\n", encoding='utf-8')
+    monkeypatch.setattr(sys, 'argv', ['batch_insert_articles.py', '--file', str(sql), '--bulk', '--precompute',
+                                      '--url', postgrest.url])
+    batch_insert_articles.main()
+    rows = {row['slug']: row for row in postgrest.store.tables['articles']}
+    assert rows['a']['toc'] == [{'level': 2, 'text': 'Intro', 'id': 'intro'}]
+    assert rows['a']['word_count'] == 3 and rows['a']['excerpt'] == 'Intro Hello world'
+    assert len(rows['a']['content_hash']) == 64
+    assert 'toc' not in rows['b']
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+import async_insert_articles
+
+
+def rows(n):
+    return [(i, {'title': f't{i}', 'slug': f's{i}', 'content': 'x'}) for i in range(n)]
+
+
+def test_load_inserts_all_rows(postgrest):
+    url = postgrest.url
+    stats, failures = asyncio.run(async_insert_articles.load(rows(25), url, 4, 3, 1000, 0))
+    assert failures == []
+    assert stats.rows_ok == 25
+    assert len(postgrest.store.tables['articles']) == 25
+
+
+def test_worker_crash_cancels_producer(postgrest, monkeypatch):
+    async def broken(*args, **kwargs):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(async_insert_articles, 'post_batch', broken)
+    url = postgrest.url
+
+    async def run():
+        # 批次数远多于队列容量：生产者若不被取消就会永远卡在 queue.put
+        return await asyncio.wait_for(async_insert_articles.load(rows(200), url, 1, 1, 1000, 0), timeout=10)
+
+    with pytest.raises(ExceptionGroup) as info:
+        asyncio.run(run())
+    assert info.group_contains(RuntimeError, match='boom')
+
+
+def test_rows_are_pulled_lazily(monkeypatch):
+    pulled = []
+    seen_at_first_post = []
+
+    def generate(n):
+        for item in rows(n):
+            pulled.append(item[0])
+            yield item
+
+    async def slow(session, url, headers, batch, limiter, stats, retries):
+        if not seen_at_first_post:
+            seen_at_first_post.append(len(pulled))
+        await asyncio.sleep(0)
+        return None
+
+    monkeypatch.setattr(async_insert_articles, 'post_batch', slow)
+    stats, failures = asyncio.run(async_insert_articles.load(generate(5000), 'http://unused', 10, 2, 1000, 0))
+    assert stats.rows_ok == 5000 and failures == []
+    # 队列容量为 concurrency * 2 批：第一次写入前最多只读了这么多行（再加上生产者手上的一批）
+    assert seen_at_first_post[0] <= 10 * (2 * 2 + 1)
+
+
+def test_statement_rows_stream_with_failures(tmp_path):
+    from batch_insert_articles import iter_statement_rows
+    from sql_stream import iter_insert_statements
+
+    path = tmp_path / 'a.sql'
+    path.write_text("INSERT INTO articles (title, slug) VALUES ('a', 'a'), ('b', 'b');\n"
+                    "INSERT INTO articles (title, slug) VALUES ('c', nextval('x'));\n"
+                    "INSERT INTO articles (title, slug) VALUES ('d', 'd');\n", encoding='utf-8')
+    failures = []
+    stream = iter_statement_rows(iter_insert_statements(str(path)), failures)
+    assert next(stream) == (1, {'title': 'a', 'slug': 'a'})
+    assert failures == []
+    assert [i for i, _ in stream] == [2, 4]
+    assert [i for i, _ in failures] == [3]
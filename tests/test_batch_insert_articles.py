@@ -0,0 +1,88 @@
+import requests
+
+import batch_insert_articles
+from batch_insert_articles import bulk_insert, insert_batch, insert_isolating
+
+
+class FlakySession(requests.Session):
+    """前 failures 次 POST 直接返回 503，其余正常转发"""
+
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.posts = []
+
+    def post(self, url, **kwargs):
+        self.posts.append(len(kwargs.get('json') or []))
+        if len(self.posts) <= self.failures:
+            response = requests.Response()
+            response.status_code = 503
+            response._content = b'{"message": "unavailable"}'
+            return response
+        return super().post(url, **kwargs)
+
+
+def rows(n, offset=0):
+    return [(i, {'title': f't{i}', 'slug': f's{i}'}) for i in range(offset, offset + n)]
+
+
+def no_sleep(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(batch_insert_articles.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_insert_batch_retries_on_5xx(postgrest, monkeypatch):
+    sleeps = no_sleep(monkeypatch)
+    session = FlakySession(failures=2)
+    assert insert_batch(session, postgrest.url, [row for _, row in rows(3)], 3) == (True, False, None)
+    assert session.posts == [3, 3, 3]
+    assert sleeps == [0.5, 1.0]
+    assert len(postgrest.store.tables['articles']) == 3
+
+
+def test_insert_batch_gives_up_after_retries(postgrest, monkeypatch):
+    no_sleep(monkeypatch)
+    postgrest.store.fail_rate = 1.0
+    ok, retryable, error = insert_batch(requests.Session(), postgrest.url, [row for _, row in rows(3)], 2)
+    assert (ok, retryable) == (False, True) and error.startswith('HTTP 503')
+    assert postgrest.store.request_count == 3
+
+
+def test_isolating_bisects_to_the_bad_row(postgrest, monkeypatch):
+    no_sleep(monkeypatch)
+    postgrest.store.unique_columns = ('slug',)
+    postgrest.store.tables['articles'] = [{'title': 'existing', 'slug': 's5'}]
+    session = FlakySession()
+    failures = insert_isolating(session, postgrest.url, rows(8), 3)
+    assert [(i, slug) for i, slug, _ in failures] == [(5, 's5')]
+    assert failures[0][2].startswith('HTTP 409')
+    # 只继续拆分失败的一半：8 -> 4(成功)+4 -> 2+2(成功) -> 1(成功)+1；4xx 不重试
+    assert session.posts == [8, 4, 4, 2, 1, 1, 2]
+    assert sorted(r['slug'] for r in postgrest.store.tables['articles']) == [f's{i}' for i in range(8)]
+
+
+def test_isolating_does_not_bisect_retryable_failures(postgrest, monkeypatch):
+    no_sleep(monkeypatch)
+    postgrest.store.fail_rate = 1.0
+    failures = insert_isolating(requests.Session(), postgrest.url, rows(4), 1)
+    assert [(i, slug) for i, slug, _ in failures] == [(i, f's{i}') for i in range(4)]
+    assert postgrest.store.request_count == 2
+
+
+def test_bulk_insert_reports_failure_set(postgrest, monkeypatch):
+    no_sleep(monkeypatch)
+    postgrest.store.unique_columns = ('slug',)
+    postgrest.store.tables['articles'] = [{'title': 'existing', 'slug': 'b'}]
+    monkeypatch.setattr(batch_insert_articles, '_session', requests.Session())
+    statements = [
+        "INSERT INTO articles (title, slug) VALUES ('A', 'a'), ('B', 'b'), ('C', 'c');",
+        "INSERT INTO articles (title, slug) VALUES ('D', nextval('seq'));",
+        "INSERT INTO articles (title, slug) VALUES ('E', 'e'), ('F', 'b');",
+    ]
+    success, failures = bulk_insert(statements, 2, 1, postgrest.url)
+    assert success == 3
+    # 按文章编号排序：唯一约束冲突的行带 slug，无法解析的行 slug 为 None
+    assert [(i, slug) for i, slug, _ in failures] == [(2, 'b'), (4, None), (6, 'b')]
+    assert failures[1][2].startswith('不支持的SQL表达式')
+    assert sorted(r['slug'] for r in postgrest.store.tables['articles']) == ['a', 'b', 'c', 'e']
@@ -0,0 +1,72 @@
+import json
+import sys
+
+import pytest
+
+import batch_translate
+import translate_dict
+import translate_manifest
+
+FILES = {
+    'a.tsx': 'const a = "保存";\nconst b = "取消订单";\n',
+    'b.ts': 'const c = "删除";\n',
+}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for name, content in FILES.items():
+        (src / name).write_text(content, encoding='utf-8')
+    source = tmp_path / 'zh-en.tsv'
+    source.write_text('保存\tSave\n删除\tDelete\n', encoding='utf-8')
+    monkeypatch.setattr(batch_translate, 'DICTIONARY_SOURCE', str(source))
+    monkeypatch.setattr(batch_translate, 'DICTIONARY_ARTIFACT', str(tmp_path / 'zh-en.bin'))
+    manifest = str(tmp_path / 'manifest.json')
+
+    def run():
+        # 每次运行都是新进程：清掉缓存的字典与匹配器
+        monkeypatch.setattr(batch_translate, '_translations', None)
+        monkeypatch.setattr(batch_translate, '_default_matcher', None)
+        monkeypatch.setattr(sys, 'argv', ['batch_translate.py', '--src', str(src), '--manifest', manifest])
+        batch_translate.main()
+
+    return src, source, manifest, run
+
+
+def test_manifest_stores_only_dictionary_hash(project, capsys):
+    src, _, manifest, run = project
+    run()
+    assert (src / 'a.tsx').read_text(encoding='utf-8') == 'const a = "Save";\nconst b = "取消订单";\n'
+    with open(manifest, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['version'] == translate_manifest.MANIFEST_VERSION
+    assert set(data) == {'version', 'dict_hash', 'scope', 'files'}
+    assert len(translate_manifest.load_digests(translate_manifest.digests_path(manifest))) == 2
+
+
+def test_unchanged_run_never_iterates_dictionary(project, monkeypatch, capsys):
+    _, _, manifest, run = project
+    run()
+    capsys.readouterr()
+
+    def no_iteration(self):
+        raise AssertionError('字典没有变化时不应遍历字典')
+
+    monkeypatch.setattr(translate_dict.CompiledDictionary, '__iter__', no_iteration)
+    monkeypatch.setattr(translate_dict.CompiledDictionary, 'items', no_iteration)
+    run()
+    assert '增量跳过文件: 2' in capsys.readouterr().out
+
+
+def test_dictionary_change_reprocesses_only_affected_files(project, capsys):
+    src, source, _, run = project
+    run()
+    capsys.readouterr()
+    source.write_text('保存\tSave\n删除\tDelete\n取消订单\tCancel order\n', encoding='utf-8')
+    run()
+    out = capsys.readouterr().out
+    assert '✓ 已翻译: a.tsx' in out
+    assert '增量跳过文件: 1' in out
+    assert (src / 'a.tsx').read_text(encoding='utf-8') == 'const a = "Save";\nconst b = "Cancel order";\n'
@@ -0,0 +1,66 @@
+import sys
+
+import batch_translate
+import check_chinese
+
+# z.tsx 在遍历顺序中排在 ui/ 子目录之前，按路径字符串排序则排在后面
+FILES = {
+    'z.tsx': 'const a = "未登记的词组甲";\nconst b = "ok";\n',
+    'ui/a.tsx': ''.join(f'const s{i} = "界面布局（无{i}）与未登记词组乙";\n' for i in range(8)),
+    'ui/b.ts': '// 注释里的未登记词组丙 和 另一个片段\n',
+}
+
+
+def make_src(tmp_path):
+    src = tmp_path / 'src'
+    for relative_path, content in FILES.items():
+        path = src / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+    return src
+
+
+def run(monkeypatch, capsys, main, argv):
+    monkeypatch.setattr(sys, 'argv', argv)
+    main()
+    return capsys.readouterr().out
+
+
+def report_section(output):
+    start = output.index('发现 ')
+    end = output.find('\n出现最多的未翻译词组', start)
+    return output[start:end if end >= 0 else len(output)].rstrip()
+
+
+def test_find_chinese_lines_matches_file_scan(tmp_path):
+    src = make_src(tmp_path)
+    for relative_path, content in FILES.items():
+        assert check_chinese.find_chinese_lines(content) == check_chinese.check_file(str(src / relative_path))
+
+
+def test_report_counts_lines(capsys):
+    lines = [(n, 3, f'第 {n} 行') for n in range(1, 9)]
+    check_chinese.print_chinese_report({'a.tsx': lines})
+    out = capsys.readouterr().out
+    assert '  行 1, 列 3: 第 1 行' in out
+    assert '... 还有 3 行' in out
+
+
+def test_verify_output_matches_standalone_checker(tmp_path, monkeypatch, capsys):
+    src = make_src(tmp_path)
+    fused = run(monkeypatch, capsys, batch_translate.main,
+                ['batch_translate.py', '--src', str(src), '--manifest', '', '--verify'])
+    standalone = run(monkeypatch, capsys, check_chinese.main, ['check_chinese.py', '--src', str(src)])
+    assert report_section(fused) == report_section(standalone)
+    section = report_section(standalone)
+    assert section.index('文件: z.tsx') < section.index('文件: ui/a.tsx') < section.index('文件: ui/b.ts')
+    assert '... 还有 3 行' in section
+
+
+def test_fullwidth_space_ascii_and_katakana_are_not_chinese():
+    for text in ['a　b', 'ＡＢＣ１', 'ｶﾀｶﾅ', '😀 emoji']:
+        assert not check_chinese.has_chinese(text)
+        assert check_chinese.find_chinese_lines(f'x\n{text}\n') == []
+    for text in ['中文', '句号。', 'a，b', '（）']:
+        assert check_chinese.has_chinese(text)
+    assert check_chinese.find_chinese_lines('ＡＢＣ　，\n') == [(1, 5, 'ＡＢＣ　，')]
@@ -0,0 +1,87 @@
+import pytest
+
+from direct_insert_articles import (
+    SQLExpr,
+    copy_text,
+    iter_copy_rows,
+    iter_insert_rows,
+    verify_round_trip,
+    write_chunked_inserts,
+    write_copy,
+)
+from sql_stream import iter_insert_statements
+
+ROWS = [
+    {'title': 'tab\there', 'slug': 'a', 'content': 'line1\nline2\r\nend', 'view_count': 3, 'is_featured': True},
+    {'title': 'back\\slash \\N', 'slug': 'b', 'content': "it's \"quoted\"; -- not a comment", 'view_count': 0,
+     'is_featured': False},
+    {'title': '中文标题', 'slug': 'c', 'content': None, 'view_count': 7, 'is_featured': None},
+    # 列集合不同的行会单独成组
+    {'title': 'd', 'slug': 'd', 'published_at': SQLExpr('now()')},
+]
+
+
+def test_copy_round_trip(tmp_path):
+    path = tmp_path / 'copy.sql'
+    rows = ROWS[:3]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        assert write_copy(f, 'articles', rows) == 1
+    text = path.read_text(encoding='utf-8')
+    assert 'tab\\there' in text and 'line1\\nline2\\r\\nend' in text and 'back\\\\slash \\\\N' in text
+    assert list(iter_copy_rows(path)) == [{k: copy_text(v) for k, v in row.items()} for row in rows]
+    assert verify_round_trip(path, 'copy', rows) == 0
+
+
+def test_chunked_insert_round_trip(tmp_path):
+    path = tmp_path / 'chunked.sql'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        # 两个列集合：3 行按每条 2 行切成 2 条语句，另 1 行 1 条
+        assert write_chunked_inserts(f, 'articles', ROWS, 2) == 3
+    parsed = [row for stmt in iter_insert_statements(str(path)) for row in iter_insert_rows(stmt)]
+    assert parsed == ROWS
+    assert isinstance(parsed[3]['published_at'], SQLExpr)
+    assert verify_round_trip(path, 'chunked', ROWS) == 0
+
+
+def test_round_trip_detects_mismatch(tmp_path):
+    path = tmp_path / 'copy.sql'
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        write_copy(f, 'articles', ROWS[:2])
+    changed = [dict(ROWS[0], title='other'), ROWS[1]]
+    assert verify_round_trip(path, 'copy', changed) == 1
+
+
+def test_parse_literals_and_expressions():
+    sql = ("INSERT INTO articles (a, b, c, d, e, f, g, h, i, j, k, l, m) VALUES ("
+           "'it''s', E'line\\n\\'q\\'', '{\"tags\": [\"a\"]}'::jsonb, now(), NULL, -5, -1.5e3, "
+           "'42'::int, 't'::boolean, NULL::text, ARRAY['x', 'y'], lower('A,B'), E'a''b\\\\');")
+    assert list(iter_insert_rows(sql)) == [{
+        'a': "it's", 'b': "line\n'q'", 'c': '{"tags": ["a"]}', 'd': SQLExpr('now()'), 'e': None,
+        'f': -5, 'g': -1500.0, 'h': 42, 'i': True, 'j': None, 'k': SQLExpr("ARRAY['x', 'y']"),
+        'l': SQLExpr("lower('A,B')"), 'm': "a'b\\",
+    }]
+    row = next(iter_insert_rows(sql))
+    assert isinstance(row['d'], SQLExpr) and isinstance(row['f'], int) and not isinstance(row['c'], SQLExpr)
+
+
+def test_parse_multi_row_values_with_separators_in_strings():
+    sql = ('INSERT INTO public."articles" ("Title", slug, views) VALUES\n'
+           "  ('a),(b', 'x', 1),\n"
+           "  ('c'', (d)', E'y),\\n(', -2),('', '', 0)\n"
+           'ON CONFLICT (slug) DO NOTHING;')
+    assert list(iter_insert_rows(sql)) == [
+        {'Title': 'a),(b', 'slug': 'x', 'views': 1},
+        {'Title': "c', (d)", 'slug': 'y),\n(', 'views': -2},
+        {'Title': '', 'slug': '', 'views': 0},
+    ]
+
+
+@pytest.mark.parametrize('sql', [
+    "INSERT INTO articles (a, b) VALUES ('x');",
+    "INSERT INTO articles (a) VALUES ('unterminated);",
+    'INSERT INTO articles VALUES (1);',
+    "INSERT INTO articles (a) VALUES ('x' 'y');",
+])
+def test_parse_errors(sql):
+    with pytest.raises(ValueError):
+        list(iter_insert_rows(sql))
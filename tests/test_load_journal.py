@@ -0,0 +1,96 @@
+import json
+
+import requests
+
+import batch_insert_articles
+from load_journal import CheckpointJournal, lookup_existing, statement_hash
+from sql_stream import iter_insert_statements
+
+SQL = ("INSERT INTO articles (title, slug) VALUES ('A', 's1'), ('B', 's2');\n"
+       "INSERT INTO articles (title, slug) VALUES ('C', 's3'), ('D', 's4'), ('E', 's5');\n")
+
+
+class CountingSession(requests.Session):
+    def __init__(self):
+        super().__init__()
+        self.gets = []
+
+    def get(self, url, **kwargs):
+        self.gets.append(kwargs.get('params'))
+        return super().get(url, **kwargs)
+
+
+def test_torn_last_line_is_dropped_and_truncated(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text(json.dumps({'batch': 1, 'rows': [['h1', 'a'], ['h1', 'b']]}) + '\n'
+                    + '{"batch": 2, "rows": [["h2", "c"', encoding='utf-8')
+    journal = CheckpointJournal(str(path))
+    assert ('h1', 'a') in journal and ('h1', 'b') in journal
+    assert ('h2', 'c') not in journal
+    assert journal.batches == 1
+    # 半行被截掉，新记录从新的一行开始，重新加载后不会丢
+    journal.record([('h3', 'd')])
+    reloaded = CheckpointJournal(str(path))
+    assert reloaded.committed == {('h1', 'a'), ('h1', 'b'), ('h3', 'd')}
+    assert reloaded.batches == 2
+
+
+def test_lookup_existing_batches_in_filter(postgrest):
+    slugs = ['s0', 's1', 'with,comma', 'with"quote', 's4', 's5', 's6']
+    postgrest.store.tables['articles'] = [{'slug': slug} for slug in slugs[::2]]
+    session = CountingSession()
+    existing = lookup_existing(session, postgrest.url, 'articles', 'slug', slugs + ['s0', None], {}, chunk_size=3)
+    assert existing == set(slugs[::2])
+    # 去重、去掉 None 后 7 个 slug，每次最多 3 个
+    assert len(session.gets) == 3
+    assert all(params['slug'].startswith('in.(') for params in session.gets)
+
+
+def test_resume_skips_journaled_and_existing_slugs(postgrest, tmp_path, monkeypatch):
+    sql_file = tmp_path / 'articles.sql'
+    sql_file.write_text(SQL, encoding='utf-8')
+    statements = list(iter_insert_statements(str(sql_file)))
+    journal_path = str(tmp_path / 'journal.jsonl')
+    # s1 已记入日志（数据库中没有，证明确实被跳过）；s2 已在数据库中
+    CheckpointJournal(journal_path).record([(statement_hash(statements[0]), 's1')])
+    postgrest.store.tables['articles'] = [{'title': 'old', 'slug': 's2'}]
+    session = CountingSession()
+    monkeypatch.setattr(batch_insert_articles, '_session', session)
+
+    success, failures = batch_insert_articles.bulk_insert(statements, 2, 0, postgrest.url,
+                                                          journal_path=journal_path, lookup_size=2)
+    assert (success, failures) == (3, [])
+    articles = postgrest.store.tables['articles']
+    assert sorted(row['slug'] for row in articles) == ['s2', 's3', 's4', 's5']
+    assert next(row for row in articles if row['slug'] == 's2')['title'] == 'old'
+    # 日志外的 4 个 slug 按每次 2 个查询
+    assert len(session.gets) == 2
+    assert CheckpointJournal(journal_path).committed == {
+        (statement_hash(statements[0]), 's1'),
+        (statement_hash(statements[1]), 's3'),
+        (statement_hash(statements[1]), 's4'),
+        (statement_hash(statements[1]), 's5'),
+    }
+
+    # 再次运行：只剩不在日志中的 s2 需要查询，没有要写入的行
+    session.gets.clear()
+    assert batch_insert_articles.bulk_insert(statements, 2, 0, postgrest.url,
+                                             journal_path=journal_path, lookup_size=2) == (0, [])
+    assert [params['slug'] for params in session.gets] == ['in.("s2")']
+    assert len(postgrest.store.tables['articles']) == 4
+
+
+def test_upsert_merges_on_slug_conflict(postgrest):
+    postgrest.store.unique_columns = ('slug',)
+    postgrest.store.tables['articles'] = [{'title': 'old', 'slug': 's1', 'view_count': 5}]
+    session = requests.Session()
+    rows = [{'title': 'new', 'slug': 's1'}, {'title': 'B', 'slug': 's2'}]
+
+    ok, retryable, error = batch_insert_articles.insert_batch(session, postgrest.url, rows, 0)
+    assert (ok, retryable) == (False, False) and error.startswith('HTTP 409')
+    assert len(postgrest.store.tables['articles']) == 1
+
+    assert batch_insert_articles.insert_batch(session, postgrest.url, rows, 0, upsert=True) == (True, False, None)
+    articles = {row['slug']: row for row in postgrest.store.tables['articles']}
+    assert articles['s1'] == {'title': 'new', 'slug': 's1', 'view_count': 5}
+    assert articles['s2']['title'] == 'B'
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import uuid
+
+import aiohttp
+import pytest
+
+from pageview_ingest import (MAX_DURATION, BatchRejected, EventError, IngestBuffer, RpcWriter,
+                             normalize_duration, normalize_view)
+
+
+class FakeWriter:
+    """按顺序抛出 errors 中的异常，之后的写入都成功；gate 不为空时写入要等它放行"""
+
+    def __init__(self, errors=(), gate=None):
+        self.errors = list(errors)
+        self.gate = gate
+        self.started = asyncio.Event()
+        self.batches = []
+
+    async def write(self, views, durations, sessions):
+        self.started.set()
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.errors:
+            raise self.errors.pop(0)
+        self.batches.append((list(views), list(durations), sessions))
+
+
+def view(n, session='s1'):
+    return normalize_view({'visitor_id': 'v1', 'session_id': session, 'page_url': f'/p/{n}'})
+
+
+def written_urls(writer):
+    return [v['page_url'] for views, _, _ in writer.batches for v in views]
+
+
+def test_normalize_caps_duration_and_validates_view_id():
+    assert normalize_view({'visitor_id': 'v', 'session_id': 's', 'page_url': '/',
+                           'duration': 10 ** 12})['duration'] == MAX_DURATION
+    view_id = str(uuid.uuid4())
+    update = normalize_duration({'view_id': view_id.upper(), 'session_id': 's', 'duration': -5})
+    assert update['view_id'] == view_id
+    assert update['duration'] == 0
+    with pytest.raises(EventError):
+        normalize_duration({'view_id': 'not-a-uuid', 'session_id': 's', 'duration': 1})
+    with pytest.raises(EventError):
+        normalize_duration({'view_id': view_id, 'duration': 1})
+
+
+def test_transient_failure_keeps_batch_for_retry():
+    async def scenario():
+        writer = FakeWriter([RuntimeError('HTTP 503: unavailable')])
+        buffer = IngestBuffer(writer)
+        await buffer.put([view(1), view(2)], [], timeout=1)
+        assert not await buffer.flush()
+        assert buffer.depth() == 2
+        assert buffer.metrics.flush_failures == 1
+        assert await buffer.flush()
+        return writer, buffer
+
+    writer, buffer = asyncio.run(scenario())
+    assert written_urls(writer) == ['/p/1', '/p/2']
+    assert buffer.depth() == 0
+
+
+def test_rejected_batch_is_dropped_and_dead_lettered(tmp_path):
+    dead_letter = tmp_path / 'rejected.ndjson'
+
+    async def scenario():
+        writer = FakeWriter([BatchRejected('HTTP 400: invalid input syntax for type uuid')])
+        buffer = IngestBuffer(writer, dead_letter=str(dead_letter))
+        await buffer.put([view(1)], [], timeout=1)
+        assert await buffer.flush()
+        # 被拒绝的批次不再挡住后面的事件
+        await buffer.put([view(2)], [], timeout=1)
+        assert await buffer.flush()
+        return writer, buffer
+
+    writer, buffer = asyncio.run(scenario())
+    assert written_urls(writer) == ['/p/2']
+    snapshot = buffer.metrics.snapshot(buffer)
+    assert snapshot['batches_rejected'] == 1
+    assert snapshot['events_dropped'] == 1
+    assert snapshot['flush_failures'] == 0
+    records = [json.loads(line) for line in dead_letter.read_text(encoding='utf-8').splitlines()]
+    assert [v['page_url'] for v in records[0]['views']] == ['/p/1']
+    assert 'HTTP 400' in records[0]['error']
+
+
+def test_stop_waits_for_in_flight_flush():
+    async def scenario():
+        gate = asyncio.Event()
+        writer = FakeWriter(gate=gate)
+        buffer = IngestBuffer(writer, flush_size=1, flush_interval=60)
+        flusher = asyncio.create_task(buffer.run())
+        await buffer.put([view(1)], [], timeout=1)
+        await writer.started.wait()
+        # 刷新进行中又来了一条，然后开始停机
+        await buffer.put([view(2)], [], timeout=1)
+        buffer.stop()
+        asyncio.get_running_loop().call_later(0.05, gate.set)
+        await flusher
+        await buffer.close()
+        return writer, buffer
+
+    writer, buffer = asyncio.run(asyncio.wait_for(scenario(), 10))
+    assert written_urls(writer) == ['/p/1', '/p/2']
+    assert buffer.depth() == 0
+
+
+def test_cancelled_flush_puts_batch_back():
+    async def scenario():
+        writer = FakeWriter(gate=asyncio.Event())
+        buffer = IngestBuffer(writer)
+        await buffer.put([view(1)], [], timeout=1)
+        task = asyncio.create_task(buffer.flush())
+        await writer.started.wait()
+        await buffer.put([view(2)], [], timeout=1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [v['page_url'] for v in buffer.views] == ['/p/1', '/p/2']
+    assert set(buffer.buffered_views) == {v['id'] for v in buffer.views}
+
+
+def duration(target, seconds):
+    return normalize_duration({'view_id': target['id'], 'session_id': target['session_id'], 'duration': seconds})
+
+
+def test_durations_collapse_to_last_value_per_view():
+    async def scenario():
+        writer = FakeWriter()
+        buffer = IngestBuffer(writer)
+        first = view(1)
+        await buffer.put([first], [], timeout=1)
+        await buffer.flush()
+        await buffer.put([], [duration(first, 10), duration(first, 25)], timeout=1)
+        await buffer.put([], [duration(first, 30)], timeout=1)
+        assert buffer.depth() == 1
+        await buffer.flush()
+        return writer
+
+    writer = asyncio.run(scenario())
+    _, durations, sessions = writer.batches[1]
+    assert [d['duration'] for d in durations] == [30]
+    # 之前刷新过的访问的时长不在服务中合并到会话
+    assert sessions == []
+
+
+def test_repeated_durations_are_applied_once(postgrest):
+    async def scenario():
+        async with aiohttp.ClientSession() as session:
+            buffer = IngestBuffer(RpcWriter(session, postgrest.url, ''))
+            first, second = view(1), view(2)
+            await buffer.put([first, second], [duration(second, 5)], timeout=1)
+            assert await buffer.flush()
+            for seconds in (30, 30, 45):
+                await buffer.put([], [duration(first, seconds)], timeout=1)
+                assert await buffer.flush()
+            # 整批重试：同一时长再写一次
+            payload = [duration(first, 45)]
+            await buffer.writer.write([], payload, [])
+            # 未知访问的时长被忽略，不创建会话
+            stray = dict(view(3, session='s2'), id=str(uuid.uuid4()))
+            await buffer.put([], [duration(stray, 100)], timeout=1)
+            assert await buffer.flush()
+
+    asyncio.run(scenario())
+    sessions = postgrest.store.tables['visitor_sessions']
+    assert [(s['session_id'], s['page_views_count'], s['total_duration']) for s in sessions] == [('s1', 2, 50)]
+    assert sorted(v['duration'] for v in postgrest.store.tables['page_views']) == [5, 45]
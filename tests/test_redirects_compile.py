@@ -0,0 +1,31 @@
+from redirects_compile import compile_rules, write_nginx
+
+
+def rule(source, target, status=301):
+    return {'from_path': source, 'to_path': target, 'redirect_type': status}
+
+
+def test_chain_collapses_and_cycle_is_dropped():
+    result = compile_rules([rule('/a', '/b'), rule('/b', '/c', 308), rule('/x', '/y'), rule('/y', '/x')])
+    assert result.rules == {'/a': ('/c', 308, 2), '/b': ('/c', 308, 1)}
+    assert result.cycles == [['/x', '/y']]
+
+
+def test_nginx_targets_with_query_use_ampersand(tmp_path):
+    result = compile_rules([rule('/old', '/new'), rule('/search', '/list?tag=repair', 302)])
+    assert write_nginx(result.rules, str(tmp_path)) == 2
+    maps = (tmp_path / 'nginx-redirects-map.conf').read_text(encoding='utf-8')
+    snippet = (tmp_path / 'nginx-redirects.conf').read_text(encoding='utf-8')
+
+    def block(variable):
+        start = maps.index(f'map $uri {variable} {{')
+        return maps[start:maps.index('}', start)]
+
+    assert '"/old" "/new";' in block('$compiled_redirect_301')
+    assert '"/search"' not in block('$compiled_redirect_302')
+    assert '"/search" "/list?tag=repair";' in block('$compiled_redirect_302_query')
+    assert 'return 302 $compiled_redirect_302$is_args$args;' in snippet
+    assert 'return 302 $compiled_redirect_302_query$compiled_redirect_more_args;' in snippet
+    # 片段引用的每个变量都在 map 中定义
+    for status in (301, 302, 307, 308):
+        assert f'$compiled_redirect_{status}_query {{' in maps
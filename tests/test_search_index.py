@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from search_index import SearchIndex, decode_postings, encode_postings, search
+
+
+@pytest.mark.parametrize('postings', [
+    [],
+    [(0, 1)],
+    [(0, 1), (1, 127), (2, 128), (300, 5)],
+    [(5, 3), (70000, 1), (2 ** 35, 2 ** 21)],
+])
+def test_postings_round_trip(postings):
+    assert decode_postings(encode_postings(postings)) == postings
+
+
+def articles():
+    return [
+        {'slug': 'apple', 'title': 'Apple', 'content': '<p>Apple apricot</p>'},
+        {'slug': 'banana', 'title': 'Banana', 'content': '<p>Banana bread</p>'},
+        {'slug': 'cherry', 'title': 'Cherry', 'content': '<p>Cherry cake, 更换屏幕</p>'},
+    ]
+
+
+def build(directory, rows):
+    index = SearchIndex.load(directory)
+    counts = index.update(rows)
+    return counts, index.save(directory)
+
+
+def shard_files(directory):
+    shard_dir = os.path.join(directory, 'shards')
+    result = {}
+    for name in sorted(os.listdir(shard_dir)):
+        with open(os.path.join(shard_dir, name), 'rb') as f:
+            result[name] = f.read()
+    return result
+
+
+def test_changed_article_rewrites_only_its_shards(tmp_path):
+    directory = str(tmp_path)
+    rows = articles()
+    build(directory, rows)
+    before = shard_files(directory)
+    assert build(directory, rows) == ((0, 0, 3, 0), 0)
+
+    rows[1]['content'] = '<p>Banana brownie</p>'
+    assert build(directory, rows) == ((0, 1, 2, 0), 1)
+    after = shard_files(directory)
+    assert [name for name in before if before[name] != after[name]] == ['b.json.gz']
+    assert [slug for slug, _, _ in search(directory, 'brownie')] == ['banana']
+    assert search(directory, 'bread') == []
+
+
+def test_deleted_slug_drops_out_of_results(tmp_path):
+    directory = str(tmp_path)
+    build(directory, articles())
+    assert [slug for slug, _, _ in search(directory, '屏幕')] == ['cherry']
+    # 只含该文章词的分片被删除，其余分片内容不变
+    assert build(directory, articles()[:2]) == ((0, 0, 2, 1), 0)
+    assert search(directory, 'cherry') == []
+    assert search(directory, '屏幕') == []
+    files = shard_files(directory)
+    assert 'c.json.gz' not in files and not any(name.startswith('cjk') for name in files)
+    assert sorted(slug for slug, _, _ in search(directory, 'apple banana cherry')) == ['apple', 'banana']
@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import re
+
+import sitemap_build
+from sitemap_build import INDEX_FILE, STATE_FILE, URLSET_FOOTER, URLSET_HEADER, build, shard_name
+
+
+class MemorySource:
+    def __init__(self, tables):
+        self.tables = tables
+        self.reads = {}
+
+    def rows(self, table, columns):
+        self.reads[table] = self.reads.get(table, 0) + 1
+        yield from (dict(row) for row in self.tables.get(table, []))
+
+
+def articles(n, updated='2024-01-01'):
+    return [{'id': i, 'slug': f'article-{i:04d}', 'status': 'published', 'updated_at': updated}
+            for i in range(n)]
+
+
+def shards(out_dir, name):
+    """{分片文件名: 解压后的内容}"""
+    result = {}
+    for filename in sorted(os.listdir(out_dir)):
+        if filename.startswith(f'sitemap-{name}-'):
+            with gzip.open(os.path.join(out_dir, filename), 'rt', encoding='utf-8') as f:
+                result[filename] = f.read()
+    return result
+
+
+def run(source, tmp_path, **kwargs):
+    return build(source, 'https://example.com', str(tmp_path / 'public'), '/sitemaps',
+                 state_path=str(tmp_path / 'state.json'), **kwargs)
+
+
+def test_shards_split_at_url_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(sitemap_build, 'MAX_URLS', 10)
+    monkeypatch.setattr(sitemap_build, 'INITIAL_FILL', 5)
+    out_dir = tmp_path / 'public'
+    source = MemorySource({'articles': articles(40)})
+    assert run(source, tmp_path)['articles'] == (40, 8)
+    # 每张表只读取一遍
+    assert set(source.reads.values()) == {1}
+    first = shards(out_dir, 'articles')
+    assert len(first) == 8 and all(text.count('<url>') <= 10 for text in first.values())
+
+    # 增长到某个桶超过上限：桶数翻倍，旧桶文件被清理
+    source = MemorySource({'articles': articles(120)})
+    count, written = run(source, tmp_path)['articles']
+    assert count == 120
+    grown = shards(out_dir, 'articles')
+    with open(tmp_path / 'state.json', encoding='utf-8') as f:
+        buckets = json.load(f)['types']['articles']['buckets']
+    assert buckets in (16, 32, 64)
+    assert written == len(grown) and all(int(name.split('-')[2].split('.')[0]) < buckets for name in grown)
+    assert all(text.count('<url>') <= 10 for text in grown.values())
+    slugs = re.findall(r'/articles/(article-\d+)</loc>', ''.join(grown.values()))
+    assert sorted(slugs) == [f'article-{i:04d}' for i in range(120)]
+    index = (out_dir / INDEX_FILE).read_text(encoding='utf-8')
+    assert index.count('<sitemap>') == len(grown)
+    assert set(source.reads.values()) == {1}
+
+
+def test_shards_split_at_size_limit(tmp_path, monkeypatch):
+    one_url = len(sitemap_build.url_xml('https://example.com', '/articles/article-0000', '2024-01-01',
+                                        'weekly', 0.8).encode('utf-8'))
+    limit = len(URLSET_HEADER) + len(URLSET_FOOTER) + 4 * one_url
+    monkeypatch.setattr(sitemap_build, 'MAX_BYTES', limit)
+    out_dir = tmp_path / 'public'
+    run(MemorySource({'articles': articles(30)}), tmp_path)
+    files = shards(out_dir, 'articles')
+    assert len(files) >= 8
+    assert all(len(text.encode('utf-8')) <= limit for text in files.values())
+    assert sum(text.count('<url>') for text in files.values()) == 30
+
+
+def test_unchanged_shards_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(sitemap_build, 'INITIAL_FILL', 5)
+    out_dir = tmp_path / 'public'
+    rows = articles(20)
+    assert run(MemorySource({'articles': rows}), tmp_path)['articles'] == (20, 4)
+    before = shards(out_dir, 'articles')
+    assert run(MemorySource({'articles': rows}), tmp_path)['articles'] == (20, 0)
+
+    # 只修改一篇文章：只重写它所在的分片
+    rows[7]['updated_at'] = '2024-02-01'
+    assert run(MemorySource({'articles': rows}), tmp_path)['articles'] == (20, 1)
+    after = shards(out_dir, 'articles')
+    changed = [name for name in before if before[name] != after[name]]
+    assert len(changed) == 1 and 'article-0007' in after[changed[0]]
+    index = (out_dir / INDEX_FILE).read_text(encoding='utf-8')
+    assert f'{changed[0]}</loc><lastmod>2024-02-01</lastmod>' in index
+
+    # 分片文件丢失时即使状态未变也会补写
+    os.remove(out_dir / changed[0])
+    assert run(MemorySource({'articles': rows}), tmp_path)['articles'] == (20, 1)
+    assert run(MemorySource({'articles': rows}), tmp_path, full=True)['articles'] == (20, 4)
+
+
+def test_state_file_stays_out_of_public_dir(tmp_path):
+    out_dir = tmp_path / 'public'
+    out_dir.mkdir()
+    (out_dir / STATE_FILE).write_text('{}', encoding='utf-8')
+    run(MemorySource({'articles': articles(3)}), tmp_path)
+    assert (tmp_path / 'state.json').exists()
+    assert sorted(os.listdir(out_dir)) == sorted([INDEX_FILE, shard_name('articles', 0)])
@@ -0,0 +1,56 @@
+import io
+
+import pytest
+
+from sql_stream import iter_insert_statements, iter_sql_statements
+
+SQL = r"""-- leading comment; with 'quote
+INSERT INTO articles (title, content) VALUES ('it''s; fine', E'line\n\'quoted\'; \\'), ('x', 'y');
+/* outer /* nested; */ still comment; */
+SELECT $$ body; with 'quote $$, $fn$ a; $$ b; $fn$;
+CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;
+SELECT "semi;colon""ident", a$b$c, e'x' FROM t -- trailing; comment
+WHERE x = 'a' /* c; /* d; */ */ ;
+UPDATE t SET v = 'tail; without semicolon'
+"""
+
+EXPECTED = [
+    r"INSERT INTO articles (title, content) VALUES ('it''s; fine', E'line\n\'quoted\'; \\'), ('x', 'y');",
+    "SELECT $$ body; with 'quote $$, $fn$ a; $$ b; $fn$;",
+    'CREATE FUNCTION f() RETURNS int AS $body$ BEGIN RETURN 1; END; $body$ LANGUAGE plpgsql;',
+    'SELECT "semi;colon""ident", a$b$c, e\'x\' FROM t -- trailing; comment\n'
+    "WHERE x = 'a' /* c; /* d; */ */ ;",
+    "UPDATE t SET v = 'tail; without semicolon'",
+]
+
+
+class SplitReader:
+    """第一次 read 返回 text[:split]，之后返回剩下的全部内容"""
+
+    def __init__(self, text, split):
+        self.parts = [text[:split], text[split:]]
+
+    def read(self, size=-1):
+        return self.parts.pop(0) if self.parts else ''
+
+
+def test_whole_buffer():
+    assert list(iter_sql_statements(io.StringIO(SQL), chunk_size=len(SQL))) == EXPECTED
+
+
+@pytest.mark.parametrize('split', range(1, len(SQL)))
+def test_split_at_every_boundary(split):
+    assert list(iter_sql_statements(SplitReader(SQL, split))) == EXPECTED
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7])
+def test_tiny_chunks(chunk_size):
+    assert list(iter_sql_statements(io.StringIO(SQL), chunk_size=chunk_size)) == EXPECTED
+
+
+def test_insert_filter(tmp_path):
+    path = tmp_path / 'seed.sql'
+    path.write_text(SQL + ';\nINSERT INTO public."articles"(slug) VALUES (\'b\');\n'
+                    'INSERT INTO articles_backup (slug) VALUES (\'c\');', encoding='utf-8')
+    statements = list(iter_insert_statements(str(path), chunk_size=4))
+    assert statements == [EXPECTED[0], 'INSERT INTO public."articles"(slug) VALUES (\'b\');']
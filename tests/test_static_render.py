@@ -0,0 +1,85 @@
+import os
+
+from static_render import build, output_path, remove_page
+
+
+class MemorySource:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def rows(self, table, columns=None):
+        yield from (dict(row) for row in self.tables.get(table, []))
+
+
+def site(articles=True):
+    return MemorySource({
+        'categories': [{'id': 'c1', 'name': '维修工具', 'slug': 'tools', 'type': 'product'},
+                       {'id': 'c2', 'name': 'Guides', 'slug': 'guides', 'type': 'article'}],
+        'products': [{'id': 'p1', 'slug': 'heat-gun', 'name': '热风枪', 'status': 'published', 'category_id': 'c1'},
+                     {'id': 'p2', 'slug': 'screwdriver', 'name': 'Screwdriver', 'status': 'published',
+                      'category_id': 'c1', 'language': 'en'}],
+        'articles': [{'id': 'a1', 'slug': 'replace-screen', 'title': 'Replace a screen', 'status': 'published',
+                      'category_id': 'c2', 'language': 'en', 'content': '<p>Step one</p>',
+                      'published_at': '2024-01-02'}] if articles else [],
+    })
+
+
+def page(out_dir, path):
+    with open(output_path(out_dir, path), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_brand_and_labels_follow_page_language(tmp_path):
+    out_dir = str(tmp_path / 'static')
+    report = build(site(), out_dir, 'https://example.com', jobs=1, use_brotli=False)
+    assert report['pages'] == 5
+    zh_product = page(out_dir, '/products/heat-gun')
+    assert '<html lang="zh-CN">' in zh_product
+    assert '热风枪 - iFixes' in zh_product
+    assert '>首页<' in zh_product and '>产品<' in zh_product
+    en_product = page(out_dir, '/products/screwdriver')
+    assert '<html lang="en">' in en_product
+    assert '>Home<' in en_product and '>Products<' in en_product and '首页' not in en_product
+    en_list = page(out_dir, '/articles/category/c2')
+    assert '<html lang="en">' in en_list
+    assert '>Articles<' in en_list and '文章' not in en_list
+    assert '>首页<' in page(out_dir, '/products/category/c1')
+    assert '翊鸢' not in page(out_dir, '/articles/replace-screen')
+
+
+def test_removed_pages_keep_relative_output_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    build(site(), 'static', 'https://example.com', jobs=1, use_brotli=False)
+    report = build(site(articles=False), 'static', 'https://example.com', jobs=1, use_brotli=False)
+    assert report['removed'] == 2
+    assert os.path.isdir('static')
+    assert not os.path.exists(os.path.join('static', 'articles'))
+    assert os.path.exists(output_path('static', '/products/heat-gun'))
+
+
+def test_remove_page_stops_at_output_root(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    target = output_path(os.path.join('nested', 'static'), '/articles/x')
+    os.makedirs(os.path.dirname(target))
+    with open(target, 'w', encoding='utf-8') as f:
+        f.write('x')
+    remove_page(os.path.join('nested', 'static'), '/articles/x')
+    assert os.listdir(os.path.join('nested', 'static')) == []
+    assert os.path.isdir('nested')
+
+
+def test_dot_slugs_are_skipped(tmp_path):
+    source = site()
+    source.tables['articles'] += [
+        {'id': f'x{i}', 'slug': slug, 'title': 'Escape', 'status': 'published', 'category_id': 'c2',
+         'language': 'en', 'content': '<p>x</p>'}
+        for i, slug in enumerate(['.', '..', '...', '../x'])]
+    source.tables['categories'].append({'id': '..', 'name': 'Up', 'slug': 'up', 'type': 'article'})
+    source.tables['articles'][0]['category_id'] = '..'
+    out_dir = tmp_path / 'site' / 'static'
+    report = build(source, str(out_dir), 'https://example.com', jobs=1, use_brotli=False)
+    assert sorted(report['skipped']) == ['articles:.', 'articles:..', 'articles:...', 'articles:../x',
+                                         'categories:..']
+    # 没有任何文件写到输出目录之外
+    assert os.listdir(tmp_path / 'site') == ['static']
+    assert os.path.exists(output_path(str(out_dir), '/articles/replace-screen'))
@@ -0,0 +1,112 @@
+import argparse
+
+import pytest
+
+from translate_articles import (Segment, SegmentMemory, StubBackend, assemble, backend_identity, collect,
+                                pending_segments, segment_key, split_html, split_text, translate_pending,
+                                translate_rows)
+from translation_cache import TranslationCache
+
+PARAGRAPH = '<p>Remove the <strong>two screws</strong> at the bottom.</p>'
+
+
+class MemorySource:
+    def __init__(self, rows):
+        self.articles = rows
+
+    def rows(self, table, columns=None):
+        yield from (dict(row) for row in self.articles)
+
+
+def identity(parts):
+    return {segment_key(p.text, p.fmt, 'en', 'zh', 'stub'): p.text for p in parts if isinstance(p, Segment)}
+
+
+@pytest.mark.parametrize('html', [
+    PARAGRAPH,
+    '<h2>Tools</h2>\n<ul>\n<li>Heat gun</li>\n<li>Spudger &amp; pick</li>\n</ul>',
+    '<p>See <a href="/guide" title="Full guide">the guide</a>.</p><img src="a.jpg" alt="Back &quot;cover&quot;">',
+    '<pre>  keep   this\n  as is </pre><p>After code</p><script>var s = "<p>x</p>";</script>',
+    '<!-- note --><p>2024-01-02</p><div>\n  <p>Nested text</p>\n</div>',
+])
+def test_split_assemble_round_trip(html):
+    parts = split_html(html)
+    assert assemble(parts, identity(parts), 'en', 'zh', 'stub') == html
+
+
+def test_split_keeps_markup_out_of_segments():
+    parts = split_html('<pre>Do not translate</pre><p>Translate <em>me</em></p><img alt="Photo">')
+    segments = [(p.text, p.fmt) for p in parts if isinstance(p, Segment)]
+    assert segments == [('Translate <em>me</em>', 'html'), ('Photo', 'attr')]
+    assert split_text('  12 / 34 ') == ['  12 / 34 ']
+    assert [p.text for p in split_text(' Screen\n repair ')] == ['Screen repair']
+
+
+def test_attr_translation_is_escaped():
+    parts = split_html('<img alt="Cover">')
+    key = segment_key('Cover', 'attr', 'en', 'zh', 'stub')
+    assert assemble(parts, {key: '封面 "A" & B'}, 'en', 'zh', 'stub') == '<img alt="封面 &quot;A&quot; &amp; B">'
+
+
+def articles():
+    shared = PARAGRAPH + '<p>Reassemble the phone.</p>'
+    return [
+        {'id': 1, 'slug': 'screen', 'title': 'Screen repair', 'language': 'en', 'content': shared},
+        {'id': 2, 'slug': 'battery', 'title': 'Battery repair', 'language': 'en', 'content': shared},
+        {'id': 3, 'slug': 'camera', 'title': 'Screen repair', 'language': 'en', 'content': PARAGRAPH},
+        {'id': 4, 'slug': 'zh-only', 'title': '中文', 'language': 'zh', 'content': '<p>已经是中文</p>'},
+    ]
+
+
+def run(path, source, backend, engine):
+    unique, report = collect(source, 'zh', engine)
+    with TranslationCache(path) as cache:
+        memory = SegmentMemory(cache, 'zh', engine)
+        pending = pending_segments(unique, memory, report)
+        if pending:
+            args = argparse.Namespace(batch_size=50, batch_chars=20000, jobs=2)
+            translate_pending(pending, memory, backend, 'zh', args)
+        return report, list(translate_rows(source, 'zh', memory.translations, engine))
+
+
+def test_stub_translates_each_unique_segment_once(tmp_path):
+    source = MemorySource(articles())
+    path = str(tmp_path / 'memory.sqlite3')
+    backend = StubBackend()
+    report, rows = run(path, source, backend, 'stub')
+    assert (report.articles, report.segments, report.unique) == (3, 8, 4)
+    assert backend.chars == report.unique_chars
+    assert [row['slug'] for row in rows] == ['screen-zh', 'battery-zh', 'camera-zh']
+    assert rows[0]['title'] == '[zh] Screen repair'
+    assert rows[0]['content'] == ('<p>[zh] Remove the <strong>two screws</strong> at the bottom.</p>'
+                                  '<p>[zh] Reassemble the phone.</p>')
+    assert all(row['language'] == 'zh' and 'id' not in row for row in rows)
+
+    # 第二次运行全部命中翻译记忆
+    backend = StubBackend()
+    report, rows = run(path, source, backend, 'stub')
+    assert (report.cached, report.billed_chars, backend.calls) == (4, 0, 0)
+    assert rows[1]['title'] == '[zh] Battery repair'
+
+    # 译文存放在 TranslationCache 中，目标语言带后端标识与段格式
+    with TranslationCache(path) as cache:
+        assert [row[:3] for row in cache.summary()] == [('en', 'zh|stub|html', 2), ('en', 'zh|stub|text', 2)]
+        assert cache.get('Screen repair', 'en', 'zh|stub|text') == '[zh] Screen repair'
+
+
+def test_stub_memory_does_not_leak_into_other_backends(tmp_path):
+    source = MemorySource(articles())
+    path = str(tmp_path / 'memory.sqlite3')
+    run(path, source, StubBackend(), 'stub')
+
+    class Upper(StubBackend):
+        def translate(self, texts, fmt, source, target):
+            super().translate(texts, fmt, source, target)
+            return [text.upper() for text in texts]
+
+    engine = backend_identity('http', argparse.Namespace(endpoint='https://mt.example.com/translate'))
+    backend = Upper()
+    report, rows = run(path, source, backend, engine)
+    assert report.cached == 0
+    assert backend.chars == report.unique_chars
+    assert rows[0]['title'] == 'SCREEN REPAIR'
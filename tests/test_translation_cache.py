@@ -0,0 +1,85 @@
+from translation_cache import TranslationCache
+
+KEY = ('你好', 'zh', 'en')
+
+
+def remote_rows(server):
+    return {(r['source_text'], r['source_lang'], r['target_lang']): r
+            for r in server.store.tables.get('translation_cache', [])}
+
+
+def local_row(cache, text='你好'):
+    cache.flush()
+    return cache.conn.execute(
+        'SELECT translated_text, hit_count, dirty, pending_hits FROM translation_cache WHERE source_text = ?',
+        (text,)).fetchone()
+
+
+def test_push_new_rows_then_hits_as_increments(postgrest, tmp_path):
+    with TranslationCache(str(tmp_path / 'a.sqlite3')) as cache:
+        cache.put('你好', 'Hello')
+        assert cache.push(postgrest.url) == (1, 0)
+        assert remote_rows(postgrest)[KEY]['hit_count'] == 1
+        for _ in range(3):
+            assert cache.get('你好') == 'Hello'
+        assert cache.push(postgrest.url) == (0, 3)
+        assert remote_rows(postgrest)[KEY]['hit_count'] == 4
+        assert local_row(cache) == ('Hello', 4, 0, 0)
+        # 没有新的命中时不再推送
+        assert cache.push(postgrest.url) == (0, 0)
+
+
+def test_hits_from_two_machines_add_up(postgrest, tmp_path):
+    postgrest.store.tables['translation_cache'] = [dict(
+        source_text='你好', source_lang='zh', target_lang='en', translated_text='Hello',
+        created_at='2024-01-01T00:00:00+00:00', updated_at='2024-01-01T00:00:00+00:00', hit_count=10)]
+    a = TranslationCache(str(tmp_path / 'a.sqlite3'))
+    b = TranslationCache(str(tmp_path / 'b.sqlite3'))
+    try:
+        a.pull(postgrest.url)
+        b.pull(postgrest.url)
+        a.get('你好')
+        a.get('你好')
+        b.get('你好')
+        assert a.push(postgrest.url) == (0, 2)
+        assert b.push(postgrest.url) == (0, 1)
+        assert remote_rows(postgrest)[KEY]['hit_count'] == 13
+    finally:
+        a.close()
+        b.close()
+
+
+def test_pull_takes_remote_correction_for_hit_only_rows(postgrest, tmp_path):
+    with TranslationCache(str(tmp_path / 'a.sqlite3')) as cache:
+        cache.put('你好', 'Helo')
+        cache.push(postgrest.url)
+        cache.get('你好')
+        assert local_row(cache) == ('Helo', 2, 0, 1)
+
+        remote = remote_rows(postgrest)[KEY]
+        remote.update(translated_text='Hello', updated_at='9999-01-01T00:00:00+00:00', hit_count=5)
+        assert cache.pull(postgrest.url) == 1
+        # 只有命中变化的条目采用远端译文，hit_count = 远端总数 + 未推送的命中
+        assert local_row(cache) == ('Hello', 6, 0, 1)
+        assert cache.get('你好') == 'Hello'
+
+        cache.push(postgrest.url)
+        assert remote_rows(postgrest)[KEY]['hit_count'] == 7
+        assert remote_rows(postgrest)[KEY]['translated_text'] == 'Hello'
+
+
+def test_local_edit_survives_pull_and_push_keeps_remote_hits(postgrest, tmp_path):
+    with TranslationCache(str(tmp_path / 'a.sqlite3')) as cache:
+        cache.put('你好', 'Hello')
+        cache.push(postgrest.url)
+        cache.put('你好', 'Hi there')
+        remote = remote_rows(postgrest)[KEY]
+        remote.update(translated_text='Hello!', updated_at='9999-01-01T00:00:00+00:00', hit_count=50)
+
+        cache.pull(postgrest.url)
+        assert local_row(cache) == ('Hi there', 50, 1, 0)
+        assert cache.push(postgrest.url) == (1, 0)
+        remote = remote_rows(postgrest)[KEY]
+        assert remote['translated_text'] == 'Hi there'
+        assert remote['hit_count'] == 50
+
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译字典编译器与内存映射加载器
+
+源文件（dictionaries/zh-en.tsv）每行一个词条：中文<TAB>英文，# 开头为注释。
+编译产物是带版本号的二进制文件，包含：
+  - 词条表：键/值在字符串池中的偏移与长度，以及旧逻辑下的替换优先级
+  - 开放寻址哈希索引：按键查值不需要把字典读进内存
+  - 首字符分桶的正则源码：匹配时只编译文本里真正出现的首字符对应的小正则
+  - UTF-8 字符串池
+加载时只 mmap 文件并读取文件头，启动开销与词条数量无关。
+源文件被修改后（mtime/大小变化）会自动重新编译。
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from collections.abc import Mapping
+
+ARTIFACT_VERSION = 1
+MAGIC = b'ZHDICT\x00\x00'
+
+# magic, 版本, 词条数, 分桶数, 哈希槽数, 源文件 mtime_ns, 源文件大小, 字典哈希,
+# 词条表/哈希索引/分桶表/字符串池的偏移, 首字符集合正则在池中的偏移与长度
+_HEADER = struct.Struct('<8sIIIIQQ32sQQQQII')
+# 键偏移, 键长度, 值偏移, 值长度, 优先级
+_ENTRY = struct.Struct('<IIIII')
+
+class DictionaryError(ValueError):
+    """字典源文件或编译产物有误"""
+
+def parse_source(path):
+    """读取源文件，返回按首次出现顺序排列的 [(中文, 英文)]
+
+    同一个键重复出现且译文相同时忽略后者；译文不同则报错，列出所有冲突的行号。
+    """
+    entries = {}
+    lines = {}
+    errors = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            chinese, sep, english = line.partition('\t')
+            if not sep or not chinese or '\t' in english:
+                errors.append(f'{path}:{line_no}: 格式应为 中文<TAB>英文')
+                continue
+            if chinese in entries:
+                if entries[chinese] != english:
+                    errors.append(f'{path}:{line_no}: "{chinese}" 与第 {lines[chinese]} 行的译文冲突 '
+                                  f'("{entries[chinese]}" / "{english}")')
+                continue
+            entries[chinese] = english
+            lines[chinese] = line_no
+    if errors:
+        raise DictionaryError('\n'.join(errors))
+    return list(entries.items())
+
+def build_trie(keys):
+    """由词条构建前缀树，'' 键标记词条结束"""
+    trie = {}
+    for chinese in keys:
+        node = trie
+        for ch in chinese:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return trie
+
+def trie_to_pattern(node):
+    """把前缀树节点展开成正则片段（子分支在前，可选结束在后，保证最长匹配）"""
+    is_end = '' in node
+    branches = [re.escape(ch) + trie_to_pattern(child)
+                for ch, child in sorted(node.items()) if ch != '']
+    if not branches:
+        return ''
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    if is_end:
+        pattern += '?'
+    return pattern
+
+def legacy_ranks(keys):
+    """旧实现按长度从长到短的稳定排序，返回每个键的优先级"""
+    ordered = sorted(keys, key=len, reverse=True)
+    return {chinese: i for i, chinese in enumerate(ordered)}
+
+def char_class(codepoints):
+    """把排好序的码位列表写成紧凑的正则字符类"""
+    parts = []
+    i = 0
+    while i < len(codepoints):
+        j = i
+        while j + 1 < len(codepoints) and codepoints[j + 1] == codepoints[j] + 1:
+            j += 1
+        if j == i:
+            parts.append(f'\\U{codepoints[i]:08x}')
+        else:
+            parts.append(f'\\U{codepoints[i]:08x}-\\U{codepoints[j]:08x}')
+        i = j + 1
+    return '[' + ''.join(parts) + ']'
+
+def _align(n):
+    return (n + 7) & ~7
+
+def compile_dictionary(source, output):
+    """编译源文件为二进制产物（原子写入），返回词条数"""
+    entries = parse_source(source)
+    stat = os.stat(source)
+    keys = [chinese for chinese, _ in entries]
+    ranks = legacy_ranks(keys)
+    dict_hash = hashlib.sha256(
+        json.dumps(sorted(entries), ensure_ascii=False).encode('utf-8')).digest()
+
+    pool = bytearray()
+
+    def intern(text):
+        data = text.encode('utf-8')
+        offset = len(pool)
+        pool.extend(data)
+        return offset, len(data)
+
+    entry_table = bytearray()
+    for chinese, english in entries:
+        key_off, key_len = intern(chinese)
+        val_off, val_len = intern(english)
+        entry_table += _ENTRY.pack(key_off, key_len, val_off, val_len, ranks[chinese])
+
+    slots = 8
+    while slots < len(entries) * 2:
+        slots *= 2
+    index = [0] * slots
+    for i, chinese in enumerate(keys):
+        h = zlib.crc32(chinese.encode('utf-8')) & (slots - 1)
+        while index[h]:
+            h = (h + 1) & (slots - 1)
+        index[h] = i + 1
+
+    trie = build_trie(keys)
+    firsts = sorted(ch for ch in trie if ch != '')
+    bucket_refs = []
+    for ch in firsts:
+        bucket_refs.extend(intern(re.escape(ch) + trie_to_pattern(trie[ch])))
+    class_off, class_len = intern(char_class([ord(ch) for ch in firsts]) if firsts else '')
+
+    entries_off = _align(_HEADER.size)
+    index_off = _align(entries_off + len(entry_table))
+    buckets_off = _align(index_off + 4 * slots)
+    pool_off = _align(buckets_off + 4 * len(firsts) + 8 * len(firsts))
+    header = _HEADER.pack(MAGIC, ARTIFACT_VERSION, len(entries), len(firsts), slots,
+                          stat.st_mtime_ns, stat.st_size, dict_hash,
+                          entries_off, index_off, buckets_off, pool_off, class_off, class_len)
+
+    tmp_path = output + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for offset, data in ((0, header),
+                             (entries_off, entry_table),
+                             (index_off, struct.pack(f'<{slots}I', *index)),
+                             (buckets_off, struct.pack(f'<{len(firsts)}I', *map(ord, firsts))),
+                             (buckets_off + 4 * len(firsts), struct.pack(f'<{len(bucket_refs)}I', *bucket_refs)),
+                             (pool_off, bytes(pool))):
+            f.write(b'\x00' * (offset - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, output)
+    return len(entries)
+
+class BucketPattern:
+    """与整棵前缀树正则等价的匹配器，但按首字符惰性编译小正则
+
+    search/match/finditer 返回标准的 re.Match，语义与单个前缀树正则相同（最左最长）。
+    """
+
+    def __init__(self, first_class, bucket_source):
+        self.first = re.compile(first_class)
+        self.bucket_source = bucket_source
+        self.buckets = {}
+
+    def _bucket(self, ch):
+        pattern = self.buckets.get(ch)
+        if pattern is None:
+            pattern = self.buckets[ch] = re.compile(self.bucket_source(ch))
+        return pattern
+
+    def match(self, content, pos=0):
+        if pos >= len(content) or not self.first.match(content, pos):
+            return None
+        return self._bucket(content[pos]).match(content, pos)
+
+    def search(self, content, pos=0):
+        first = self.first
+        while True:
+            candidate = first.search(content, pos)
+            if candidate is None:
+                return None
+            pos = candidate.start()
+            m = self._bucket(content[pos]).match(content, pos)
+            if m:
+                return m
+            pos += 1
+
+    def finditer(self, content):
+        pos = 0
+        while True:
+            m = self.search(content, pos)
+            if m is None:
+                return
+            yield m
+            pos = m.end()
+
+class CompiledDictionary(Mapping):
+    """内存映射的编译产物，按只读字典使用（迭代顺序即源文件顺序）"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < _HEADER.size:
+            raise DictionaryError(f'{path}: 文件不完整')
+        (magic, version, self.count, bucket_count, slots,
+         self.source_mtime, self.source_size, digest,
+         entries_off, index_off, buckets_off, self.pool_off,
+         class_off, class_len) = _HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            raise DictionaryError(f'{path}: 不是翻译字典产物')
+        if version != ARTIFACT_VERSION:
+            raise DictionaryError(f'{path}: 产物版本 {version}，需要 {ARTIFACT_VERSION}')
+        self.dict_hash = digest.hex()
+        view = memoryview(self.mm)
+        self.entries = view[entries_off:entries_off + _ENTRY.size * self.count]
+        self.index = view[index_off:index_off + 4 * slots].cast('I')
+        self.mask = slots - 1
+        self.firsts = view[buckets_off:buckets_off + 4 * bucket_count].cast('I')
+        refs_off = buckets_off + 4 * bucket_count
+        self.bucket_refs = view[refs_off:refs_off + 8 * bucket_count].cast('I')
+        self.first_class = self._text(class_off, class_len)
+        self.ranks = _RankView(self)
+
+    def _text(self, offset, length):
+        start = self.pool_off + offset
+        return self.mm[start:start + length].decode('utf-8')
+
+    def _entry(self, i):
+        return _ENTRY.unpack_from(self.entries, i * _ENTRY.size)
+
+    def _find(self, chinese):
+        """返回词条下标，不存在时返回 -1"""
+        data = chinese.encode('utf-8')
+        h = zlib.crc32(data) & self.mask
+        while True:
+            slot = self.index[h]
+            if not slot:
+                return -1
+            key_off, key_len = self._entry(slot - 1)[:2]
+            start = self.pool_off + key_off
+            if key_len == len(data) and self.mm[start:start + key_len] == data:
+                return slot - 1
+            h = (h + 1) & self.mask
+
+    def __getitem__(self, chinese):
+        i = self._find(chinese) if isinstance(chinese, str) else -1
+        if i < 0:
+            raise KeyError(chinese)
+        _, _, val_off, val_len, _ = self._entry(i)
+        return self._text(val_off, val_len)
+
+    def __contains__(self, chinese):
+        return isinstance(chinese, str) and self._find(chinese) >= 0
+
+    def __iter__(self):
+        for i in range(self.count):
+            key_off, key_len = self._entry(i)[:2]
+            yield self._text(key_off, key_len)
+
+    def __len__(self):
+        return self.count
+
+    def bucket_source(self, ch):
+        """首字符 ch 对应的正则源码"""
+        i = bisect.bisect_left(self.firsts, ord(ch))
+        if i >= len(self.firsts) or self.firsts[i] != ord(ch):
+            return '(?!)'
+        return self._text(self.bucket_refs[2 * i], self.bucket_refs[2 * i + 1])
+
+    def pattern(self):
+        """惰性分桶匹配器；空字典返回 None"""
+        if not self.count:
+            return None
+        return BucketPattern(self.first_class, self.bucket_source)
+
+class _RankView:
+    """按键查询优先级"""
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+
+    def __getitem__(self, chinese):
+        i = self.compiled._find(chinese)
+        if i < 0:
+            raise KeyError(chinese)
+        return self.compiled._entry(i)[4]
+
+def is_stale(source, artifact):
+    """产物不存在、版本不符或与源文件不一致时返回 True"""
+    try:
+        with open(artifact, 'rb') as f:
+            header = f.read(_HEADER.size)
+        stat = os.stat(source)
+    except OSError:
+        return True
+    if len(header) < _HEADER.size:
+        return True
+    magic, version, _, _, _, mtime, size = _HEADER.unpack(header)[:7]
+    return magic != MAGIC or version != ARTIFACT_VERSION or \
+        mtime != stat.st_mtime_ns or size != stat.st_size
+
+def load_dictionary(source, artifact):
+    """加载编译产物，必要时先从源文件重新编译"""
+    if os.path.exists(source) and is_stale(source, artifact):
+        compile_dictionary(source, artifact)
+    return CompiledDictionary(artifact)
+
+def main():
+    parser = argparse.ArgumentParser(description='编译翻译字典')
+    parser.add_argument('source', help='字典源文件（中文<TAB>英文）')
+    parser.add_argument('--output', help='产物路径，默认与源文件同名的 .bin')
+    args = parser.parse_args()
+    output = args.output or os.path.splitext(args.source)[0] + '.bin'
+
+    started = time.perf_counter()
+    try:
+        count = compile_dictionary(args.source, output)
+    except DictionaryError as e:
+        print(f'❌ 字典有误:\n{e}')
+        sys.exit(1)
+    print(f'✅ 已编译 {count} 个词条 -> {output} '
+          f'({os.path.getsize(output) / 1024:.1f} KB, {time.perf_counter() - started:.2f}s)')
+
+if __name__ == '__main__':
+    main()
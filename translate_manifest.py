@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量翻译的增量清单
+
+记录每个文件的 mtime、大小、内容哈希、所用字典的哈希，以及翻译后仍残留的非 ASCII 片段。
+清单只保存字典哈希；字典每个词条的摘要另存在清单旁的 .digests 文件中，
+只有字典哈希变化时才读取它来算出改动的词条，字典不变的运行不会遍历字典。
+再次运行时：
+  - 文件与字典都没变的直接跳过（只需 stat，不读文件）
+  - 字典有改动时，只有残留片段中可能出现新增/修改词条的文件才需要重新处理
+"""
+
+import hashlib
+import json
+import os
+import re
+
+MANIFEST_VERSION = 2
+DEFAULT_MANIFEST = ".translate_manifest.json"
+
+# 词条与文件残留都按"连续的非 ASCII 字符"切分
+NON_ASCII_RUN = re.compile(r'[^\x00-\x7f]+')
+
+def content_hash(content):
+    """文件内容哈希"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+DIGEST_SIZE = 8
+
+def digests_path(manifest_path):
+    """词条摘要文件的路径（清单旁边）"""
+    return manifest_path + '.digests'
+
+def entry_digest(chinese, english):
+    return hashlib.blake2b(f'{chinese}\0{english}'.encode('utf-8'), digest_size=DIGEST_SIZE).digest()
+
+def save_digests(path, translations):
+    """写出每个词条（键与译文）的摘要，原子写入"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(b''.join(sorted(entry_digest(k, v) for k, v in translations.items())))
+    os.replace(tmp_path, path)
+
+def load_digests(path):
+    """读取词条摘要集合；文件不存在或损坏时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) % DIGEST_SIZE:
+        return None
+    return {data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)}
+
+def file_state(filepath, content, dict_hash):
+    """生成一个文件的清单条目（content 为翻译后的最终内容）"""
+    stat = os.stat(filepath)
+    return {
+        'mtime': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': content_hash(content),
+        'dict_hash': dict_hash,
+        'residue': sorted(set(NON_ASCII_RUN.findall(content))),
+    }
+
+def load_manifest(path):
+    """读取清单；不存在、损坏或版本不符时返回空清单"""
+    empty = {'version': MANIFEST_VERSION, 'dict_hash': None, 'scope': None, 'files': {}}
+    if not path or not os.path.exists(path):
+        return empty
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty
+    return manifest
+
+def save_manifest(path, manifest):
+    """原子写入清单"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def changed_keys(old_digests, translations):
+    """新增或译文有变化的词条（删除的词条不会影响已翻译的文件）
+
+    old_digests 为 None（旧摘要丢失）时所有词条都视为有变化。
+    """
+    if old_digests is None:
+        return list(translations)
+    return [k for k, v in translations.items() if entry_digest(k, v) not in old_digests]
+
+class DictionaryDelta:
+    """判断字典改动会影响哪些文件"""
+
+    def __init__(self, keys):
+        self.probes = []
+        self.affects_all = False
+        for key in keys:
+            runs = NON_ASCII_RUN.findall(key)
+            if not runs:
+                # 纯 ASCII 词条可能出现在任何文件中
+                self.affects_all = True
+                break
+            # 词条出现在文件中时，它的每一段非 ASCII 片段都一定是某个残留片段的子串
+            self.probes.append(max(runs, key=len))
+
+    def affects(self, residue):
+        if self.affects_all:
+            return True
+        if not self.probes or not residue:
+            return False
+        text = '\n'.join(residue)
+        return any(probe in text for probe in self.probes)
+
+def plan(manifest, files, dict_hash, delta):
+    """把文件分为需要处理与可以跳过两类
+
+    返回 (to_process, skipped)，均为 [(filepath, relative_path)]。
+    可跳过但字典已改动的文件，其条目的 dict_hash 会直接更新为当前字典。
+    """
+    entries = manifest['files']
+    to_process = []
+    skipped = []
+    for filepath, relative_path in files:
+        entry = entries.get(relative_path)
+        if entry is None:
+            to_process.append((filepath, relative_path))
+            continue
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            to_process.append((filepath, relative_path))
+            continue
+        if stat.st_mtime_ns != entry['mtime'] or stat.st_size != entry['size']:
+            # 只被 touch 过的文件：内容哈希一致时视为未修改
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    unchanged = content_hash(f.read()) == entry['hash']
+            except (OSError, UnicodeDecodeError):
+                unchanged = False
+            if not unchanged:
+                to_process.append((filepath, relative_path))
+                continue
+            entry['mtime'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+        if entry['dict_hash'] == dict_hash:
+            skipped.append((filepath, relative_path))
+        elif entry['dict_hash'] == manifest.get('dict_hash') and not delta.affects(entry['residue']):
+            entry['dict_hash'] = dict_hash
+            skipped.append((filepath, relative_path))
+        else:
+            to_process.append((filepath, relative_path))
+    return to_process, skipped
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+翻译引擎的可选统计：词条命中次数、逐文件耗时与替换数、各阶段耗时
+
+只有传入 --profile / --profile-json 时才收集，默认不产生任何开销。
+各阶段：
+  walk   遍历源码目录、按清单筛选文件
+  read   读文件
+  match  匹配与替换（含词法分析）
+  write  写回文件
+多进程运行时 read/match/write 为各进程累计的时间，可能大于墙钟时间。
+"""
+
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+PHASES = ('walk', 'read', 'match', 'write')
+
+def new_file_profile():
+    """单个文件的统计（在工作进程中填写，随结果返回主进程）"""
+    return {'bytes': 0, 'read': 0.0, 'match': 0.0, 'write': 0.0, 'replacements': 0, 'hits': Counter()}
+
+class TranslationStats:
+    """汇总一次运行的统计"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.entry_hits = Counter()
+        self.files = {}
+
+    @contextmanager
+    def phase(self, name):
+        """在主进程中计时一个阶段"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started
+
+    def add_file(self, relative_path, profile):
+        """并入一个文件的统计"""
+        for name in ('read', 'match', 'write'):
+            self.phases[name] += profile[name]
+        self.entry_hits.update(profile['hits'])
+        self.files[relative_path] = {
+            'bytes': profile['bytes'],
+            'elapsed': profile['read'] + profile['match'] + profile['write'],
+            'replacements': profile['replacements'],
+        }
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+
+    def dead_entries(self, translations):
+        """本次运行中一次都没有命中的词条（按字典顺序）"""
+        return [chinese for chinese in translations if not self.entry_hits.get(chinese)]
+
+    def to_dict(self, translations):
+        return {
+            'wall': round(self.wall, 6),
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'files': {path: dict(info, elapsed=round(info['elapsed'], 6))
+                      for path, info in sorted(self.files.items())},
+            'entries': [{'chinese': chinese, 'english': translations[chinese], 'hits': hits}
+                        for chinese, hits in self.entry_hits.most_common()],
+            'dead_entries': self.dead_entries(translations),
+        }
+
+    def write_json(self, path, translations):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(translations), f, ensure_ascii=False, indent=1)
+
+    def format_table(self, translations, limit=20):
+        """生成排好序的文本报表"""
+        lines = [f'阶段耗时（墙钟 {self.wall:.3f}s）:']
+        for name in PHASES:
+            lines.append(f'  {name:<6} {self.phases[name]:>9.3f}s')
+
+        slowest = sorted(self.files.items(), key=lambda item: (-item[1]['elapsed'], item[0]))
+        lines.append(f'\n最慢的文件（共处理 {len(self.files)} 个）:')
+        lines.append(f'  {"耗时ms":>8} {"字节":>9} {"替换数":>6}  文件')
+        for path, info in slowest[:limit]:
+            lines.append(f'  {info["elapsed"] * 1000:>8.2f} {info["bytes"]:>9} {info["replacements"]:>6}  {path}')
+
+        lines.append(f'\n命中最多的词条（共 {len(self.entry_hits)} 个有命中）:')
+        lines.append(f'  {"命中":>6}  词条')
+        for chinese, hits in self.entry_hits.most_common(limit):
+            lines.append(f'  {hits:>6}  {chinese} -> {translations.get(chinese, "?")}')
+
+        dead = self.dead_entries(translations)
+        lines.append(f'\n未命中的词条: {len(dead)} 个')
+        for chinese in dead[:limit]:
+            lines.append(f'  {chinese} -> {translations[chinese]}')
+        if len(dead) > limit:
+            lines.append(f'  ... 还有 {len(dead) - limit} 个')
+        return '\n'.join(lines)
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地两级翻译缓存（翻译记忆）
+
+结构与服务端 translation_cache 表（迁移 00105）一致：以 (source_text, source_lang, target_lang) 为键，
+命中一次 hit_count 加一。
+  - 第一级：进程内 LRU，同时缓存"查无结果"，重复文本不再访问 SQLite
+  - 第二级：本地 SQLite 文件，批量 IN 查询；写入和命中计数先攒在内存，批量写回
+  - 同步：通过 PostgREST 拉取远端新增/更新的条目，推送本地修改
+    dirty 只标记本地改过的译文（upsert 推送，不带 hit_count）；
+    pending_hits 记录尚未推送的命中数，通过 RPC increment_translation_cache_hits（迁移 00106）
+    以增量累加到远端，不会覆盖其他机器记录的命中
+
+用法:
+  python translation_cache.py --stats
+  python translation_cache.py --pull --push [--url http://127.0.0.1:54321]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+DEFAULT_CACHE_PATH = '.translation_cache.sqlite3'
+DEFAULT_CAPACITY = 10000
+DEFAULT_FLUSH_EVERY = 500
+DEFAULT_SYNC_BATCH = 500
+SOURCE_LANG = 'zh'
+TARGET_LANG = 'en'
+TABLE = 'translation_cache'
+INCREMENT_HITS_RPC = 'increment_translation_cache_hits'
+CONFLICT_COLUMNS = 'source_text,source_lang,target_lang'
+
+# SQLite 单条语句的参数个数有上限，IN 查询分块进行
+_LOOKUP_CHUNK = 500
+
+# LRU 中表示"确认不存在"的标记
+_MISSING = object()
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS translation_cache (
+  source_text TEXT NOT NULL,
+  source_lang TEXT NOT NULL DEFAULT 'en',
+  target_lang TEXT NOT NULL,
+  translated_text TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  hit_count INTEGER NOT NULL DEFAULT 1,
+  dirty INTEGER NOT NULL DEFAULT 1,
+  pending_hits INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (source_text, source_lang, target_lang)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_translation_cache_dirty ON translation_cache(dirty) WHERE dirty = 1;
+CREATE INDEX IF NOT EXISTS idx_translation_cache_pending_hits ON translation_cache(pending_hits)
+  WHERE pending_hits > 0;
+CREATE TABLE IF NOT EXISTS sync_state (
+  name TEXT PRIMARY KEY,
+  value TEXT
+);
+'''
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+class LRUCache:
+    """定长 LRU，最近使用的条目在末尾"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key, default=None):
+        value = self.items.get(key, default)
+        if value is not default:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+class TranslationCache:
+    """LRU + SQLite 的两级翻译缓存，可作为上下文管理器使用（退出时写回）"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, capacity=DEFAULT_CAPACITY, flush_every=DEFAULT_FLUSH_EVERY):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.lru = LRUCache(capacity)
+        self.flush_every = flush_every
+        # 待写回的译文 {key: translated_text} 与命中计数 {key: n}
+        self.pending_writes = {}
+        self.pending_hits = {}
+        self.stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0, 'writes': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, text, source_lang=SOURCE_LANG, target_lang=TARGET_LANG):
+        """查询单条译文，不存在时返回 None"""
+        return self.get_many([text], source_lang, target_lang).get(text)
+
+    def get_many(self, texts, source_lang=SOURCE_LANG, target_lang=TARGET_LANG):
+        """批量查询，返回 {原文: 译文}（只包含命中的条目）"""
+        found = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            key = (text, source_lang, target_lang)
+            value = self.lru.get(key)
+            if value is None:
+                missing.append(text)
+            elif value is not _MISSING:
+                found[text] = value
+                self.stats['lru_hits'] += 1
+                self._count_hit(key)
+            else:
+                self.stats['misses'] += 1
+
+        for start in range(0, len(missing), _LOOKUP_CHUNK):
+            chunk = missing[start:start + _LOOKUP_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f'SELECT source_text, translated_text FROM translation_cache '
+                f'WHERE source_lang = ? AND target_lang = ? AND source_text IN ({placeholders})',
+                [source_lang, target_lang, *chunk]).fetchall()
+            hits = dict(rows)
+            for text in chunk:
+                key = (text, source_lang, target_lang)
+                if text in hits:
+                    found[text] = hits[text]
+                    self.lru.put(key, hits[text])
+                    self.stats['db_hits'] += 1
+                    self._count_hit(key)
+                else:
+                    self.lru.put(key, _MISSING)
+                    self.stats['misses'] += 1
+        return found
+
+    def _count_hit(self, key):
+        self.pending_hits[key] = self.pending_hits.get(key, 0) + 1
+
+    def put(self, text, translated_text, source_lang=SOURCE_LANG, target_lang=TARGET_LANG):
+        """写入一条译文（先进入 LRU，攒够后批量写回 SQLite）"""
+        self.put_many([(text, translated_text)], source_lang, target_lang)
+
+    def put_many(self, pairs, source_lang=SOURCE_LANG, target_lang=TARGET_LANG):
+        """批量写入 [(原文, 译文)]"""
+        for text, translated_text in pairs:
+            key = (text, source_lang, target_lang)
+            self.lru.put(key, translated_text)
+            self.pending_writes[key] = translated_text
+        if len(self.pending_writes) + len(self.pending_hits) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """把攒下的写入与命中计数一次性写回（单个事务）"""
+        if not self.pending_writes and not self.pending_hits:
+            return
+        now = utc_now()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO translation_cache '
+                '(source_text, source_lang, target_lang, translated_text, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (source_text, source_lang, target_lang) DO UPDATE SET '
+                'translated_text = excluded.translated_text, updated_at = excluded.updated_at, dirty = 1 '
+                'WHERE translated_text != excluded.translated_text',
+                [(*key, value, now, now) for key, value in self.pending_writes.items()])
+            self.conn.executemany(
+                'UPDATE translation_cache SET hit_count = hit_count + ?, pending_hits = pending_hits + ? '
+                'WHERE source_text = ? AND source_lang = ? AND target_lang = ?',
+                [(n, n, *key) for key, n in self.pending_hits.items()])
+        self.stats['writes'] += len(self.pending_writes)
+        self.pending_writes.clear()
+        self.pending_hits.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def summary(self):
+        """按语言对统计条目数与命中数"""
+        self.flush()
+        return self.conn.execute(
+            'SELECT source_lang, target_lang, COUNT(*), SUM(hit_count), SUM(dirty), SUM(pending_hits) '
+            'FROM translation_cache GROUP BY source_lang, target_lang ORDER BY 1, 2').fetchall()
+
+    def _state(self, name):
+        row = self.conn.execute('SELECT value FROM sync_state WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def pull(self, base_url, api_key=None, page_size=DEFAULT_SYNC_BATCH):
+        """拉取远端 updated_at 晚于上次水位的条目，返回拉取条数
+
+        本地改过且未推送的译文保留本地版本，其余条目采用远端译文；
+        hit_count 取远端总数加上本地尚未推送的命中数。
+        """
+        self.flush()
+        watermark = self._state('pull_watermark')
+        url = f'{base_url}/rest/v1/{TABLE}'
+        pulled = 0
+        offset = 0
+        while True:
+            params = {
+                'select': 'source_text,source_lang,target_lang,translated_text,created_at,updated_at,hit_count',
+                'order': 'updated_at.asc,source_text.asc',
+                'limit': str(page_size),
+                'offset': str(offset),
+            }
+            if watermark:
+                params['updated_at'] = f'gt.{watermark}'
+            response = get_session().get(url, headers=_headers(api_key), params=params, timeout=60)
+            if response.status_code != 200:
+                raise RuntimeError(f'拉取失败 HTTP {response.status_code}: {response.text[:200]}')
+            rows = response.json()
+            if not rows:
+                break
+            now = utc_now()
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO translation_cache (source_text, source_lang, target_lang, translated_text, '
+                    'created_at, updated_at, hit_count, dirty) VALUES (?, ?, ?, ?, ?, ?, ?, 0) '
+                    'ON CONFLICT (source_text, source_lang, target_lang) DO UPDATE SET '
+                    'translated_text = CASE WHEN dirty THEN translated_text ELSE excluded.translated_text END, '
+                    'hit_count = excluded.hit_count + pending_hits, '
+                    'updated_at = CASE WHEN dirty THEN updated_at ELSE excluded.updated_at END',
+                    [(r['source_text'], r['source_lang'], r['target_lang'], r['translated_text'],
+                      r.get('created_at') or now, r.get('updated_at') or now, r.get('hit_count') or 1)
+                     for r in rows])
+                newest = max((r.get('updated_at') or '' for r in rows), default='')
+                if newest:
+                    self.conn.execute('INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)',
+                                      ('pull_watermark', newest))
+            pulled += len(rows)
+            offset += len(rows)
+            if len(rows) < page_size:
+                break
+        # 远端内容可能覆盖了 LRU 中的旧值或"不存在"标记
+        self.lru = LRUCache(self.lru.capacity)
+        return pulled
+
+    def push(self, base_url, api_key=None, batch_size=DEFAULT_SYNC_BATCH):
+        """推送本地修改，返回 (推送的译文条数, 推送的命中数)
+
+        先 upsert 改过的译文（不带 hit_count，新条目取远端默认值 1，与本地一致），
+        再把 pending_hits 作为增量累加到远端。
+        """
+        self.flush()
+        url = f'{base_url}/rest/v1/{TABLE}'
+        headers = dict(_headers(api_key))
+        headers['Content-Type'] = 'application/json'
+        headers['Prefer'] = 'resolution=merge-duplicates,return=minimal'
+        pushed = 0
+        while True:
+            rows = self.conn.execute(
+                'SELECT source_text, source_lang, target_lang, translated_text, created_at, updated_at '
+                'FROM translation_cache WHERE dirty = 1 LIMIT ?', (batch_size,)).fetchall()
+            if not rows:
+                break
+            payload = [dict(zip(('source_text', 'source_lang', 'target_lang', 'translated_text',
+                                 'created_at', 'updated_at'), row)) for row in rows]
+            response = get_session().post(url, headers=headers, json=payload,
+                                          params={'on_conflict': CONFLICT_COLUMNS}, timeout=60)
+            if response.status_code not in (200, 201, 204):
+                raise RuntimeError(f'推送失败 HTTP {response.status_code}: {response.text[:200]}')
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE translation_cache SET dirty = 0 '
+                    'WHERE source_text = ? AND source_lang = ? AND target_lang = ?',
+                    [row[:3] for row in rows])
+            pushed += len(rows)
+
+        rpc_headers = dict(_headers(api_key))
+        rpc_headers['Content-Type'] = 'application/json'
+        hits = 0
+        while True:
+            rows = self.conn.execute(
+                'SELECT source_text, source_lang, target_lang, pending_hits FROM translation_cache '
+                'WHERE pending_hits > 0 LIMIT ?', (batch_size,)).fetchall()
+            if not rows:
+                return pushed, hits
+            payload = [dict(zip(('source_text', 'source_lang', 'target_lang', 'hits'), row)) for row in rows]
+            response = get_session().post(f'{base_url}/rest/v1/rpc/{INCREMENT_HITS_RPC}', headers=rpc_headers,
+                                          json={'p_rows': payload}, timeout=60)
+            if response.status_code not in (200, 204):
+                raise RuntimeError(f'推送命中数失败 HTTP {response.status_code}: {response.text[:200]}')
+            with self.conn:
+                self.conn.executemany(
+                    'UPDATE translation_cache SET pending_hits = pending_hits - ? '
+                    'WHERE source_text = ? AND source_lang = ? AND target_lang = ?',
+                    [(row[3], *row[:3]) for row in rows])
+            hits += sum(row[3] for row in rows)
+
+def _headers(api_key):
+    return {'apikey': api_key or '', 'Authorization': f'Bearer {api_key or ""}'}
+
+_session = None
+
+def get_session():
+    """惰性创建共享的 requests 会话（只有同步时才需要 requests）"""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+def main():
+    parser = argparse.ArgumentParser(description='本地翻译缓存管理')
+    parser.add_argument('--db', default=DEFAULT_CACHE_PATH, help='SQLite 缓存文件')
+    parser.add_argument('--pull', action='store_true', help='从远端拉取新增/更新的条目')
+    parser.add_argument('--push', action='store_true', help='把本地修改推送到远端')
+    parser.add_argument('--url', default=os.getenv('VITE_SUPABASE_URL'), help='Supabase/PostgREST 地址')
+    parser.add_argument('--stats', action='store_true', help='显示缓存统计')
+    args = parser.parse_args()
+    api_key = os.getenv('VITE_SUPABASE_ANON_KEY')
+
+    if (args.pull or args.push) and not args.url:
+        print('❌ 错误: 未设置 VITE_SUPABASE_URL，也没有指定 --url')
+        sys.exit(1)
+
+    with TranslationCache(args.db) as cache:
+        try:
+            if args.pull:
+                print(f'⬇️  拉取 {cache.pull(args.url, api_key)} 条')
+            if args.push:
+                pushed, hits = cache.push(args.url, api_key)
+                print(f'⬆️  推送 {pushed} 条译文、{hits} 次命中')
+        except RuntimeError as e:
+            print(f'❌ {e}')
+            sys.exit(1)
+        if args.stats or not (args.pull or args.push):
+            print(f'缓存文件: {args.db}')
+            for source_lang, target_lang, count, hits, dirty, pending_hits in cache.summary():
+                print(f'  {source_lang} -> {target_lang}: {count} 条, 命中 {hits} 次, '
+                      f'待推送 {dirty} 条译文、{pending_hits} 次命中')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量的 TS/TSX 词法扫描器
+
+只找出需要翻译的文本区域：字符串字面量、模板字符串的文本片段、JSX 文本节点、
+JSX 属性字符串和注释。标识符、import 路径以外的代码一律跳过，
+这样替换引擎既不会误改代码，需要扫描的字节也少得多。
+
+区域以 (start, end, kind) 表示，start/end 为不含引号的内容范围，kind 取值：
+  string    普通字符串（'...' 或 "..."）
+  template  模板字符串中 ${...} 之外的文本
+  jsx_text  JSX 子节点文本
+  jsx_attr  JSX 属性字符串
+  comment   // 或 /* */ 注释
+import/export ... from '...'、import('...')、require('...') 中的模块路径不算可翻译区域。
+"""
+
+import re
+
+# 代码模式下不影响状态的连续字符（标识符、数字、空白、大部分运算符）整段跳过
+_CODE_RUN = re.compile(r"[^'\"`/<{}]+")
+_TRAILING_WORD = re.compile(r'[\w$]+$')
+# 字符串前面是这些记号时，它是模块路径
+_MODULE_PREFIX = re.compile(r'(?:(?<![\w$.])(?:from|import)|(?<![\w$.])(?:import|require)\s*\()\s*$')
+
+# 这些关键字之后出现的 / 是正则、< 是 JSX
+_EXPRESSION_KEYWORDS = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+    'case', 'do', 'else', 'yield', 'await', 'default', 'extends',
+}
+
+_STRING_BODY = {
+    "'": re.compile(r"[^'\\\n]*(?:\\.[^'\\\n]*)*"),
+    '"': re.compile(r'[^"\\\n]*(?:\\.[^"\\\n]*)*'),
+}
+_TEMPLATE_BODY = re.compile(r'[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*', re.DOTALL)
+_REGEX_BODY = re.compile(r'(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])*/[A-Za-z]*')
+_JSX_NAME = re.compile(r'[A-Za-z_$][\w$.:\-]*')
+_JSX_TAG_TOKEN = re.compile(r'[^"\'{/>]+|/>|.', re.DOTALL)
+_JSX_TEXT = re.compile(r'[^<{]+')
+
+def _jsx_can_start(source, pos):
+    """< 后面是标签名或 >（片段）时才可能是 JSX"""
+    nxt = source[pos + 1:pos + 2]
+    return nxt == '>' or bool(_JSX_NAME.match(source, pos + 1))
+
+def iter_text_regions(source, jsx=True):
+    """逐个产出可翻译区域 (start, end, kind)，按位置排序"""
+    length = len(source)
+    pos = 0
+    # 栈元素: ['code', 花括号深度] / ['template'] / ['jsx_tag'] / ['jsx_children']
+    stack = [['code', 0]]
+    # 上一个有效记号是否“值结束”（标识符、数字、字符串、右括号等）
+    value_end = False
+
+    while pos < length:
+        mode = stack[-1][0]
+
+        if mode == 'template':
+            m = _TEMPLATE_BODY.match(source, pos)
+            end = m.end()
+            if end > pos:
+                yield pos, end, 'template'
+            if source.startswith('${', end):
+                stack.append(['code', 0])
+                pos = end + 2
+                value_end = False
+            else:
+                # 结束的反引号（或文件结束）
+                stack.pop()
+                pos = end + 1
+                value_end = True
+            continue
+
+        if mode == 'jsx_children':
+            if source[pos] == '{':
+                stack.append(['code', 0])
+                pos += 1
+                value_end = False
+                continue
+            if source[pos] == '<':
+                if source.startswith('</', pos):
+                    close = source.find('>', pos)
+                    pos = length if close < 0 else close + 1
+                    stack.pop()
+                    if stack[-1][0] == 'code':
+                        value_end = True
+                else:
+                    stack.append(['jsx_tag'])
+                    m = _JSX_NAME.match(source, pos + 1)
+                    pos = m.end() if m else pos + 1
+                continue
+            m = _JSX_TEXT.match(source, pos)
+            if m.group(0).strip():
+                yield pos, m.end(), 'jsx_text'
+            pos = m.end()
+            continue
+
+        if mode == 'jsx_tag':
+            m = _JSX_TAG_TOKEN.match(source, pos)
+            token = m.group(0)
+            if token == '/>':
+                stack.pop()
+                if stack[-1][0] == 'code':
+                    value_end = True
+            elif token == '>':
+                stack[-1] = ['jsx_children']
+            elif token == '{':
+                stack.append(['code', 0])
+                value_end = False
+            elif token in ('"', "'"):
+                # JSX 属性字符串不支持反斜杠转义
+                close = source.find(token, m.end())
+                close = length if close < 0 else close
+                if close > m.end():
+                    yield m.end(), close, 'jsx_attr'
+                pos = close + 1
+                continue
+            pos = m.end()
+            continue
+
+        # 代码模式
+        ch = source[pos]
+        if ch not in '\'"`/<{}':
+            run = _CODE_RUN.match(source, pos)
+            pos = run.end()
+            tail = run.group(0).rstrip()
+            if tail:
+                last = tail[-1]
+                if last in ')]':
+                    value_end = True
+                else:
+                    word = _TRAILING_WORD.search(tail[-12:])
+                    value_end = bool(word) and word.group(0) not in _EXPRESSION_KEYWORDS
+            continue
+
+        if ch in '\'"':
+            body = _STRING_BODY[ch].match(source, pos + 1)
+            if body.end() > pos + 1 and not _MODULE_PREFIX.search(source[max(0, pos - 40):pos]):
+                yield pos + 1, body.end(), 'string'
+            pos = body.end() + 1
+            value_end = True
+        elif ch == '`':
+            stack.append(['template'])
+            pos += 1
+        elif source.startswith('//', pos):
+            end = source.find('\n', pos)
+            end = length if end < 0 else end
+            if end > pos + 2:
+                yield pos + 2, end, 'comment'
+            pos = end
+        elif source.startswith('/*', pos):
+            close = source.find('*/', pos + 2)
+            end = length if close < 0 else close
+            if end > pos + 2:
+                yield pos + 2, end, 'comment'
+            pos = length if close < 0 else close + 2
+        elif ch == '/':
+            if value_end:
+                pos += 1
+                value_end = False
+            else:
+                body = _REGEX_BODY.match(source, pos + 1)
+                pos = body.end() if body else pos + 1
+                value_end = True
+        elif ch == '<':
+            if jsx and not value_end and _jsx_can_start(source, pos):
+                stack.append(['jsx_tag'])
+                name = _JSX_NAME.match(source, pos + 1)
+                pos = name.end() if name else pos + 1
+            else:
+                pos += 1
+                value_end = False
+        elif ch == '{':
+            stack[-1][1] += 1
+            value_end = False
+            pos += 1
+        else:
+            if stack[-1][1] == 0 and len(stack) > 1:
+                # ${...} 或 JSX 表达式容器结束
+                stack.pop()
+                value_end = True
+            else:
+                stack[-1][1] = max(0, stack[-1][1] - 1)
+                value_end = False
+            pos += 1